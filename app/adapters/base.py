@@ -1,5 +1,5 @@
 # app/adapters/base.py
-# Базовий клас адаптера: уніфікований інтерфейс fetch()
+# Базовий клас адаптера: уніфікований інтерфейс fetch() (+ опційний async afetch())
 
 from typing import Protocol, TypedDict, Optional, Any
 
@@ -10,4 +10,8 @@ class CheckResult(TypedDict, total=False):
     note: str
 
 class Adapter(Protocol):
-    def fetch(self, query: dict) -> CheckResult: ...
\ No newline at end of file
+    def fetch(self, query: dict) -> CheckResult: ...
+
+class AsyncAdapter(Protocol):
+    # client — спільний httpx.AsyncClient оркестратора (див. utils.http.async_client)
+    async def afetch(self, query: dict, client: Any) -> CheckResult: ...
@@ -7,6 +7,8 @@ from flask import current_app
 
 class InsolvenzAdapter:
     SOURCE = "insolvenz"
+    # Оголошення про неплатоспроможність публікуються щодня
+    REFRESH_INTERVAL = 86400
 
     def fetch(self, query: dict) -> CheckResult:
         if not (current_app and current_app.config.get('INSOLVENZ_ENABLED')):
@@ -3,120 +3,130 @@
 
 from .base import CheckResult
 from flask import current_app
-import requests
-import os
-import json
-import time
+from ..utils.cache import source_cache, source_ttl
+from ..utils.http import get_session
 import hashlib
 
 class OpenCorporatesAdapter:
     SOURCE = "opencorporates"
+    REFRESH_INTERVAL = 30 * 86400
 
     BASE = "https://api.opencorporates.com/v0.4/"
-    CACHE_DIR = os.path.join(os.getcwd(), ".cache", "opencorp")
-    CACHE_TTL = 60 * 60 * 24  # 24 hours
+    CACHE_TTL = 60 * 60 * 24  # 24 hours (CACHE_TTLS["opencorporates"] overrides)
 
-    def fetch(self, query: dict) -> CheckResult:
+    def _precheck(self):
+        """Return (early_result, api_key)."""
         # Only run if enabled
         cfg = current_app.config
         if not cfg.get("OPENCORP_ENABLED"):
-            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "OpenCorporates disabled"}
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "OpenCorporates disabled"}, None
 
         api_key = cfg.get("OPENCORP_API_KEY")
         if not api_key:
-            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No API key configured"}
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No API key configured"}, None
+        return None, api_key
+
+    @staticmethod
+    def _cache_key(vat: str, name: str) -> str:
+        return hashlib.sha256(f"{vat}|{name}".encode("utf-8")).hexdigest()
+
+    def _cache_ttl(self, result: dict) -> float:
+        # HTTP-помилки не кешуємо; знайдені компанії і "No companies found" — так
+        if "http_status" in result.get("data", {}):
+            return 0
+        return source_ttl(self.SOURCE, self.CACHE_TTL)
 
+    def _searches(self, vat: str, name: str, api_key: str) -> list[dict]:
+        """Search params to try in order; the first response with companies wins."""
+        params = {"api_token": api_key, "per_page": 5}
         # Prefer search by VAT / tax_number when provided
+        if vat:
+            # Normalize VAT: remove spaces/dashes and uppercase
+            vat_clean = vat.replace(" ", "").replace("-", "").upper()
+            # If VAT starts with two letters, treat as country prefix
+            if len(vat_clean) > 2 and vat_clean[:2].isalpha():
+                # use q=number and jurisdiction_code to improve matching,
+                # fallback to searching the full VAT string
+                return [
+                    {**params, "q": vat_clean[2:], "jurisdiction_code": vat_clean[:2].lower()},
+                    {**params, "q": vat_clean},
+                ]
+            return [{**params, "q": vat_clean}]
+        if name:
+            return [{**params, "q": name}]
+        return []
+
+    @staticmethod
+    def _has_companies(status_code: int, payload) -> bool:
+        return status_code == 200 and bool((payload or {}).get("results", {}).get("companies"))
+
+    def _result(self, status_code: int, payload) -> CheckResult:
+        if status_code != 200:
+            return {"status": "unknown", "data": {"http_status": status_code}, "source": self.SOURCE, "note": "OpenCorporates HTTP error"}
+
+        companies = payload.get("results", {}).get("companies", [])
+        if not companies:
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No companies found"}
+
+        # pick the top candidate
+        c = companies[0].get("company", {})
+        data = {
+            "name": c.get("name"),
+            "company_number": c.get("company_number"),
+            "jurisdiction_code": c.get("jurisdiction_code"),
+            "incorporation_date": c.get("incorporation_date"),
+            "source_url": c.get("opencorporates_url")
+        }
+        return {"status": "ok", "data": data, "source": self.SOURCE, "note": "Found by OpenCorporates"}
+
+    def _search(self, searches: list[dict]) -> CheckResult:
+        session = get_session(self.BASE)
+        for params in searches:
+            r = session.get(self.BASE + "companies/search", params=params, timeout=10)
+            payload = r.json() if r.status_code == 200 else None
+            if self._has_companies(r.status_code, payload):
+                break
+        return self._result(r.status_code, payload)
+
+    async def _asearch(self, searches: list[dict], client) -> CheckResult:
+        for params in searches:
+            r = await client.get(self.BASE + "companies/search", params=params, timeout=10)
+            payload = r.json() if r.status_code == 200 else None
+            if self._has_companies(r.status_code, payload):
+                break
+        return self._result(r.status_code, payload)
+
+    def fetch(self, query: dict) -> CheckResult:
+        early, api_key = self._precheck()
+        if early:
+            return early
+
         vat = (query.get("vat_number") or "").strip()
         name = (query.get("name") or "").strip()
-        params = {"api_token": api_key}
-
-        def _do_search(params_local):
-            return requests.get(self.BASE + "companies/search", params={**params_local, "per_page": 5}, timeout=10)
 
         try:
-            # ensure cache dir
-            os.makedirs(self.CACHE_DIR, exist_ok=True)
-
-            # prepare cache key from query
-            cache_key_raw = f"{vat}|{name}"
-            cache_key = hashlib.sha256(cache_key_raw.encode("utf-8")).hexdigest()
-            cache_path = os.path.join(self.CACHE_DIR, cache_key + ".json")
-
-            # check cache
-            if os.path.exists(cache_path):
-                try:
-                    with open(cache_path, "r", encoding="utf-8") as fh:
-                        cached = json.load(fh)
-                    if time.time() - cached.get("ts", 0) < self.CACHE_TTL:
-                        return cached.get("value")
-                except Exception:
-                    # ignore cache errors
-                    pass
-            if vat:
-                # Normalize VAT: remove spaces/dashes and uppercase
-                vat_clean = vat.replace(" ", "").replace("-", "").upper()
-                country = ""
-                number = vat_clean
-                # If VAT starts with two letters, treat as country prefix
-                if len(vat_clean) > 2 and vat_clean[:2].isalpha():
-                    country = vat_clean[:2].lower()
-                    number = vat_clean[2:]
-
-                # If we have a country code, prefer jurisdiction specific search
-                if country:
-                    # use q=number and jurisdiction_code to improve matching
-                    params_search = {**params, "q": number, "jurisdiction_code": country}
-                    r = _do_search(params_search)
-                    # if no results, fallback to searching the full VAT string
-                    if r.status_code == 200:
-                        payload = r.json()
-                        if payload.get("results", {}).get("companies"):
-                            found = True
-                        else:
-                            found = False
-                    else:
-                        found = False
-
-                    if not found:
-                        r = _do_search({**params, "q": vat_clean})
-                else:
-                    r = _do_search({**params, "q": vat_clean})
-            elif name:
-                r = _do_search({**params, "q": name})
-            else:
+            searches = self._searches(vat, name, api_key)
+            if not searches:
                 return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No search term"}
+            # Спільний кеш (пам'ять + SQLite/Redis); однакові одночасні запити — один виклик API
+            return source_cache(self.SOURCE).get_or_set(
+                self._cache_key(vat, name), lambda: self._search(searches), self._cache_ttl)
+        except Exception as e:
+            return {"status": "unknown", "data": {"error": str(e)}, "source": self.SOURCE, "note": "OpenCorporates error"}
+
+    async def afetch(self, query: dict, client) -> CheckResult:
+        early, api_key = self._precheck()
+        if early:
+            return early
 
-            if r.status_code != 200:
-                return {"status": "unknown", "data": {"http_status": r.status_code}, "source": self.SOURCE, "note": "OpenCorporates HTTP error"}
-
-            payload = r.json()
-            companies = payload.get("results", {}).get("companies", [])
-            if not companies:
-                result = {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No companies found"}
-                # write cache
-                try:
-                    with open(cache_path, "w", encoding="utf-8") as fh:
-                        json.dump({"ts": time.time(), "value": result}, fh)
-                except Exception:
-                    pass
-                return result
-
-            # pick the top candidate
-            c = companies[0].get("company", {})
-            data = {
-                "name": c.get("name"),
-                "company_number": c.get("company_number"),
-                "jurisdiction_code": c.get("jurisdiction_code"),
-                "incorporation_date": c.get("incorporation_date"),
-                "source_url": c.get("opencorporates_url")
-            }
-            result = {"status": "ok", "data": data, "source": self.SOURCE, "note": "Found by OpenCorporates"}
-            try:
-                with open(cache_path, "w", encoding="utf-8") as fh:
-                    json.dump({"ts": time.time(), "value": result}, fh)
-            except Exception:
-                pass
-            return result
+        vat = (query.get("vat_number") or "").strip()
+        name = (query.get("name") or "").strip()
+
+        try:
+            searches = self._searches(vat, name, api_key)
+            if not searches:
+                return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "No search term"}
+            return await source_cache(self.SOURCE).aget_or_set(
+                self._cache_key(vat, name), lambda: self._asearch(searches, client), self._cache_ttl)
         except Exception as e:
             return {"status": "unknown", "data": {"error": str(e)}, "source": self.SOURCE, "note": "OpenCorporates error"}
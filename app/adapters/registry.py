@@ -0,0 +1,80 @@
+# app/adapters/registry.py
+# Реєстр адаптерів за SOURCE: модуль адаптера імпортується лише при першому використанні
+# (pandas/rapidfuzz/lxml не потрапляють у web-процеси), інстанс — один на процес.
+
+import importlib
+import os
+import threading
+
+# SOURCE -> "модуль:клас"
+ADAPTERS = {
+    "vies": "app.adapters.vies_adapter:ViesAdapter",
+    "sanctions_eu": "app.adapters.sanctions_eu_adapter:EUSanctionsAdapter",
+    "sanctions_ofac": "app.adapters.sanctions_ofac_adapter:OFACAdapter",
+    "sanctions_uk": "app.adapters.sanctions_uk_adapter:UKSanctionsAdapter",
+    "unternehmensregister": "app.adapters.unternehmensregister_adapter:UnternehmensregisterAdapter",
+    "insolvenz": "app.adapters.insolvenz_adapter:InsolvenzAdapter",
+    "opencorporates": "app.adapters.opencorporates_adapter:OpenCorporatesAdapter",
+    "whois": "app.adapters.whois_denic_adapter:WhoisDenicAdapter",
+    "ssl_labs": "app.adapters.ssl_labs_adapter:SSLLabsAdapter",
+}
+
+# Адаптери після кроку збагачення VIES/OpenCorporates, у порядку результатів
+FOLLOWUP_SOURCES = (
+    "sanctions_eu", "sanctions_ofac", "sanctions_uk",
+    "unternehmensregister", "insolvenz", "opencorporates",
+    "whois", "ssl_labs",
+)
+
+_INSTANCES: dict = {}
+_INSTANCES_PID = None
+_LOCK = threading.Lock()
+
+
+def register(source: str, target) -> None:
+    """Add or replace an adapter: target is a class or a "module:Class" path."""
+    with _LOCK:
+        ADAPTERS[source] = target
+        _INSTANCES.pop(source, None)
+
+
+def adapter_class(source: str):
+    target = ADAPTERS.get(source)
+    if target is None:
+        raise KeyError(f"unknown adapter source: {source}")
+    if isinstance(target, str):
+        module, _, name = target.partition(":")
+        target = getattr(importlib.import_module(module), name)
+    if getattr(target, "SOURCE", source) != source:
+        raise ValueError(f"{target.__name__}.SOURCE is {target.SOURCE!r}, registered as {source!r}")
+    return target
+
+
+def get_adapter(source: str):
+    """Process-wide adapter instance for source, imported and built on first use.
+
+    Instances are dropped in forked children (Celery prefork), so anything an
+    adapter captured in __init__ (e.g. its HTTP session) belongs to this process.
+    """
+    global _INSTANCES_PID
+    if _INSTANCES_PID == os.getpid():
+        inst = _INSTANCES.get(source)
+        if inst is not None:
+            return inst
+    with _LOCK:
+        if _INSTANCES_PID != os.getpid():
+            _INSTANCES.clear()
+            _INSTANCES_PID = os.getpid()
+        inst = _INSTANCES.get(source)
+        if inst is None:
+            inst = _INSTANCES[source] = adapter_class(source)()
+        return inst
+
+
+def get_adapters(sources) -> list:
+    return [get_adapter(s) for s in sources]
+
+
+def clear_adapters() -> None:
+    with _LOCK:
+        _INSTANCES.clear()
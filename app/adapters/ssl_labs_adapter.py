@@ -3,39 +3,65 @@
 
 from .base import CheckResult
 from flask import current_app
-from ..utils.http import requests_session_with_retries
+from ..utils.http import get_session
 from ..utils.logging import get_logger
 
 
 class SSLLabsAdapter:
     SOURCE = "ssl_labs"
+    REFRESH_INTERVAL = 7 * 86400
 
     API = 'https://api.ssllabs.com/api/v3/'
 
-    def fetch(self, query: dict) -> CheckResult:
+    def fingerprint(self, query: dict) -> str:
+        return (query.get("website") or "").replace("https://", "").replace("http://", "").strip("/")
+
+    def _precheck(self, query: dict):
+        """Return (early_result, domain)."""
         if not (current_app and current_app.config.get('SSL_LABS_ENABLED')):
-            return {"status": "error", "data": {}, "source": self.SOURCE, "note": "SSL Labs adapter not enabled or not configured"}
+            return {"status": "error", "data": {}, "source": self.SOURCE, "note": "SSL Labs adapter not enabled or not configured"}, None
 
         domain = (query.get("website") or "").replace("https://", "").replace("http://", "").strip("/")
         if not domain:
-            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "domain not provided"}
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "domain not provided"}, None
+        return None, domain
+
+    def _result(self, status_code: int, payload) -> CheckResult:
+        if status_code != 200:
+            return {"status": "warning", "data": {"http_status": status_code}, "source": self.SOURCE, "note": "SSL Labs analyze HTTP error"}
+        # payload contains endpoints with grades
+        endpoints = payload.get('endpoints', [])
+        grade = None
+        if endpoints:
+            grade = endpoints[0].get('grade')
+        status = 'ok' if grade and grade in ('A','A+') else ('warning' if grade else 'unknown')
+        data = {'grade': grade, 'endpoints': endpoints}
+        return {"status": status, "data": data, "source": self.SOURCE, "note": "SSL Labs result"}
+
+    def _error(self, domain: str, e: Exception) -> CheckResult:
+        get_logger().exception('SSL Labs error for %s', domain)
+        return {"status": "error", "data": {"error": str(e)}, "source": self.SOURCE, "note": "SSL Labs error"}
+
+    def fetch(self, query: dict) -> CheckResult:
+        early, domain = self._precheck(query)
+        if early:
+            return early
 
-        logger = get_logger()
         try:
-            s = requests_session_with_retries()
+            s = get_session(self.API)
             params = {'host': domain, 'fromCache': 'on'}
             resp = s.get(self.API + 'analyze', params=params, timeout=current_app.config.get('EXTERNAL_REQUEST_TIMEOUT', 30))
-            if resp.status_code != 200:
-                return {"status": "warning", "data": {"http_status": resp.status_code}, "source": self.SOURCE, "note": "SSL Labs analyze HTTP error"}
-            payload = resp.json()
-            # payload contains endpoints with grades
-            endpoints = payload.get('endpoints', [])
-            grade = None
-            if endpoints:
-                grade = endpoints[0].get('grade')
-            status = 'ok' if grade and grade in ('A','A+') else ('warning' if grade else 'unknown')
-            data = {'grade': grade, 'endpoints': endpoints}
-            return {"status": status, "data": data, "source": self.SOURCE, "note": "SSL Labs result"}
+            return self._result(resp.status_code, resp.json() if resp.status_code == 200 else None)
+        except Exception as e:
+            return self._error(domain, e)
+
+    async def afetch(self, query: dict, client) -> CheckResult:
+        early, domain = self._precheck(query)
+        if early:
+            return early
+
+        try:
+            resp = await client.get(self.API + 'analyze', params={'host': domain, 'fromCache': 'on'})
+            return self._result(resp.status_code, resp.json() if resp.status_code == 200 else None)
         except Exception as e:
-            logger.exception('SSL Labs error for %s', domain)
-            return {"status": "error", "data": {"error": str(e)}, "source": self.SOURCE, "note": "SSL Labs error"}
\ No newline at end of file
+            return self._error(domain, e)
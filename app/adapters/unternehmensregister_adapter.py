@@ -7,6 +7,7 @@ from flask import current_app
 
 class UnternehmensregisterAdapter:
     SOURCE = "unternehmensregister"
+    REFRESH_INTERVAL = 7 * 86400
 
     def fetch(self, query: dict) -> CheckResult:
         if not (current_app and current_app.config.get('UNTERNEHMENSREGISTER_ENABLED')):
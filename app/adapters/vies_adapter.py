@@ -3,16 +3,74 @@
 #  - checkVat (анонімна) — як було
 #  - checkVatApprox (із реквізитами запитувача) — щоб отримати traderName/traderAddress
 # Жодних системних проксі. Ручний парсинг XML і нормалізація дати.
+# afetch() — той самий протокол поверх спільного httpx.AsyncClient.
+# Відповіді кешуються у спільному кеші адаптерів (utils/cache.source_cache, разом із захистом
+# від stampede) з окремими TTL для valid/invalid/помилок. Запити до однієї країни обмежені token bucket'ом.
 
 from .base import CheckResult
-import os, re
+import asyncio, os, re, time
+from datetime import timedelta
+import httpx
 import requests
+from flask import current_app, has_app_context
 from lxml import etree
 from dateutil import parser as dtparser
+from ..services.change_detection import digest
+from ..utils.cache import source_cache
+from ..utils.http import get_session
+from ..utils.logging import get_logger
+from ..utils.rate_limit import TokenBucket
 
 VIES_SOAP_ENDPOINT = "https://ec.europa.eu/taxation_customs/vies/services/checkVatService"
 SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
 URN = "urn:ec.europa.eu:taxud:vies:services:checkVat:types"
+SOAP_HEADERS = {"Content-Type": "text/xml; charset=utf-8"}
+
+# Відповідь держави-члена "зайнято" — варто повторити з паузою
+BUSY_FAULTS = (b"MS_MAX_CONCURRENT_REQ", b"GLOBAL_MAX_CONCURRENT_REQ")
+
+DEFAULTS = {
+    "VIES_CACHE_ENABLED": True,
+    "VIES_CACHE_TTL_VALID": 86400,
+    "VIES_CACHE_TTL_INVALID": 21600,
+    "VIES_CACHE_TTL_ERROR": 60,
+    "VIES_RATE_PER_COUNTRY": 2.0,
+    "VIES_RATE_BURST": 4,
+    "VIES_RATE_MAX_WAIT": 30,
+    "VIES_BUSY_RETRIES": 2,
+    "VIES_BUSY_BACKOFF": 1.0,
+}
+
+_LIMITER = None
+
+
+class ViesThrottled(requests.RequestException):
+    """Our own per-country rate limiter had no slot in time; VIES was never asked."""
+
+
+def _setting(name: str):
+    if has_app_context():
+        return current_app.config.get(name, DEFAULTS[name])
+    return DEFAULTS[name]
+
+
+def vies_cache():
+    """VIES response cache (the shared adapter cache, see CACHE_BACKEND), or None when disabled."""
+    if not _setting("VIES_CACHE_ENABLED"):
+        return None
+    return source_cache("vies")
+
+
+def vies_limiter() -> TokenBucket:
+    """Per-country token bucket shared by all workers (via Redis when reachable)."""
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = TokenBucket("vies", float(_setting("VIES_RATE_PER_COUNTRY")), int(_setting("VIES_RATE_BURST")))
+    return _LIMITER
+
+
+def _is_busy(status_code: int, content: bytes) -> bool:
+    return status_code >= 500 and any(f in content for f in BUSY_FAULTS)
 
 SOAP_ENV_CHECK = """<?xml version="1.0" encoding="UTF-8"?>
 <soapenv:Envelope xmlns:soapenv="{soap_ns}" xmlns:urn="{urn}">
@@ -47,16 +105,24 @@ SOAP_ENV_APPROX = """<?xml version="1.0" encoding="UTF-8"?>
 
 class ViesAdapter:
     SOURCE = "vies"
+    REFRESH_INTERVAL = DEFAULTS["VIES_CACHE_TTL_VALID"]
+
+    def fingerprint(self, query: dict) -> str:
+        # Відповідь VIES визначає VAT; name/address/country VIES сам і заповнює
+        return digest((query.get("vat_number") or "").replace(" ", "").upper())
+
+    def next_check(self, data: dict, checked_at):
+        """Re-ask VIES on the same schedule as its cache: valid and invalid answers have separate TTLs."""
+        ttl = _setting("VIES_CACHE_TTL_VALID") if data.get("valid") else _setting("VIES_CACHE_TTL_INVALID")
+        return checked_at + timedelta(seconds=int(ttl))
 
     def __init__(self, timeout: int = 20):
         self.timeout = timeout
         for k in ("HTTP_PROXY","HTTPS_PROXY","ALL_PROXY","http_proxy","https_proxy","all_proxy"):
             os.environ.pop(k, None)
         os.environ["NO_PROXY"] = "*"
-        self.session = requests.Session()
-        self.session.trust_env = False
-        self.session.proxies = {"http": None, "https": None}
-        self.session.headers.update({"Content-Type": "text/xml; charset=utf-8"})
+        # Спільна (на процес) сесія з пулом з'єднань до VIES, без проксі з оточення
+        self.session = get_session(VIES_SOAP_ENDPOINT, trust_env=False)
 
     # --- utils ---
     def _split_vat(self, vat: str):
@@ -140,40 +206,177 @@ class ViesAdapter:
             "requestDate": self._normalize_date(date_txt),
         }
 
-    # --- calls ---
-    def _call_check(self, cc: str, num: str) -> dict:
-        xml = SOAP_ENV_CHECK.format(soap_ns=SOAP_ENV_NS, urn=URN, cc=cc, num=num).encode("utf-8")
-        r = self.session.post(VIES_SOAP_ENDPOINT, data=xml, timeout=self.timeout)
-        r.raise_for_status()
-        return self._parse_check_response(r.content)
+    # --- envelopes ---
+    def _check_envelope(self, cc: str, num: str) -> bytes:
+        return SOAP_ENV_CHECK.format(soap_ns=SOAP_ENV_NS, urn=URN, cc=cc, num=num).encode("utf-8")
 
-    def _call_approx(self, cc: str, num: str, req_cc: str, req_vat: str, trader_name_hint: str = "") -> dict:
-        xml = SOAP_ENV_APPROX.format(
+    def _approx_envelope(self, cc: str, num: str, req_cc: str, req_vat: str, trader_name_hint: str = "") -> bytes:
+        return SOAP_ENV_APPROX.format(
             soap_ns=SOAP_ENV_NS, urn=URN, cc=cc, num=num,
             req_cc=req_cc, req_vat=req_vat, trader_name=trader_name_hint or ""
         ).encode("utf-8")
-        r = self.session.post(VIES_SOAP_ENDPOINT, data=xml, timeout=self.timeout)
-        r.raise_for_status()
-        print(f"VIES approx XML response: {r.content.decode('utf-8', errors='ignore')}")
+
+    # --- cache ---
+    def _check_key(self, cc: str, num: str) -> str:
+        return f"check:{cc}:{num}"
+
+    def _approx_key(self, cc: str, num: str, req_cc: str, req_vat: str, trader_name_hint: str = "") -> str:
+        return f"approx:{cc}:{num}:{req_cc}:{req_vat}:{trader_name_hint.lower()}"
+
+    def _cache_ttl(self, parsed: dict) -> int:
+        valid = parsed.get("valid")
+        if valid is True:
+            return int(_setting("VIES_CACHE_TTL_VALID"))
+        if valid is False:
+            return int(_setting("VIES_CACHE_TTL_INVALID"))
+        # порожня/нерозібрана відповідь — як тимчасова помилка
+        return int(_setting("VIES_CACHE_TTL_ERROR"))
+
+    def _entry_ttl(self, entry: dict) -> int:
+        # тимчасова помилка кешується коротко, щоб збій не бомбардував VIES повторами
+        if "error" in entry:
+            return int(_setting("VIES_CACHE_TTL_ERROR"))
+        return self._cache_ttl(entry["value"])
+
+    @staticmethod
+    def _cacheable(e: Exception) -> bool:
+        # Кешуються лише збої, що повернув сам VIES (HTTP-статус, SOAP fault, нерозбірна відповідь);
+        # наш throttle і транспортні помилки (timeout, з'єднання) — ні
+        if isinstance(e, (requests.HTTPError, httpx.HTTPStatusError)):
+            return True
+        return not isinstance(e, (requests.RequestException, httpx.HTTPError))
+
+    @staticmethod
+    def _error_entry(e: Exception) -> dict:
+        return {"error": str(e), "http": isinstance(e, (httpx.HTTPError, requests.RequestException))}
+
+    @staticmethod
+    def _unwrap(entry: dict, raised: list):
+        """Parsed response from a cache entry; a cached error is raised again."""
+        if "error" not in entry:
+            return entry["value"]
+        if raised:
+            raise raised[0]  # помилку отримав саме цей виклик
+        if entry["http"]:
+            raise requests.RequestException(f"{entry['error']} (cached)")
+        raise RuntimeError(f"{entry['error']} (cached)")
+
+    def _via_cache(self, key: str, call):
+        """call() through source_cache("vies"): one SOAP request per key across threads/workers."""
+        cache = vies_cache()
+        if cache is None:
+            return call()
+        raised = []
+
+        def fill():
+            try:
+                return {"value": call()}
+            except Exception as e:
+                if not self._cacheable(e):
+                    raise
+                raised.append(e)
+                return self._error_entry(e)
+
+        return self._unwrap(cache.get_or_set(key, fill, self._entry_ttl, self.timeout), raised)
+
+    async def _avia_cache(self, key: str, call):
+        cache = vies_cache()
+        if cache is None:
+            return await call()
+        raised = []
+
+        async def fill():
+            try:
+                return {"value": await call()}
+            except Exception as e:
+                if not self._cacheable(e):
+                    raise
+                raised.append(e)
+                return self._error_entry(e)
+
+        return self._unwrap(await cache.aget_or_set(key, fill, self._entry_ttl, self.timeout), raised)
+
+    # --- calls ---
+    def _throttle(self, cc: str) -> None:
+        wait = float(_setting("VIES_RATE_MAX_WAIT"))
+        if not vies_limiter().acquire(cc, wait):
+            raise ViesThrottled(f"VIES rate limit: no slot for {cc} within {wait:g}s")
+
+    async def _athrottle(self, cc: str) -> None:
+        wait = float(_setting("VIES_RATE_MAX_WAIT"))
+        if not await vies_limiter().aacquire(cc, wait):
+            raise ViesThrottled(f"VIES rate limit: no slot for {cc} within {wait:g}s")
+
+    def _post(self, cc: str, xml: bytes):
+        retries = int(_setting("VIES_BUSY_RETRIES"))
+        backoff = float(_setting("VIES_BUSY_BACKOFF"))
+        for attempt in range(retries + 1):
+            self._throttle(cc)
+            r = self.session.post(VIES_SOAP_ENDPOINT, data=xml, headers=SOAP_HEADERS, timeout=self.timeout)
+            if attempt < retries and _is_busy(r.status_code, r.content):
+                time.sleep(backoff * 2 ** attempt)
+                continue
+            r.raise_for_status()
+            return r
+
+    async def _apost(self, client, cc: str, xml: bytes):
+        retries = int(_setting("VIES_BUSY_RETRIES"))
+        backoff = float(_setting("VIES_BUSY_BACKOFF"))
+        for attempt in range(retries + 1):
+            await self._athrottle(cc)
+            r = await client.post(VIES_SOAP_ENDPOINT, content=xml, headers=SOAP_HEADERS, timeout=self.timeout)
+            if attempt < retries and _is_busy(r.status_code, r.content):
+                await asyncio.sleep(backoff * 2 ** attempt)
+                continue
+            r.raise_for_status()
+            return r
+
+    def _post_check(self, cc: str, num: str) -> dict:
+        r = self._post(cc, self._check_envelope(cc, num))
+        return self._parse_check_response(r.content)
+
+    def _post_approx(self, cc: str, num: str, req_cc: str, req_vat: str, trader_name_hint: str = "") -> dict:
+        r = self._post(cc, self._approx_envelope(cc, num, req_cc, req_vat, trader_name_hint))
         return self._parse_approx_response(r.content)
 
-    def fetch(self, query: dict) -> CheckResult:
+    async def _apost_check(self, client, cc: str, num: str) -> dict:
+        r = await self._apost(client, cc, self._check_envelope(cc, num))
+        return self._parse_check_response(r.content)
+
+    async def _apost_approx(self, client, cc: str, num: str, req_cc: str, req_vat: str, trader_name_hint: str = "") -> dict:
+        r = await self._apost(client, cc, self._approx_envelope(cc, num, req_cc, req_vat, trader_name_hint))
+        return self._parse_approx_response(r.content)
+
+    def _call_check(self, cc: str, num: str) -> dict:
+        return self._via_cache(self._check_key(cc, num), lambda: self._post_check(cc, num))
+
+    def _call_approx(self, *args) -> dict:
+        return self._via_cache(self._approx_key(*args), lambda: self._post_approx(*args))
+
+    async def _acall_check(self, client, cc: str, num: str) -> dict:
+        return await self._avia_cache(self._check_key(cc, num), lambda: self._apost_check(client, cc, num))
+
+    async def _acall_approx(self, client, *args) -> dict:
+        return await self._avia_cache(self._approx_key(*args), lambda: self._apost_approx(client, *args))
+
+    # --- result shaping (спільне для fetch/afetch) ---
+    def _split_query(self, query: dict):
+        """Return (early_result, vat_full, cc, num); early_result is set when VIES can't be asked."""
         vat_full = (query.get("vat_number") or "").strip()
         if not vat_full:
-            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "VAT not provided"}
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "VAT not provided"}, vat_full, None, None
 
         cc, num = self._split_vat(vat_full)
         if not cc or not num:
-            return {"status": "warning", "data": {"vat_number": vat_full}, "source": self.SOURCE, "note": "Invalid VAT format"}
+            return {"status": "warning", "data": {"vat_number": vat_full}, "source": self.SOURCE, "note": "Invalid VAT format"}, vat_full, cc, num
+        return None, vat_full, cc, num
 
-        # 1) Базова (анонімна) перевірка
-        try:
-            basic = self._call_check(cc, num)
-        except requests.RequestException as e:
+    def _error_result(self, e: Exception, query: dict, http: bool) -> CheckResult:
+        if http:
             return {"status": "unknown", "data": {"error": f"HTTP error: {e}", "used_query": query}, "source": self.SOURCE, "note": "VIES HTTP error"}
-        except Exception as e:
-            return {"status": "unknown", "data": {"error": f"Unexpected: {e}", "used_query": query}, "source": self.SOURCE, "note": "VIES unexpected error"}
+        return {"status": "unknown", "data": {"error": f"Unexpected: {e}", "used_query": query}, "source": self.SOURCE, "note": "VIES unexpected error"}
 
+    def _basic_data(self, vat_full: str, cc: str, basic: dict) -> dict:
         data = {
             "vat_number": vat_full,
             "country_code": cc,
@@ -182,32 +385,83 @@ class ViesAdapter:
             "name": basic.get("name"),
             "address": basic.get("address"),
         }
-        print(f"VIES basic result: {data}")
-        status = "ok" if data["valid"] else ("warning" if data["valid"] is False else "unknown")
-        note = "VAT is valid" if data["valid"] else ("VAT is NOT valid" if data["valid"] is False else "VIES unknown")
+        get_logger().debug("VIES basic result: %s", data)
+        return data
 
-        # 2) Якщо немає name/address і є реквізити запитувача — спробуємо checkVatApprox
+    def _approx_args(self, query: dict, data: dict, cc: str, num: str):
+        """Arguments for checkVatApprox, or None when it isn't needed / possible."""
+        # Якщо немає name/address і є реквізити запитувача — спробуємо checkVatApprox
         req = query.get("requester") or {}
         req_cc = (req.get("country_code") or "").strip().upper()
         req_vat = (req.get("vat_number") or "").strip().upper().replace(" ", "")
         trader_hint = (query.get("name") or "").strip()
 
-        import logging
-        print(f"VIES fetch: vat_full={vat_full}, cc={cc}, num={num}, req_cc={req_cc}, req_vat={req_vat}, trader_hint={trader_hint}")
+        get_logger().debug("VIES fetch: vat_full=%s, cc=%s, num=%s, req_cc=%s, req_vat=%s, trader_hint=%s",
+                           data["vat_number"], cc, num, req_cc, req_vat, trader_hint)
 
         if not data.get("name") and req_cc and req_vat and req_vat != num:
+            return cc, num, req_cc, req_vat, trader_hint
+        return None
+
+    def _merge_approx(self, data: dict, approx: dict) -> None:
+        get_logger().debug("VIES approx result: %s", approx)
+        if approx.get("name") and not data.get("name"):
+            data["name"] = approx["name"]
+        if approx.get("address") and not data.get("address"):
+            data["address"] = approx["address"]
+        if approx.get("requestDate"):
+            data["request_date"] = approx["requestDate"] or data["request_date"]
+
+    def _result(self, data: dict) -> CheckResult:
+        status = "ok" if data["valid"] else ("warning" if data["valid"] is False else "unknown")
+        note = "VAT is valid" if data["valid"] else ("VAT is NOT valid" if data["valid"] is False else "VIES unknown")
+        return {"status": status, "data": data, "source": self.SOURCE, "note": note}
+
+    def fetch(self, query: dict) -> CheckResult:
+        early, vat_full, cc, num = self._split_query(query)
+        if early:
+            return early
+
+        # 1) Базова (анонімна) перевірка
+        try:
+            basic = self._call_check(cc, num)
+        except requests.RequestException as e:
+            return self._error_result(e, query, http=True)
+        except Exception as e:
+            return self._error_result(e, query, http=False)
+
+        data = self._basic_data(vat_full, cc, basic)
+
+        # 2) checkVatApprox за наявності реквізитів запитувача
+        args = self._approx_args(query, data, cc, num)
+        if args:
             try:
-                approx = self._call_approx(cc, num, req_cc, req_vat, trader_hint)
-                print(f"VIES approx result: {approx}")
-                if approx.get("name") and not data.get("name"):
-                    data["name"] = approx["name"]
-                if approx.get("address") and not data.get("address"):
-                    data["address"] = approx["address"]
-                if approx.get("requestDate"):
-                    data["request_date"] = approx["requestDate"] or data["request_date"]
+                self._merge_approx(data, self._call_approx(*args))
             except Exception as e:
                 # тихо ігноруємо, якщо не вдалось
-                print(f"VIES approx error: {e}")
-                pass
+                get_logger().debug("VIES approx error: %s", e)
+
+        return self._result(data)
+
+    async def afetch(self, query: dict, client) -> CheckResult:
+        early, vat_full, cc, num = self._split_query(query)
+        if early:
+            return early
+
+        try:
+            basic = await self._acall_check(client, cc, num)
+        except (httpx.HTTPError, requests.RequestException) as e:
+            return self._error_result(e, query, http=True)
+        except Exception as e:
+            return self._error_result(e, query, http=False)
+
+        data = self._basic_data(vat_full, cc, basic)
+
+        args = self._approx_args(query, data, cc, num)
+        if args:
+            try:
+                self._merge_approx(data, await self._acall_approx(client, *args))
+            except Exception as e:
+                get_logger().debug("VIES approx error: %s", e)
 
-        return {"status": status, "data": data, "source": self.SOURCE, "note": note}
\ No newline at end of file
+        return self._result(data)
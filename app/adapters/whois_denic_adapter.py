@@ -2,35 +2,84 @@
 # Mock: проверка домена.
 
 from .base import CheckResult
+from datetime import timedelta
+from dateutil import parser as dtparser
 from flask import current_app
-from ..utils.http import requests_session_with_retries
+from ..utils.http import get_session
 from ..utils.logging import get_logger
 
 
 class WhoisDenicAdapter:
     SOURCE = "whois"
+    REFRESH_INTERVAL = 7 * 86400
 
-    def fetch(self, query: dict) -> CheckResult:
+    @staticmethod
+    def _domain(query: dict) -> str:
+        return (query.get("website") or "").replace("https://", "").replace("http://", "").strip("/")
+
+    def fingerprint(self, query: dict) -> str:
+        return self._domain(query)
+
+    @staticmethod
+    def expires_at(data: dict):
+        """Domain expiration date from the RDAP events (naive UTC), or None."""
+        for ev in ((data.get("rdap") or {}).get("events") or []):
+            if ev.get("eventAction") == "expiration" and ev.get("eventDate"):
+                exp = dtparser.isoparse(ev["eventDate"])
+                return exp.replace(tzinfo=None) - (exp.utcoffset() or timedelta(0))
+        return None
+
+    def next_check(self, data: dict, checked_at):
+        # Біля дати закінчення домен перевіряємо щодня (продовжено / звільнено / перехоплено)
+        expires = self.expires_at(data)
+        if expires is None:
+            return None
+        window = expires - timedelta(days=int(current_app.config.get("WHOIS_EXPIRY_RECHECK_DAYS", 30)))
+        return window if window > checked_at else checked_at + timedelta(days=1)
+
+    def _precheck(self, query: dict):
+        """Return (early_result, domain)."""
         if not (current_app and current_app.config.get('WHOIS_ENABLED')):
-            return {"status": "error", "data": {}, "source": self.SOURCE, "note": "WHOIS adapter not enabled or not configured"}
+            return {"status": "error", "data": {}, "source": self.SOURCE, "note": "WHOIS adapter not enabled or not configured"}, None
 
-        domain = (query.get("website") or "").replace("https://", "").replace("http://", "").strip("/")
+        domain = self._domain(query)
         if not domain:
-            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "domain not provided"}
+            return {"status": "unknown", "data": {}, "source": self.SOURCE, "note": "domain not provided"}, None
+        return None, domain
+
+    def _result(self, domain: str, status_code: int, payload) -> CheckResult:
+        if status_code != 200:
+            return {"status": "warning", "data": {"http_status": status_code}, "source": self.SOURCE, "note": "RDAP lookup failed"}
+        data = {
+            'domain': domain,
+            'rdap': payload
+        }
+        return {"status": "ok", "data": data, "source": self.SOURCE, "note": "RDAP WHOIS success"}
+
+    def _error(self, domain: str, e: Exception) -> CheckResult:
+        get_logger().exception('WHOIS RDAP error for %s', domain)
+        return {"status": "error", "data": {"error": str(e)}, "source": self.SOURCE, "note": "WHOIS RDAP error"}
+
+    def fetch(self, query: dict) -> CheckResult:
+        early, domain = self._precheck(query)
+        if early:
+            return early
 
-        logger = get_logger()
         try:
-            s = requests_session_with_retries()
             url = f'https://rdap.org/domain/{domain}'
+            s = get_session(url)
             resp = s.get(url, timeout=current_app.config.get('EXTERNAL_REQUEST_TIMEOUT', 30))
-            if resp.status_code != 200:
-                return {"status": "warning", "data": {"http_status": resp.status_code}, "source": self.SOURCE, "note": "RDAP lookup failed"}
-            payload = resp.json()
-            data = {
-                'domain': domain,
-                'rdap': payload
-            }
-            return {"status": "ok", "data": data, "source": self.SOURCE, "note": "RDAP WHOIS success"}
+            return self._result(domain, resp.status_code, resp.json() if resp.status_code == 200 else None)
+        except Exception as e:
+            return self._error(domain, e)
+
+    async def afetch(self, query: dict, client) -> CheckResult:
+        early, domain = self._precheck(query)
+        if early:
+            return early
+
+        try:
+            resp = await client.get(f'https://rdap.org/domain/{domain}')
+            return self._result(domain, resp.status_code, resp.json() if resp.status_code == 200 else None)
         except Exception as e:
-            logger.exception('WHOIS RDAP error for %s', domain)
-            return {"status": "error", "data": {"error": str(e)}, "source": self.SOURCE, "note": "WHOIS RDAP error"}
\ No newline at end of file
+            return self._error(domain, e)
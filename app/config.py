@@ -21,6 +21,8 @@ class Config:
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
     CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+    # Через скільки секунд знову пробувати Redis після невдалого ping (до того — локальний fallback)
+    REDIS_RETRY_INTERVAL = int(os.getenv("REDIS_RETRY_INTERVAL", "30"))
 
     # Developer convenience: run celery tasks eagerly (synchronously) when True
     CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "True") in ("True", "true", "1")
@@ -51,15 +53,124 @@ class Config:
     SANCTIONS_EU_CSV_URL = os.getenv("SANCTIONS_EU_CSV_URL", "")
     SANCTIONS_OFAC_CSV_URL = os.getenv("SANCTIONS_OFAC_CSV_URL", "")
     SANCTIONS_UK_CSV_URL = os.getenv("SANCTIONS_UK_CSV_URL", "")
+    # Оновлення списків (services/sanctions_lists.py): TTL файлу, таймаут завантаження,
+    # повна перевірка компаній, що збіглися з новими записами списку
+    SANCTIONS_EU_CACHE_TTL = int(os.getenv("SANCTIONS_EU_CACHE_TTL", str(24 * 3600)))
+    SANCTIONS_OFAC_CACHE_TTL = int(os.getenv("SANCTIONS_OFAC_CACHE_TTL", str(24 * 3600)))
+    SANCTIONS_UK_CACHE_TTL = int(os.getenv("SANCTIONS_UK_CACHE_TTL", str(24 * 3600)))
+    SANCTIONS_DOWNLOAD_TIMEOUT = int(os.getenv("SANCTIONS_DOWNLOAD_TIMEOUT", "60"))
+    SANCTIONS_RESCREEN_RECHECK = os.getenv("SANCTIONS_RESCREEN_RECHECK", "True") in ("True", "true", "1")
+    # Як часто beat запускає refresh_sanctions_task (сек), TTL локу і мін. частка рядків
+    # нового файлу відносно поточного (захист від обрізаних/битих завантажень)
+    SANCTIONS_REFRESH_INTERVAL = int(os.getenv("SANCTIONS_REFRESH_INTERVAL", "3600"))
+    SANCTIONS_REFRESH_LOCK_TTL = int(os.getenv("SANCTIONS_REFRESH_LOCK_TTL", "1800"))
+    SANCTIONS_MIN_ROW_RATIO = float(os.getenv("SANCTIONS_MIN_ROW_RATIO", "0.5"))
+    # Скільки рядків CSV парсити за раз при побудові індексу (пікова пам'ять refresh)
+    SANCTIONS_PARSE_CHUNK_ROWS = int(os.getenv("SANCTIONS_PARSE_CHUNK_ROWS", "50000"))
+    # Максимум імен в одному запиті POST /api/sanctions/screen
+    SANCTIONS_SCREEN_MAX_NAMES = int(os.getenv("SANCTIONS_SCREEN_MAX_NAMES", "10000"))
+    # Blocking (trigram-індекс) перед fuzzy-скорингом; guard — score, від якого результат точний
+    # (фактично min(guard, пороги адаптера), тож вердикти не змінюються)
+    SANCTIONS_BLOCKING_ENABLED = os.getenv("SANCTIONS_BLOCKING_ENABLED", "True") in ("True", "true", "1")
+    SANCTIONS_BLOCKING_RECALL_GUARD = int(os.getenv("SANCTIONS_BLOCKING_RECALL_GUARD", "100"))
 
     # Requester defaults for VIES checkVatApprox
     REQUESTER_COUNTRY_CODE = os.getenv("REQUESTER_COUNTRY_CODE", "")
     REQUESTER_VAT_NUMBER = os.getenv("REQUESTER_VAT_NUMBER", "")
 
+    # Кеш відповідей VIES (спільний кеш адаптерів, CACHE_BACKEND): TTL (сек) для valid / invalid / тимчасових помилок
+    VIES_CACHE_ENABLED = os.getenv("VIES_CACHE_ENABLED", "True") in ("True", "true", "1")
+    VIES_CACHE_TTL_VALID = int(os.getenv("VIES_CACHE_TTL_VALID", "86400"))
+    VIES_CACHE_TTL_INVALID = int(os.getenv("VIES_CACHE_TTL_INVALID", "21600"))
+    VIES_CACHE_TTL_ERROR = int(os.getenv("VIES_CACHE_TTL_ERROR", "60"))
+    # Ліміт запитів до VIES на державу-члена (token bucket у Redis, спільний для воркерів)
+    VIES_RATE_PER_COUNTRY = float(os.getenv("VIES_RATE_PER_COUNTRY", "2"))
+    VIES_RATE_BURST = int(os.getenv("VIES_RATE_BURST", "4"))
+    VIES_RATE_MAX_WAIT = float(os.getenv("VIES_RATE_MAX_WAIT", "30"))
+    # Повтори на MS_MAX_CONCURRENT_REQ / GLOBAL_MAX_CONCURRENT_REQ (експоненційна пауза, сек)
+    VIES_BUSY_RETRIES = int(os.getenv("VIES_BUSY_RETRIES", "2"))
+    VIES_BUSY_BACKOFF = float(os.getenv("VIES_BUSY_BACKOFF", "1"))
+
+    # Паралельний запуск адаптерів у _run_checks
+    CHECKS_PARALLEL = os.getenv("CHECKS_PARALLEL", "True") in ("True", "true", "1")
+    CHECKS_MAX_WORKERS = int(os.getenv("CHECKS_MAX_WORKERS", "8"))
+    # Async-оркестратор (workers/async_runner.py): скільки компаній перевіряти одночасно
+    CHECKS_ASYNC_CONCURRENCY = int(os.getenv("CHECKS_ASYNC_CONCURRENCY", "200"))
+    HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", "100"))
+    # POST /api/companies/bulk_lookup: розмір батчу
+    BULK_LOOKUP_BATCH_SIZE = int(os.getenv("BULK_LOOKUP_BATCH_SIZE", "100"))
+    # CheckBatchWriter: скільки компаній писати в БД однією транзакцією
+    BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", "500"))
+    # Таймаут одного адаптера (сек) + перевизначення по SOURCE: "whois=20,ssl_labs=40"
+    ADAPTER_TIMEOUT = int(os.getenv("ADAPTER_TIMEOUT", "60"))
+    # Вікно свіжості (сек): результат джерела, молодший за це, перевикористовується при повторному
+    # lookup тієї ж компанії / VAT замість нового запиту; перевизначення по SOURCE: "vies=86400,whois=604800"
+    CHECK_FRESHNESS_MAX_AGE = int(os.getenv("CHECK_FRESHNESS_MAX_AGE", "3600"))
+    CHECK_FRESHNESS_MAX_AGES = {
+        k.strip(): int(v) for k, v in
+        (item.split("=", 1) for item in os.getenv("CHECK_FRESHNESS_MAX_AGES", "").split(",") if "=" in item)
+    }
+    # Щоденний моніторинг: унікальні company_id чанками по MONITORING_CHUNK_SIZE, по
+    # MONITORING_GROUP_SIZE чанків в одному Celery group, старти рівномірно розкладені на SPREAD сек
+    MONITORING_INTERVAL = int(os.getenv("MONITORING_INTERVAL", "86400"))
+    MONITORING_CHUNK_SIZE = int(os.getenv("MONITORING_CHUNK_SIZE", "200"))
+    MONITORING_GROUP_SIZE = int(os.getenv("MONITORING_GROUP_SIZE", "50"))
+    MONITORING_SPREAD_SECONDS = int(os.getenv("MONITORING_SPREAD_SECONDS", "72000"))
+    MONITORING_RUN_GRACE = int(os.getenv("MONITORING_RUN_GRACE", "3600"))
+    # Пошук компаній (/api/companies, /companies): розмір keyset-сторінки за замовчуванням і максимум ?limit
+    COMPANY_SEARCH_PAGE_SIZE = int(os.getenv("COMPANY_SEARCH_PAGE_SIZE", "100"))
+    COMPANY_SEARCH_MAX_PAGE_SIZE = int(os.getenv("COMPANY_SEARCH_MAX_PAGE_SIZE", "500"))
+    COMPANY_EXPORT_CHUNK_SIZE = int(os.getenv("COMPANY_EXPORT_CHUNK_SIZE", "1000"))
+    # Історія перевірок/подій на деталях компанії (?limit, ?cursor)
+    COMPANY_CHECKS_PAGE_SIZE = int(os.getenv("COMPANY_CHECKS_PAGE_SIZE", "20"))
+    COMPANY_CHECKS_MAX_PAGE_SIZE = int(os.getenv("COMPANY_CHECKS_MAX_PAGE_SIZE", "100"))
+    # Моніторинг за змінами (services/change_detection.py): адаптер перезапускається, лише коли
+    # змінився відбиток його входів або минув інтервал (REFRESH_INTERVAL адаптера / override тут)
+    MONITORING_CHANGE_DRIVEN = os.getenv("MONITORING_CHANGE_DRIVEN", "True") in ("True", "true", "1")
+    MONITORING_REFRESH_INTERVAL = int(os.getenv("MONITORING_REFRESH_INTERVAL", "86400"))
+    MONITORING_REFRESH_INTERVALS = {
+        k.strip(): int(v) for k, v in
+        (item.split("=", 1) for item in os.getenv("MONITORING_REFRESH_INTERVALS", "").split(",") if "=" in item)
+    }
+    WHOIS_EXPIRY_RECHECK_DAYS = int(os.getenv("WHOIS_EXPIRY_RECHECK_DAYS", "30"))
+    # Circuit breaker по джерелу (utils/circuit_breaker.py): відкривається, коли частка помилок
+    # серед останніх CIRCUIT_WINDOW викликів >= CIRCUIT_ERROR_RATE; через CIRCUIT_COOLDOWN сек — пробний виклик.
+    # Таймаут адаптера скорочується до FACTOR × p{PERCENTILE} латентності успішних викликів (не менше MIN)
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "True") in ("True", "true", "1")
+    CIRCUIT_BREAKER_SOURCES = tuple(s.strip() for s in os.getenv("CIRCUIT_BREAKER_SOURCES", "vies,whois,ssl_labs,opencorporates").split(",") if s.strip())
+    CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+    CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+    CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+    CIRCUIT_COOLDOWN = int(os.getenv("CIRCUIT_COOLDOWN", "60"))
+    CIRCUIT_TIMEOUT_FACTOR = float(os.getenv("CIRCUIT_TIMEOUT_FACTOR", "3"))
+    CIRCUIT_TIMEOUT_MIN = float(os.getenv("CIRCUIT_TIMEOUT_MIN", "2"))
+    CIRCUIT_TIMEOUT_PERCENTILE = int(os.getenv("CIRCUIT_TIMEOUT_PERCENTILE", "95"))
+    ADAPTER_TIMEOUTS = {
+        k.strip(): float(v) for k, v in
+        (item.split("=", 1) for item in os.getenv("ADAPTER_TIMEOUTS", "").split(",") if "=" in item)
+    }
+
     # HTTP / retries
     EXTERNAL_REQUEST_TIMEOUT = int(os.getenv("EXTERNAL_REQUEST_TIMEOUT", "30"))
     EXTERNAL_REQUEST_RETRIES = int(os.getenv("EXTERNAL_REQUEST_RETRIES", "2"))
+    # Спільні сесії requests (utils/http.get_session): по пулу на хост, keep-alive між перевірками
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+    HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "False") in ("True", "true", "1")
+    HTTP_KEEPALIVE = os.getenv("HTTP_KEEPALIVE", "True") in ("True", "true", "1")
+    HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "1"))
     CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(__file__), "data"))
+    # Спільний кеш відповідей адаптерів (utils/cache.source_cache): LRU у пам'яті + memory/redis/sqlite;
+    # SQLite-файл за замовчуванням — CACHE_DIR/cache.sqlite3, не більше CACHE_MAX_ENTRIES на джерело.
+    # TTL по джерелу: "opencorporates=86400"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")
+    CACHE_MEMORY_MAXSIZE = int(os.getenv("CACHE_MEMORY_MAXSIZE", "10000"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+    CACHE_TTLS = {
+        k.strip(): int(v) for k, v in
+        (item.split("=", 1) for item in os.getenv("CACHE_TTLS", "").split(",") if "=" in item)
+    }
     # Optional proxy settings (can be set via environment variables HTTP_PROXY/HTTPS_PROXY)
     HTTP_PROXY = os.getenv('HTTP_PROXY', '')
     HTTPS_PROXY = os.getenv('HTTPS_PROXY', '')
\ No newline at end of file
@@ -14,11 +14,20 @@ def make_celery(app):
     celery = Celery(app.import_name,
                     broker=app.config["CELERY_BROKER_URL"],
                     backend=app.config["CELERY_RESULT_BACKEND"])
-    # Respect eager mode (run tasks synchronously) for dev/testing
-    conf = {k: v for k, v in app.config.items() if isinstance(k, str)}
+    # Respect eager mode (run tasks synchronously) for dev/testing.
+    # Broker/backend вже передані в конструктор (нові ключі) — старі CELERY_* не дублюємо,
+    # інакше Celery відмовляється читати конфіг ("Cannot mix new and old setting keys").
+    conf = {k: v for k, v in app.config.items()
+            if isinstance(k, str) and k not in ("CELERY_BROKER_URL", "CELERY_RESULT_BACKEND")}
     celery.conf.update(conf)
     if app.config.get("CELERY_TASK_ALWAYS_EAGER"):
         celery.conf.task_always_eager = True
+    # Redis-брокер повторно доставляє непідтверджені задачі через visibility_timeout (типово 3600с);
+    # чанки моніторингу чекають свого ETA до MONITORING_SPREAD_SECONDS — таймаут має бути довшим
+    spread = int(app.config.get("MONITORING_SPREAD_SECONDS", 0)) + int(app.config.get("MONITORING_RUN_GRACE", 0))
+    options = dict(celery.conf.broker_transport_options or {})
+    options["visibility_timeout"] = max(int(options.get("visibility_timeout", 3600)), spread + 3600)
+    celery.conf.broker_transport_options = options
     TaskBase = celery.Task
 
     class ContextTask(TaskBase):
@@ -36,6 +36,11 @@ class Company(db.Model):
     owners = db.relationship("CompanyOwner", backref="company", cascade="all, delete-orphan")
     checks = db.relationship("Check", backref="company", cascade="all, delete-orphan")
     events = db.relationship("CheckEvent", backref="company", cascade="all, delete-orphan")
+    latest_check = db.relationship("CompanyLatestCheck", uselist=False, cascade="all, delete-orphan")
+
+    # Keyset-пагінація пошуку (services/company_search.py); триграмні GIN-індекси Postgres
+    # і FTS5-таблиця SQLite — лише в міграції c4e8a1f6d9b3
+    __table_args__ = (db.Index("ix_companies_created_at_id", "created_at", "id"),)
 
 class CompanyOwner(db.Model):
     __tablename__ = "company_owners"
@@ -53,7 +58,7 @@ class Check(db.Model):
     status = db.Column(db.String, index=True)      # ok/warning/critical/unknown/error
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    results = db.relationship("CheckResult", backref="check", cascade="all, delete-orphan")
+    results = db.relationship("CheckResult", backref="check", cascade="all, delete-orphan", order_by="CheckResult.id")
 
 class CheckResult(db.Model):
     __tablename__ = "check_results"
@@ -62,8 +67,23 @@ class CheckResult(db.Model):
     adapter_name = db.Column(db.String, index=True)
     status = db.Column(db.String, index=True)
     details = db.Column(db.JSON)
+    # коли джерело реально опитувалось (для повторно використаного результату — час оригіналу)
+    checked_at = db.Column(db.DateTime)
+    # відбиток входів адаптера (запит + версія джерела), див. services/change_detection.py
+    fingerprint = db.Column(db.String)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class CompanyLatestCheck(db.Model):
+    # Денормалізований стан компанії за останнім Check: один рядок на компанію для списків,
+    # фільтрів і експорту. Оновлюється в тій самій транзакції, що й apply_results / CheckBatchWriter.
+    __tablename__ = "company_latest_check"
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), primary_key=True)
+    check_id = db.Column(db.Integer)                 # без FK: рядок живе, доки живе компанія
+    status = db.Column(db.String, index=True)        # найгірший статус останньої перевірки
+    confidence_score = db.Column(db.Integer)
+    adapter_statuses = db.Column(db.JSON)            # {source: status}
+    checked_at = db.Column(db.DateTime, index=True)
+
 class CheckEvent(db.Model):
     __tablename__ = "check_events"
     id = db.Column(db.Integer, primary_key=True)
@@ -75,8 +95,33 @@ class CheckEvent(db.Model):
 class MonitoringSubscription(db.Model):
     __tablename__ = "monitoring_subscriptions"
     id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"))
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), index=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     notify_by = db.Column(db.String)               # email/telegram/signal/json
     enabled = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class MonitoringRun(db.Model):
+    __tablename__ = "monitoring_runs"
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String, index=True, default="running")  # running/dispatched/done
+    total_companies = db.Column(db.Integer, default=0)
+    chunks = db.Column(db.Integer, default=0)
+    dispatched = db.Column(db.Integer, default=0)  # компаній поставлено в чергу
+    completed = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    spread_seconds = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+class MonitoringChunk(db.Model):
+    # Один рядок на чанк запуску: повторна доставка задачі (ETA у Redis-брокері) не
+    # перевіряє компанії вдруге і не додає лічильники run'у ще раз
+    __tablename__ = "monitoring_chunks"
+    __table_args__ = (db.UniqueConstraint("run_id", "seq", name="uq_monitoring_chunks_run_seq"),)
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("monitoring_runs.id"), index=True, nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    companies = db.Column(db.Integer, default=0)
+    status = db.Column(db.String, default="pending")  # pending/running/done
+    finished_at = db.Column(db.DateTime)
@@ -1,11 +1,18 @@
 # app/routes/api.py
 # REST API для пошуку/перевірок/історії
 
-from flask import Blueprint, request, jsonify, current_app
+import csv
+import io
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from ..extensions import db
-from ..models import Company, Check, CheckEvent
+from ..models import Company, MonitoringRun
 from ..services.normalizer import normalize_company_query
+from ..adapters.registry import FOLLOWUP_SOURCES
+from ..services import bulk_lookup, company_search, latest_check
+from ..services import company_detail as company_detail_service
 from ..workers.tasks import _run_checks
+from ..workers.async_runner import run_checks_batch
 from datetime import datetime
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
@@ -30,7 +37,16 @@ def companies_lookup():
         "vat_number":  current_app.config.get("REQUESTER_VAT_NUMBER", ""),
     }
 
-    company = Company(vat_number=vat, name=name, country=country, address=address, website=website)
+    # Та сама компанія за VAT — перевикористовуємо рядок (і свіжі результати перевірок)
+    vat = bulk_lookup.normalize_vat(vat)
+    company = Company.query.filter_by(vat_number=vat).order_by(Company.id).first() if vat else None
+    if company is None:
+        company = Company(vat_number=vat, name=name, country=country, address=address, website=website)
+    else:
+        # Надіслані поля — актуальні дані: перевірка йде саме по них (порожні не затирають відомі)
+        for field, value in (("name", name), ("country", country), ("address", address), ("website", website)):
+            if value:
+                setattr(company, field, value)
     db.session.add(company); db.session.commit()
 
     _run_checks(company.id, requester=requester)
@@ -39,15 +55,92 @@ def companies_lookup():
 
     return jsonify({"company_id": company.id, "status": "completed"})
 
+@api_bp.post("/companies/bulk_lookup")
+def companies_bulk_lookup():
+    """
+    Масовий lookup: CSV (колонка vat_number і/або name) або NDJSON — файлом у полі
+    "file" або сирим тілом запиту. Відповідь — NDJSON, по рядку на кожен вхідний рядок,
+    у міру завершення батчів. ?mode=async лише ставить перевірки в чергу Celery.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, fmt = upload.stream, bulk_lookup.detect_format(upload.mimetype, upload.filename)
+    else:
+        stream, fmt = request.stream, bulk_lookup.detect_format(request.content_type)
+    mode = request.args.get("mode", "sync")
+    batch_size = request.args.get("batch_size", type=int) or current_app.config.get("BULK_LOOKUP_BATCH_SIZE", 100)
+    requester = {
+        "country_code": current_app.config.get("REQUESTER_COUNTRY_CODE", ""),
+        "vat_number":  current_app.config.get("REQUESTER_VAT_NUMBER", ""),
+    }
+
+    def generate():
+        for batch in bulk_lookup.batched(bulk_lookup.iter_rows(stream, fmt), batch_size):
+            items = bulk_lookup.resolve_batch(batch)
+            ids = list(dict.fromkeys(i["company"].id for i in items if "company" in i))
+            if mode == "async":
+                if ids:
+                    current_app.celery_app.tasks["run_batch_check_task"].delay(ids, requester)
+                summaries = {cid: {"status": "queued"} for cid in ids}
+            else:
+                summaries = {s["company_id"]: s for s in run_checks_batch(ids, requester)} if ids else {}
+            for item in items:
+                if "error" in item:
+                    line = {"line": item["line"], "error": item["error"]}
+                else:
+                    c = item["company"]
+                    summary = summaries.get(c.id, {})
+                    line = {
+                        "line": item["line"],
+                        "vat_number": c.vat_number,
+                        "name": c.name,
+                        "company_id": c.id,
+                        "created": item["created"],
+                        "status": summary.get("status"),
+                        "confidence_score": summary.get("confidence_score"),
+                    }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            # батч оброблено — звільняємо identity map сесії, щоб пам'ять не росла
+            db.session.expunge_all()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@api_bp.post("/sanctions/screen")
+def sanctions_screen_names():
+    """
+    Пакетний санкційний скринінг без створення компаній: {"names": [...], "sources": [...]}.
+    Елемент names — рядок (ім'я або VAT) чи об'єкт {"name", "vat_number"}.
+    Для кожного імені: status, best (найкращий кандидат і score по кожному списку) і matches (збіги від порогу).
+    """
+    payload = request.get_json(force=True, silent=True) or {}
+    names = payload.get("names")
+    if not isinstance(names, list) or not names:
+        return jsonify({"error": "names must be a non-empty list"}), 400
+    limit = int(current_app.config.get("SANCTIONS_SCREEN_MAX_NAMES", 10000))
+    if len(names) > limit:
+        return jsonify({"error": f"too many names (max {limit})"}), 413
+    sources = payload.get("sources")
+    if sources is not None and not isinstance(sources, list):
+        return jsonify({"error": "sources must be a list"}), 400
+    # Імпорт тут: pandas/rapidfuzz вантажаться лише процесом, який справді скринить
+    from ..services import sanctions_screen
+    return jsonify(sanctions_screen.screen(names, sources))
+
 @api_bp.get("/companies")
 def companies_list():
-    q = request.args.get("q", "")
-    query = Company.query
-    if q:
-        like = f"%{q}%"
-        query = query.filter((Company.name.ilike(like)) | (Company.vat_number.ilike(like)))
-    items = query.order_by(Company.created_at.desc()).limit(100).all()
-    return jsonify([
+    # Keyset-сторінки: наступна — ?cursor=<X-Next-Cursor попередньої відповіді>.
+    # Фільтри за останньою перевіркою: ?status=critical, ?adapter_status=sanctions_eu:critical (можна кілька)
+    try:
+        items, next_cursor = company_search.search_companies(
+            request.args.get("q", ""),
+            limit=company_search.page_size(request.args.get("limit")),
+            cursor=request.args.get("cursor") or None,
+            status=request.args.get("status") or None,
+            adapter_statuses=latest_check.parse_adapter_filters(request.args.getlist("adapter_status")),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = jsonify([
         {
             "id": c.id,
             "name": c.name,
@@ -55,14 +148,69 @@ def companies_list():
             "country": c.country,
             "status": c.current_status,
             "confidence_score": c.confidence_score,
-            "last_checked": c.last_checked.isoformat() if c.last_checked else None
+            "last_checked": c.last_checked.isoformat() if c.last_checked else None,
+            "adapters": (c.latest_check.adapter_statuses if c.latest_check else None) or {},
         } for c in items
     ])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+@api_bp.get("/companies/export")
+def companies_export():
+    """
+    Поточний стан усіх компаній (по рядку на компанію з company_latest_check):
+    ?format=ndjson (за замовчуванням) або csv, ті самі фільтри status/adapter_status, що й у списку.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        filters = latest_check.parse_adapter_filters(request.args.getlist("adapter_status"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = latest_check.iter_export(request.args.get("status") or None, filters,
+                                    int(current_app.config.get("COMPANY_EXPORT_CHUNK_SIZE", 1000)))
+
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    def generate_csv():
+        # колонка на кожне джерело, у порядку результатів перевірки
+        sources = ("vies",) + FOLLOWUP_SOURCES
+        header = ["id", "name", "vat_number", "country", "status", "confidence_score", "checked_at", *sources]
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+
+        def line(values):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerow(values)
+            return buf.getvalue()
+
+        yield line(header)
+        for row in rows:
+            adapters = row.pop("adapters")
+            yield line([*row.values(), *(adapters.get(s, "") for s in sources)])
+
+    if fmt == "csv":
+        return Response(stream_with_context(generate_csv()), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=companies.csv"})
+    return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
 
 @api_bp.get("/companies/<int:company_id>")
 def company_detail(company_id: int):
-    c = Company.query.get_or_404(company_id)
-    checks = Check.query.filter_by(company_id=company_id).order_by(Check.created_at.desc()).all()
+    # 3 запити на будь-яку історію: компанія, сторінка перевірок, їхні результати (selectin)
+    c = company_detail_service.load_company(company_id)
+    if c is None:
+        return jsonify({"error": "not found"}), 404
+    try:
+        checks, next_cursor = company_detail_service.check_page(
+            company_id, company_search.page_size(request.args.get("limit"), "COMPANY_CHECKS", 20, 100),
+            request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({
         "id": c.id,
         "name": c.name,
@@ -73,30 +221,38 @@ def company_detail(company_id: int):
         "status": c.current_status,
         "confidence_score": c.confidence_score,
         "last_checked": c.last_checked.isoformat() if c.last_checked else None,
-        "checks": [
-            {
-                "id": chk.id,
-                "type": chk.check_type,
-                "status": chk.status,
-                "created_at": chk.created_at.isoformat(),
-                "result": chk.result
-            } for chk in checks
-        ]
+        "checks": [company_detail_service.check_payload(chk) for chk in checks],
+        "next_cursor": next_cursor,
     })
 
 @api_bp.get("/companies/<int:company_id>/history")
 def company_history(company_id: int):
-    events = CheckEvent.query.filter_by(company_id=company_id).order_by(CheckEvent.created_at.desc()).all()
-    return jsonify([
+    try:
+        events, next_cursor = company_detail_service.event_page(
+            company_id, company_search.page_size(request.args.get("limit"), "COMPANY_CHECKS", 20, 100),
+            request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = jsonify([
         {
             "event_type": e.event_type,
             "payload": e.payload,
             "created_at": e.created_at.isoformat()
         } for e in events
     ])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
 
 @api_bp.post("/companies/<int:company_id>/manual_check")
 def manual_check(company_id: int):
     c = Company.query.get_or_404(company_id)
     _run_checks(c.id)
-    return jsonify({"company_id": c.id, "status": "queued"})
\ No newline at end of file
+    return jsonify({"company_id": c.id, "status": "queued"})
+
+@api_bp.get("/monitoring/runs")
+def monitoring_runs():
+    # Прогрес останніх запусків щоденного моніторингу
+    from ..services.scheduler import run_progress
+    runs = MonitoringRun.query.order_by(MonitoringRun.id.desc()).limit(20).all()
+    return jsonify([run_progress(r) for r in runs])
@@ -1,9 +1,11 @@
 # app/routes/web.py
 # Простий UI на Jinja2: форма пошуку, список, деталі
 
-from flask import Blueprint, render_template, request, redirect, url_for, current_app
-from ..models import Company, Check, CheckResult
+from flask import Blueprint, abort, render_template, request, redirect, url_for, current_app
+from ..models import Company
 from ..extensions import db
+from ..services import company_search
+from ..services import company_detail as company_detail_service
 from ..services.normalizer import normalize_company_query
 from ..workers.tasks import _run_checks, run_full_check_task
 
@@ -79,15 +81,18 @@ def web_lookup():
 @web_bp.get("/companies")
 def companies_page():
     q = request.args.get("q", "")
-    query = Company.query
-    if q:
-        like = f"%{q}%"
-        query = query.filter((Company.name.ilike(like)) | (Company.vat_number.ilike(like)))
-    items = query.order_by(Company.created_at.desc()).limit(100).all()
-    return render_template("companies.html", companies=items, q=q)
+    try:
+        items, next_cursor = company_search.search_companies(q, cursor=request.args.get("cursor") or None)
+    except ValueError:
+        # зіпсований cursor у посиланні — просто перша сторінка
+        items, next_cursor = company_search.search_companies(q)
+    return render_template("companies.html", companies=items, q=q, next_cursor=next_cursor)
 
 @web_bp.get("/companies/<int:company_id>")
 def company_detail(company_id: int):
-    c = Company.query.get_or_404(company_id)
-    check = Check.query.filter_by(company_id=company_id).order_by(Check.created_at.desc()).first()
+    c = company_detail_service.load_company(company_id)
+    if c is None:
+        abort(404)
+    # останній Check разом з результатами (selectin) — шаблон не догружає їх по одному
+    check = company_detail_service.latest_check(company_id)
     return render_template("company_detail.html", company=c, check=check)
\ No newline at end of file
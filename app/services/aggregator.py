@@ -4,10 +4,36 @@
 from datetime import datetime
 from ..extensions import db
 from ..models import Company, Check, CheckResult, CheckEvent
+from .latest_check import latest_row, upsert_latest
 
 SEVERITY_SCORE = {"ok": 0, "warning": 10, "unknown": 5, "critical": 100}
 
 
+def result_adapter_name(res: dict) -> str:
+    return res.get("source") or res.get("adapter") or "unknown"
+
+
+def adapter_statuses(results: list[dict]) -> dict[str, str]:
+    return {result_adapter_name(r): r.get("status", "unknown") for r in results}
+
+
+def summarize_results(results: list[dict]) -> tuple[str, int]:
+    """Return (worst status, confidence score) for one run of adapter results."""
+    total = 0
+    worst = "ok"
+    for res in results:
+        # Compute aggregate severity
+        sev = res.get("status", "unknown")
+        total += SEVERITY_SCORE.get(sev, 5)
+        if sev == "critical":
+            worst = "critical"
+        elif sev == "warning" and worst != "critical":
+            worst = "warning"
+        elif sev == "unknown" and worst == "ok":
+            worst = "unknown"
+    return worst, max(0, 100 - min(total, 100))
+
+
 def apply_results(company: Company, results: list[dict]) -> None:
     """Create a single Check row and attach per-adapter CheckResult rows.
 
@@ -15,35 +41,21 @@ def apply_results(company: Company, results: list[dict]) -> None:
     with adapter-level details. Older code attempted to set fields that don't
     exist on Check; this implementation matches the current models.
     """
-    total = 0
-    worst = "ok"
-
     # Summary Check for this run
     chk = Check(company_id=company.id, status="unknown")
     db.session.add(chk)
 
+    now = datetime.utcnow()
     for res in results:
-        adapter_name = res.get("source") or res.get("adapter") or "unknown"
-        status = res.get("status", "unknown")
-        details = res.get("data")
-
-        cr = CheckResult(check=chk, adapter_name=adapter_name, status=status, details=details)
+        cr = CheckResult(check=chk, adapter_name=result_adapter_name(res), status=res.get("status", "unknown"), details=res.get("data"),
+                         checked_at=res.get("checked_at") or now, fingerprint=res.get("fingerprint"))
         db.session.add(cr)
 
-        # Compute aggregate severity
-        sev = status
-        total += SEVERITY_SCORE.get(sev, 5)
-        if sev == "critical":
-            worst = "critical"
-        elif sev == "warning" and worst != "critical":
-            worst = "warning"
-        elif sev == "unknown" and worst == "ok":
-            worst = "unknown"
-
+    worst, score = summarize_results(results)
     previous_status = company.current_status or "unknown"
-    company.confidence_score = max(0, 100 - min(total, 100))
+    company.confidence_score = score
     company.current_status = worst
-    company.last_checked = datetime.utcnow()
+    company.last_checked = now
 
     if previous_status != company.current_status:
         ev = CheckEvent(
@@ -53,4 +65,7 @@ def apply_results(company: Company, results: list[dict]) -> None:
         )
         db.session.add(ev)
 
+    # Підсумок для списків — у тій самій транзакції (flush дає chk.id)
+    db.session.flush()
+    upsert_latest([latest_row(company.id, chk.id, adapter_statuses(results), worst, score, now)])
     db.session.commit()
\ No newline at end of file
@@ -0,0 +1,105 @@
+# app/services/bulk_lookup.py
+# Масовий lookup: потокове читання CSV/NDJSON, батчі, дедуплікація з існуючими Company
+
+import csv
+import io
+import json
+from itertools import islice
+from ..extensions import db
+from ..models import Company
+
+FIELDS = ("vat_number", "name", "country", "address", "website")
+
+
+def detect_format(content_type: str, filename: str = "") -> str:
+    ct = (content_type or "").lower()
+    fn = (filename or "").lower()
+    if "csv" in ct or fn.endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+def iter_rows(binary_stream, fmt: str):
+    """Yield (line_no, row dict) lazily; malformed lines yield (line_no, {"_error": ...})."""
+    text = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for line_no, row in enumerate(reader, start=2):
+            yield line_no, {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+        return
+    for line_no, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, {"_error": f"invalid JSON: {e}"}
+            continue
+        if not isinstance(row, dict):
+            yield line_no, {"_error": "expected a JSON object"}
+            continue
+        yield line_no, {k: (str(row.get(k) or "")).strip() for k in FIELDS}
+
+
+def batched(iterable, size: int):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def normalize_vat(vat: str) -> str:
+    return (vat or "").replace(" ", "").upper()
+
+
+def resolve_batch(rows: list[tuple[int, dict]]) -> list[dict]:
+    """Map a batch of input rows to Company rows, creating only the missing ones.
+
+    Rows are deduplicated by VAT number (or by name when there is no VAT), both
+    within the batch and against existing companies. Returns one item per input
+    row: {"line", "row", "company", "created"} or {"line", "error"}.
+    """
+    out = []
+    by_vat: dict[str, Company] = {}
+    by_name: dict[str, Company] = {}
+    valid = []
+    for line_no, row in rows:
+        if row.get("_error"):
+            out.append({"line": line_no, "error": row["_error"]})
+        elif not (row.get("vat_number") or row.get("name")):
+            out.append({"line": line_no, "error": "vat_number or name required"})
+        else:
+            row["vat_number"] = normalize_vat(row.get("vat_number"))
+            valid.append((line_no, row))
+
+    vats = {r["vat_number"] for _, r in valid if r["vat_number"]}
+    names = {r["name"] for _, r in valid if not r["vat_number"] and r.get("name")}
+    if vats:
+        for c in Company.query.filter(Company.vat_number.in_(vats)).order_by(Company.id):
+            by_vat.setdefault(c.vat_number, c)
+    if names:
+        for c in Company.query.filter(Company.name.in_(names)).order_by(Company.id):
+            by_name.setdefault(c.name, c)
+
+    for line_no, row in valid:
+        key, index = (row["vat_number"], by_vat) if row["vat_number"] else (row["name"], by_name)
+        company = index.get(key)
+        created = company is None
+        if created:
+            company = Company(
+                vat_number=row["vat_number"] or None,
+                name=row.get("name") or None,
+                country=(row.get("country") or "").upper() or None,
+                address=row.get("address") or None,
+                website=(row.get("website") or "").lower() or None,
+                current_status="unknown",
+                confidence_score=0,
+                raw_source={},
+            )
+            db.session.add(company)
+            index[key] = company
+        out.append({"line": line_no, "row": row, "company": company, "created": created})
+
+    db.session.commit()
+    out.sort(key=lambda item: item["line"])
+    return out
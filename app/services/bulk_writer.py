@@ -0,0 +1,94 @@
+# app/services/bulk_writer.py
+# Пакетний запис результатів перевірок: Check/CheckResult/CheckEvent + оновлення Company
+# для багатьох компаній одним executemany-набором і одним commit на батч.
+
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, update
+from ..extensions import db
+from ..models import Company, Check, CheckResult, CheckEvent
+from .aggregator import adapter_statuses, summarize_results, result_adapter_name
+from .latest_check import latest_row, upsert_latest
+
+
+class CheckBatchWriter:
+    """Collects (company, results) pairs and writes them in one transaction per batch.
+
+    Produces the same rows as calling apply_results() per company: one Check
+    (status "unknown"), a CheckResult per adapter result, a status_changed
+    CheckEvent when the aggregate status changes, and updated Company fields.
+    """
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or int(current_app.config.get("BULK_WRITE_BATCH_SIZE", 500))
+        self.pending: list[tuple[Company, list[dict], str, int]] = []
+        self.status_changes: list[tuple[int, str, str]] = []
+
+    def add(self, company: Company, results: list[dict]) -> tuple[str, int]:
+        """Queue one company's results; returns its new (status, confidence score)."""
+        worst, score = summarize_results(results)
+        self.pending.append((company, results, worst, score))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return worst, score
+
+    def flush(self) -> list[tuple[int, str, str]]:
+        """Write all pending rows; returns (company_id, from, to) for status changes in this batch."""
+        if not self.pending:
+            return []
+        pending, self.pending = self.pending, []
+        now = datetime.utcnow()
+
+        check_rows = [{"company_id": c.id, "status": "unknown", "created_at": now} for c, _, _, _ in pending]
+        check_ids = self._insert_checks(check_rows)
+
+        result_rows = []
+        company_rows = []
+        event_rows = []
+        latest_rows = []
+        changes = []
+        for (company, results, worst, score), check_id in zip(pending, check_ids):
+            for res in results:
+                result_rows.append({
+                    "check_id": check_id,
+                    "adapter_name": result_adapter_name(res),
+                    "status": res.get("status", "unknown"),
+                    "details": res.get("data"),
+                    "checked_at": res.get("checked_at") or now,
+                    "fingerprint": res.get("fingerprint"),
+                    "created_at": now,
+                })
+            company_rows.append({"id": company.id, "current_status": worst, "confidence_score": score, "last_checked": now})
+            latest_rows.append(latest_row(company.id, check_id, adapter_statuses(results), worst, score, now))
+            previous_status = company.current_status or "unknown"
+            if previous_status != worst:
+                event_rows.append({
+                    "company_id": company.id,
+                    "event_type": "status_changed",
+                    "payload": {"from": previous_status, "to": worst},
+                    "created_at": now,
+                })
+                changes.append((company.id, previous_status, worst))
+
+        if result_rows:
+            db.session.execute(insert(CheckResult), result_rows)
+        # ORM bulk UPDATE за первинним ключем — один executemany
+        db.session.execute(update(Company), company_rows)
+        if event_rows:
+            db.session.execute(insert(CheckEvent), event_rows)
+        upsert_latest(latest_rows)
+        db.session.commit()
+
+        self.status_changes.extend(changes)
+        return changes
+
+    def _insert_checks(self, rows: list[dict]) -> list[int]:
+        dialect = db.session.get_bind().dialect
+        if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+            # Postgres / SQLite >= 3.35: один INSERT ... RETURNING id для всього батчу
+            stmt = insert(Check).returning(Check.id, sort_by_parameter_order=True)
+            return list(db.session.scalars(stmt, rows))
+        ids = []
+        for row in rows:
+            ids.append(db.session.execute(insert(Check).values(**row)).inserted_primary_key[0])
+        return ids
@@ -0,0 +1,97 @@
+# app/services/change_detection.py
+# Моніторинг "за змінами": адаптер перезапускається лише коли змінились його входи
+# (відбиток запиту + версія джерела) або минув його природний інтервал оновлення.
+#
+# Адаптер може оголосити:
+#   REFRESH_INTERVAL = <сек>                    — як часто відповідь джерела варто перепитувати;
+#   fingerprint(query) -> str                   — дешевий відбиток входів без зовнішніх запитів
+#                                                 (напр. назва + версія санкційного списку);
+#   next_check(data, checked_at) -> datetime    — раніший термін з самої відповіді
+#                                                 (напр. дата закінчення домену з RDAP).
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from ..extensions import db
+from ..models import Company, Check, CheckResult
+from ..utils.logging import get_logger
+from .freshness import _reusable, reused_result
+
+
+def digest(*parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def query_fingerprint(query: dict) -> str:
+    """Default fingerprint: every query field except the requester."""
+    return digest({k: v for k, v in query.items() if k != "requester"})
+
+
+def fingerprint(adapter, query: dict) -> str | None:
+    try:
+        if hasattr(adapter, "fingerprint"):
+            return adapter.fingerprint(query)
+        return query_fingerprint(query)
+    except Exception as e:
+        # без відбитка результат просто не буде перевикористаний моніторингом
+        get_logger().warning("fingerprint for %s failed: %s", getattr(adapter, "SOURCE", "unknown"), e)
+        return None
+
+
+def refresh_interval(adapter) -> int:
+    """MONITORING_REFRESH_INTERVALS[source], else the adapter's REFRESH_INTERVAL, else MONITORING_REFRESH_INTERVAL."""
+    cfg = current_app.config
+    source = getattr(adapter, "SOURCE", "unknown")
+    overrides = cfg.get("MONITORING_REFRESH_INTERVALS") or {}
+    if source in overrides:
+        return int(overrides[source])
+    return int(getattr(adapter, "REFRESH_INTERVAL", None) or cfg.get("MONITORING_REFRESH_INTERVAL", 86400))
+
+
+def due_at(adapter, data, checked_at: datetime) -> datetime:
+    due = checked_at + timedelta(seconds=refresh_interval(adapter))
+    if hasattr(adapter, "next_check") and isinstance(data, dict):
+        try:
+            sooner = adapter.next_check(data, checked_at)
+        except Exception:
+            sooner = None
+        if sooner is not None:
+            due = min(due, sooner)
+    return due
+
+
+def unchanged_results(company: Company, query: dict, adapters: list) -> dict[str, dict]:
+    """Stored results that still hold: {source: result dict} for sources that need no re-run.
+
+    A source is reused when its latest result for this company is a definite
+    answer (ok/warning/critical), was produced from the same fingerprint as the
+    current query and is not yet due. Everything else is re-run.
+    """
+    by_source = {getattr(a, "SOURCE", "unknown"): a for a in adapters}
+    if not by_source:
+        return {}
+    checked_at = func.coalesce(CheckResult.checked_at, CheckResult.created_at)
+    latest = (db.session.query(CheckResult.adapter_name, func.max(CheckResult.id).label("id"))
+              .join(Check, Check.id == CheckResult.check_id)
+              .filter(Check.company_id == company.id, CheckResult.adapter_name.in_(list(by_source)))
+              .group_by(CheckResult.adapter_name)
+              .subquery())
+    rows = (db.session.query(CheckResult.adapter_name, CheckResult.status, CheckResult.details,
+                             checked_at, CheckResult.fingerprint)
+            .join(latest, latest.c.id == CheckResult.id)
+            .all())
+
+    now = datetime.utcnow()
+    out: dict[str, dict] = {}
+    for source, status, details, checked, stored in rows:
+        adapter = by_source[source]
+        if stored is None or not _reusable(status, details):
+            continue
+        if stored != fingerprint(adapter, query) or now >= due_at(adapter, details, checked):
+            continue
+        out[source] = reused_result(source, status, details, checked, stored,
+                                    f"unchanged since {checked.isoformat(timespec='seconds')}")
+    return out
@@ -0,0 +1,84 @@
+# app/services/company_detail.py
+# Дані для сторінок/ендпойнтів деталей компанії: фіксована кількість SQL-запитів незалежно
+# від кількості перевірок — Company (1) + сторінка Check (1) + їхні CheckResult одним selectin (1).
+
+from sqlalchemy.orm import load_only, selectinload
+from ..extensions import db
+from ..models import Company, Check, CheckResult, CheckEvent
+
+COMPANY_COLUMNS = (
+    Company.id, Company.name, Company.vat_number, Company.country, Company.address, Company.website,
+    Company.requester_name, Company.requester_email, Company.requester_org,
+    Company.current_status, Company.confidence_score, Company.last_checked,
+)
+RESULT_COLUMNS = (CheckResult.adapter_name, CheckResult.status, CheckResult.details, CheckResult.checked_at)
+
+
+def load_company(company_id: int) -> Company | None:
+    return (db.session.query(Company).options(load_only(*COMPANY_COLUMNS))
+            .filter(Company.id == company_id).one_or_none())
+
+
+def _checks_query(company_id: int):
+    return (db.session.query(Check)
+            .options(load_only(Check.id, Check.status, Check.created_at),
+                     selectinload(Check.results).load_only(*RESULT_COLUMNS))
+            .filter(Check.company_id == company_id)
+            .order_by(Check.id.desc()))
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    """History cursors are the last seen id; raises ValueError for anything else."""
+    if not cursor:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError("invalid cursor")
+
+
+def _id_page(query, id_column, limit: int, cursor: str = None) -> tuple[list, str | None]:
+    # Keyset по id (новіші мають більший id): сторінка — рядки з id < курсора
+    before = decode_cursor(cursor)
+    if before is not None:
+        query = query.filter(id_column < before)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, str(rows[-1].id)
+
+
+def check_page(company_id: int, limit: int, cursor: str = None) -> tuple[list[Check], str | None]:
+    """Newest checks first, results eagerly loaded; returns (checks, next_cursor or None)."""
+    return _id_page(_checks_query(company_id), Check.id, limit, cursor)
+
+
+def latest_check(company_id: int) -> Check | None:
+    return _checks_query(company_id).first()
+
+
+def event_page(company_id: int, limit: int, cursor: str = None) -> tuple[list[CheckEvent], str | None]:
+    query = (db.session.query(CheckEvent)
+             .options(load_only(CheckEvent.id, CheckEvent.event_type, CheckEvent.payload, CheckEvent.created_at))
+             .filter(CheckEvent.company_id == company_id)
+             .order_by(CheckEvent.id.desc()))
+    return _id_page(query, CheckEvent.id, limit, cursor)
+
+
+def result_payload(r: CheckResult) -> dict:
+    return {
+        "adapter": r.adapter_name,
+        "status": r.status,
+        "details": r.details,
+        "checked_at": r.checked_at.isoformat() if r.checked_at else None,
+    }
+
+
+def check_payload(chk: Check) -> dict:
+    return {
+        "id": chk.id,
+        "status": chk.status,
+        "created_at": chk.created_at.isoformat() if chk.created_at else None,
+        "results": [result_payload(r) for r in chk.results],
+    }
@@ -0,0 +1,154 @@
+# app/services/company_search.py
+# Пошук компаній для /api/companies і /companies: keyset-пагінація по (created_at, id),
+# префіксний пошук за VAT, підрядок у name/vat_number через індекси:
+#  - Postgres: ILIKE '%q%' по pg_trgm GIN-індексах (міграція c4e8a1f6d9b3);
+#  - SQLite (dev): FTS5-таблиця companies_fts з tokenize='trigram' (міграція або db.create_all(), див. нижче);
+#  - інакше — звичайний ILIKE (повний перегляд, як раніше).
+
+import base64
+import re
+import weakref
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, event, or_, select, text, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import contains_eager
+from ..extensions import db
+from ..models import Company
+from ..utils.logging import get_logger
+from . import latest_check
+
+# Країна (2 літери) + хоча б одна цифра: "DE81", "ATU1234" — префіксний шлях по індексу vat_number
+VAT_PREFIX_RE = re.compile(r"^[A-Z]{2}[0-9A-Z+*]*[0-9][0-9A-Z+*]*$")
+# Триграмні індекси (pg_trgm, FTS5 trigram) не допомагають коротшим запитам
+MIN_TRIGRAM_LEN = 3
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5("
+    "name, vat_number, content='companies', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN "
+    "INSERT INTO companies_fts(rowid, name, vat_number) VALUES (new.id, new.name, new.vat_number); END",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN "
+    "INSERT INTO companies_fts(companies_fts, rowid, name, vat_number) VALUES ('delete', old.id, old.name, old.vat_number); END",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE OF name, vat_number ON companies BEGIN "
+    "INSERT INTO companies_fts(companies_fts, rowid, name, vat_number) VALUES ('delete', old.id, old.name, old.vat_number); "
+    "INSERT INTO companies_fts(rowid, name, vat_number) VALUES (new.id, new.name, new.vat_number); END",
+    "INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')",
+)
+
+# engine -> чи є companies_fts (перевіряється один раз на engine)
+_FTS_AVAILABLE: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def encode_cursor(created_at: datetime, company_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{company_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, company_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(company_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _create_sqlite_fts(conn) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    for stmt in SQLITE_FTS_DDL:
+        conn.execute(text(stmt))
+    _FTS_AVAILABLE[conn.engine] = True
+    return True
+
+
+def ensure_sqlite_fts() -> bool:
+    """Create (or rebuild) companies_fts on a SQLite database; returns False on other dialects.
+
+    Alembic does the same in migration c4e8a1f6d9b3, db.create_all() via the
+    after_create hook below; this is for databases made before either.
+    """
+    with db.engine.begin() as conn:
+        return _create_sqlite_fts(conn)
+
+
+@event.listens_for(Company.__table__, "after_create")
+def _fts_after_create(target, conn, **kw):
+    # db.create_all() (тести, dev-скрипти) створює companies на SQLite — одразу з FTS-індексом
+    try:
+        _create_sqlite_fts(conn)
+    except OperationalError as e:
+        # SQLite без FTS5: пошук лишається на ILIKE
+        get_logger().warning("SQLite FTS5 unavailable, company search uses LIKE: %s", e)
+
+
+def sqlite_fts_available() -> bool:
+    engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    if engine not in _FTS_AVAILABLE:
+        with engine.connect() as conn:
+            _FTS_AVAILABLE[engine] = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies_fts'")).first() is not None
+    return _FTS_AVAILABLE[engine]
+
+
+def _text_filter(q: str):
+    vat = q.replace(" ", "").upper()
+    if VAT_PREFIX_RE.match(vat):
+        # Діапазон [vat, vat+1) іде по B-tree ix_companies_vat_number на будь-якій БД
+        # (SQLite LIKE регістронезалежний і індекс не бере); LIKE — точна умова префікса
+        upper = vat[:-1] + chr(ord(vat[-1]) + 1)
+        return and_(Company.vat_number >= vat, Company.vat_number < upper,
+                    Company.vat_number.like(_escape_like(vat) + "%", escape="\\"))
+    if len(q) >= MIN_TRIGRAM_LEN and sqlite_fts_available():
+        phrase = '"' + q.replace('"', '""') + '"'
+        return Company.id.in_(select(text("rowid")).select_from(text("companies_fts"))
+                              .where(text("companies_fts MATCH :phrase").bindparams(phrase=phrase)))
+    like = f"%{_escape_like(q)}%"
+    return or_(Company.name.ilike(like, escape="\\"), Company.vat_number.ilike(like, escape="\\"))
+
+
+def page_size(requested, prefix: str = "COMPANY_SEARCH", default: int = 100, maximum: int = 500) -> int:
+    """?limit clamped to [1, {prefix}_MAX_PAGE_SIZE]; empty / invalid -> {prefix}_PAGE_SIZE."""
+    cfg = current_app.config
+    fallback = int(cfg.get(f"{prefix}_PAGE_SIZE", default))
+    try:
+        size = int(requested) if requested not in (None, "") else fallback
+    except (TypeError, ValueError):
+        size = fallback
+    return max(1, min(size, int(cfg.get(f"{prefix}_MAX_PAGE_SIZE", maximum))))
+
+
+def search_companies(q: str = "", limit: int = None, cursor: str = None, status: str = None,
+                     adapter_statuses: list[tuple[str, str]] = ()) -> tuple[list[Company], str | None]:
+    """One page of companies, newest first; returns (items, next_cursor or None).
+
+    The page after `cursor` continues strictly below its (created_at, id), so
+    results stay stable while new companies are added and the cost of a page
+    does not depend on how deep it is. Each company comes with its
+    company_latest_check row (same query); status / adapter_statuses filter on it.
+    """
+    limit = limit or page_size(None)
+    query = (Company.query
+             .outerjoin(Company.latest_check)
+             .options(contains_eager(Company.latest_check)))
+    query = latest_check.apply_filters(query, status, adapter_statuses)
+    q = (q or "").strip()
+    if q:
+        query = query.filter(_text_filter(q))
+    if cursor:
+        created_at, company_id = decode_cursor(cursor)
+        # Row-value порівняння: і Postgres, і SQLite ведуть його по ix_companies_created_at_id
+        query = query.filter(tuple_(Company.created_at, Company.id) < tuple_(created_at, company_id))
+    items = query.order_by(Company.created_at.desc(), Company.id.desc()).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1].created_at, items[-1].id)
@@ -0,0 +1,86 @@
+# app/services/freshness.py
+# Вікно свіжості результатів: якщо джерело для цієї компанії (або цього VAT) недавно перевірялось
+# з тими самими входами (відбиток запиту), повторний lookup бере останній CheckResult
+# замість нового зовнішнього запиту.
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from ..extensions import db
+from ..models import Company, Check, CheckResult
+
+# unknown/error — відмова джерела, пропуск через брак даних або вимкнений адаптер: не відповідь
+REUSABLE_STATUSES = ("ok", "warning", "critical")
+
+
+def max_age(source: str) -> int:
+    """Seconds a result of source stays fresh (CHECK_FRESHNESS_MAX_AGES[source] or the default); 0 = never reuse."""
+    cfg = current_app.config
+    ages = cfg.get("CHECK_FRESHNESS_MAX_AGES") or {}
+    if source in ages:
+        return int(ages[source])
+    return int(cfg.get("CHECK_FRESHNESS_MAX_AGE", 0))
+
+
+def _reusable(status: str, details) -> bool:
+    if status not in REUSABLE_STATUSES:
+        return False
+    return not (isinstance(details, dict) and "error" in details)
+
+
+def fresh_results(company: Company, fingerprints: dict[str, str | None]) -> dict[str, dict]:
+    """Latest still-fresh result per source for this company or any company with the same VAT.
+
+    fingerprints maps each source to the fingerprint of the current query
+    (change_detection.fingerprint); a stored result is only a candidate when it
+    was produced from the same fingerprint, so a verdict for another name or
+    domain is never reused. Returns {source: result dict in adapter format}.
+    Only definite answers (ok/warning/critical) are reused; if the latest
+    matching result of a source is unknown or an error, that source is queried again.
+    """
+    ages = {s: max_age(s) for s, fp in fingerprints.items() if fp is not None}
+    ages = {s: a for s, a in ages.items() if a > 0}
+    if not ages:
+        return {}
+    now = datetime.utcnow()
+    oldest = now - timedelta(seconds=max(ages.values()))
+
+    owner = Check.company_id == company.id
+    vat = (company.vat_number or "").replace(" ", "").upper()
+    if vat:
+        same_vat = db.session.query(Company.id).filter(Company.vat_number == vat)
+        owner = owner | Check.company_id.in_(same_vat)
+    # Вік рахується від реального опитування джерела: повторне використання його не "омолоджує"
+    checked_at = func.coalesce(CheckResult.checked_at, CheckResult.created_at)
+    rows = (db.session.query(CheckResult.adapter_name, CheckResult.status, CheckResult.details,
+                             checked_at, CheckResult.fingerprint)
+            .join(Check, Check.id == CheckResult.check_id)
+            .filter(owner, CheckResult.adapter_name.in_(list(ages)), checked_at >= oldest,
+                    CheckResult.fingerprint.in_({fingerprints[s] for s in ages}))
+            .order_by(CheckResult.created_at.desc(), CheckResult.id.desc())
+            .all())
+
+    out: dict[str, dict] = {}
+    seen = set()
+    for source, status, details, checked, fingerprint in rows:
+        if source in seen or fingerprint != fingerprints[source]:
+            continue
+        # Вирішує лише найсвіжіший результат з тим самим відбитком: якщо він провальний — джерело треба опитати
+        seen.add(source)
+        age = (now - checked).total_seconds()
+        if age > ages[source] or not _reusable(status, details):
+            continue
+        out[source] = reused_result(source, status, details, checked, fingerprint, f"reused result from {int(age)}s ago")
+    return out
+
+
+def reused_result(source: str, status: str, details, checked_at: datetime, fingerprint: str | None, note: str) -> dict:
+    """Adapter-format dict for a stored result; keeps checked_at/fingerprint of the original query."""
+    return {
+        "status": status,
+        "data": details if details is not None else {},
+        "source": source,
+        "note": note,
+        "checked_at": checked_at,
+        "fingerprint": fingerprint,
+    }
@@ -0,0 +1,104 @@
+# app/services/latest_check.py
+# company_latest_check: один рядок на компанію зі станом за останнім Check (загальний статус,
+# score, статус кожного адаптера). Пишеться разом з Check у apply_results / CheckBatchWriter,
+# читається списком, фільтрами та експортом без сортування checks/check_results.
+
+from datetime import datetime
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..extensions import db
+from ..models import Company, CompanyLatestCheck
+
+UPDATED_COLUMNS = ("check_id", "status", "confidence_score", "adapter_statuses", "checked_at")
+
+
+def latest_row(company_id: int, check_id: int, adapter_statuses: dict, status: str, score: int,
+               checked_at: datetime) -> dict:
+    return {
+        "company_id": company_id,
+        "check_id": check_id,
+        "status": status,
+        "confidence_score": score,
+        "adapter_statuses": adapter_statuses,
+        "checked_at": checked_at,
+    }
+
+
+def upsert_latest(rows: list[dict]) -> None:
+    """Insert or replace summary rows in the current transaction (no commit).
+
+    A row is only replaced by a newer check (higher check_id), so two checks of
+    the same company finishing out of order keep the newest state.
+    """
+    if not rows:
+        return
+    # Одна компанія двічі в батчі: лишаємо новіший Check (Postgres не оновлює рядок двічі за INSERT)
+    newest = {}
+    for row in rows:
+        if row["company_id"] not in newest or newest[row["company_id"]]["check_id"] < row["check_id"]:
+            newest[row["company_id"]] = row
+    rows = list(newest.values())
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (pg_insert if dialect == "postgresql" else sqlite_insert)(CompanyLatestCheck)
+        stmt = ins.on_conflict_do_update(
+            index_elements=[CompanyLatestCheck.company_id],
+            set_={c: ins.excluded[c] for c in UPDATED_COLUMNS},
+            where=CompanyLatestCheck.check_id < ins.excluded.check_id,
+        )
+        db.session.execute(stmt, rows)
+        return
+    db.session.execute(delete(CompanyLatestCheck).where(CompanyLatestCheck.company_id.in_([r["company_id"] for r in rows])))
+    db.session.execute(insert(CompanyLatestCheck), rows)
+
+
+def parse_adapter_filters(values: list[str]) -> list[tuple[str, str]]:
+    """["sanctions_eu:critical", ...] -> [(source, status)]; ValueError for a malformed item."""
+    out = []
+    for value in values:
+        source, sep, status = value.partition(":")
+        if not (sep and source and status):
+            raise ValueError(f"adapter_status must be <source>:<status>, got {value!r}")
+        out.append((source, status))
+    return out
+
+
+def apply_filters(query, status: str = None, adapter_statuses: list[tuple[str, str]] = ()):
+    """Filter a query that already joins CompanyLatestCheck by latest overall / per-adapter status."""
+    if status:
+        query = query.filter(CompanyLatestCheck.status == status)
+    for source, adapter_status in adapter_statuses:
+        query = query.filter(CompanyLatestCheck.adapter_statuses[source].as_string() == adapter_status)
+    return query
+
+
+EXPORT_COLUMNS = (
+    Company.id, Company.name, Company.vat_number, Company.country,
+    CompanyLatestCheck.status, CompanyLatestCheck.confidence_score,
+    CompanyLatestCheck.adapter_statuses, CompanyLatestCheck.checked_at,
+)
+
+
+def iter_export(status: str = None, adapter_statuses: list[tuple[str, str]] = (), chunk_size: int = 1000):
+    """Yield one dict per company (keyset pages by id, column projection, no ORM objects)."""
+    last = 0
+    while True:
+        query = (db.session.query(*EXPORT_COLUMNS)
+                 .outerjoin(CompanyLatestCheck, CompanyLatestCheck.company_id == Company.id)
+                 .filter(Company.id > last))
+        rows = apply_filters(query, status, adapter_statuses).order_by(Company.id).limit(chunk_size).all()
+        for cid, name, vat, country, st, score, adapters, checked_at in rows:
+            yield {
+                "id": cid,
+                "name": name,
+                "vat_number": vat,
+                "country": country,
+                "status": st,
+                "confidence_score": score,
+                "checked_at": checked_at.isoformat() if checked_at else None,
+                "adapters": adapters or {},
+            }
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
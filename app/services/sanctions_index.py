@@ -0,0 +1,534 @@
+# app/services/sanctions_index.py
+# Спільний in-memory індекс санкційних списків (EU/OFAC/UK).
+# Кожен список парситься один раз на версію файлу (mtime/size), далі всі адаптери
+# процесу звертаються до готової структури замість pd.read_csv + iterrows на кожен запит.
+# Скомпільований індекс зберігається поруч із CSV як колонковий snapshot (.npy + meta.json),
+# який інші процеси відкривають через mmap без повторного парсингу.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+import numpy as np
+from rapidfuzz import fuzz, process
+from ..utils.logging import get_logger
+
+_INDEXES: dict = {}
+_LOCK = threading.Lock()
+
+# Скільки клітинок score-матриці (запити × імена) рахувати за один виклик cdist
+CDIST_MAX_CELLS = 8_000_000
+# Довжина n-грами для blocking-індексу
+Q = 3
+# Якщо після blocking лишається більше цієї частки списку — скануємо весь список
+BLOCKING_MAX_FRACTION = 0.25
+# Ідентифікатори (VAT, реєстраційні номери) — короткі значення з цифрами
+IDENTIFIER_MAX_LEN = 32
+_ID_STRIP = re.compile(r"[\s\-./]")
+# Колонки з ідентифікаторами, які лишаються в payload snapshot'а поряд з іменами
+ID_COLUMN_HINTS = ("id", "ids", "vat", "tax", "no", "number", "passport", "registration", "identifier")
+SNAPSHOT_FORMAT = 2
+
+
+def match_key(value) -> str:
+    """Normalized form used for fuzzy matching.
+
+    token_sort_ratio(a, b) == ratio(sorted_tokens(a), sorted_tokens(b)), so the
+    tokens are lowercased and sorted once at build time instead of per lookup.
+    """
+    return " ".join(sorted(str(value or "").lower().split()))
+
+
+def identifier_key(value) -> str:
+    """Normalized identifier: uppercase without spaces/dashes/dots/slashes, '' if not ID-like."""
+    key = _ID_STRIP.sub("", str(value or "").upper())
+    if not key or len(key) > IDENTIFIER_MAX_LEN or not any(ch.isdigit() for ch in key):
+        return ""
+    return key
+
+
+def identifier_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def is_id_column(column) -> bool:
+    tokens = re.split(r"[^a-z0-9]+", str(column).lower())
+    return any(t in ID_COLUMN_HINTS for t in tokens)
+
+
+def _grams(key: str) -> Counter:
+    # Триграма кодується в int64 (3 code point'и по 21 біту)
+    return Counter((ord(key[i]) << 42) | (ord(key[i + 1]) << 21) | ord(key[i + 2])
+                   for i in range(len(key) - Q + 1))
+
+
+def blocking_guard(config, *thresholds) -> float | None:
+    """Recall guard for adapter lookups, or None when blocking is disabled.
+
+    Blocking never drops a name that scores >= guard, so taking the minimum with
+    the adapter's own thresholds keeps critical/warning verdicts identical to a
+    full scan. A configured guard below the thresholds additionally keeps the
+    reported match_score exact down to that value.
+    """
+    if not config.get("SANCTIONS_BLOCKING_ENABLED", True):
+        return None
+    return min([float(config.get("SANCTIONS_BLOCKING_RECALL_GUARD", 100))] + [float(t) for t in thresholds])
+
+
+def file_version(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class StringColumn:
+    """Read-only sequence of strings stored as one UTF-8 blob + offsets (mmap friendly)."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(values) -> tuple[np.ndarray, np.ndarray]:
+        parts = [str(v).encode("utf-8") for v in values]
+        return StringColumn.join([b"".join(parts)], [np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))])
+
+    @staticmethod
+    def join(blobs: list[bytes], lengths: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """Concatenate per-chunk encoded blobs (see encode) into one blob + offsets."""
+        lengths = np.concatenate(lengths) if lengths else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return np.frombuffer(b"".join(blobs), dtype=np.uint8).copy(), offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+class SanctionsIndex:
+    """Compact columnar view of one sanctions list.
+
+    Everything lives in flat numpy arrays (see compile()), so the same structure is
+    used in memory right after parsing and memory-mapped from a snapshot directory
+    by other processes. Only the name and ID columns are kept as row payload.
+    """
+
+    def __init__(self, source: str, version: tuple, arrays: dict, meta: dict):
+        self.source = source
+        self.version = tuple(version)
+        self.arrays = arrays
+        self.name_cols: list[str] = list(meta["name_cols"])
+        self.columns: list[str] = list(meta["columns"])
+        self.n_rows: int = int(meta["rows"])
+        keys_blob = arrays["keys"].tobytes().decode("utf-8")
+        # rapidfuzz працює зі списком str — це єдина структура, що матеріалізується в процесі
+        self.keys: list[str] = keys_blob.split("\n") if len(arrays["name_rows"]) else []
+        self.names = StringColumn(arrays["names_blob"], arrays["names_off"])  # original cell value
+        self.name_rows = arrays["name_rows"]                                # row offset per name
+        self.payload = {col: StringColumn(arrays[f"c{i}_blob"], arrays[f"c{i}_off"])
+                        for i, col in enumerate(self.columns)}
+        self.lengths = arrays["lengths"]
+        self.len_order = arrays["len_order"]
+        self.sorted_lengths = arrays["sorted_lengths"]
+        self.gram_codes = arrays["gram_codes"]
+        self.gram_ptr = arrays["gram_ptr"]
+        self.post_ids = arrays["post_ids"]
+        self.post_cnt = arrays["post_cnt"]
+        self.id_hashes = arrays["id_hashes"]
+        self.id_ptr = arrays["id_ptr"]
+        self.id_rows = arrays["id_rows"]
+        self.id_keys = StringColumn(arrays["id_keys_blob"], arrays["id_keys_off"])  # ключ кожного запису id_rows
+
+    @staticmethod
+    def compile(chunks, name_cols: list[str]) -> tuple[dict, dict]:
+        """Turn a parsed list into the flat arrays + meta that make up an index.
+
+        chunks is a DataFrame or an iterable of DataFrame chunks with the same
+        columns; each chunk is encoded and dropped before the next one is read.
+        """
+        if hasattr(chunks, "columns"):
+            chunks = [chunks]
+        name_cols = list(name_cols)
+        columns = None
+        names, keys, name_rows = [], [], []
+        seen = set()
+        blobs: dict[str, list[bytes]] = {}
+        lengths: dict[str, list[np.ndarray]] = {}
+        id_hashes, id_rows, id_keys = [], [], []
+        offset = 0
+        for df in chunks:
+            if columns is None:
+                columns = [c for c in df.columns if c in name_cols or is_id_column(c)]
+                blobs = {c: [] for c in columns}
+                lengths = {c: [] for c in columns}
+            # Порядок обходу (рядки, потім колонки) той самий, що й у старому iterrows,
+            # тож при рівних score перемагає той самий запис.
+            name_values = [df[c].tolist() if c in df.columns else [""] * len(df) for c in name_cols]
+            for i, row in enumerate(zip(*name_values), start=offset):
+                for v in row:
+                    raw = str(v)
+                    key = match_key(raw)
+                    if not key or key in seen:
+                        continue
+                    seen.add(key)
+                    names.append(raw)
+                    keys.append(key)
+                    name_rows.append(i)
+            for c in columns:
+                parts = [str(v).encode("utf-8") for v in df[c].tolist()]
+                blobs[c].append(b"".join(parts))
+                lengths[c].append(np.fromiter(map(len, parts), dtype=np.int64, count=len(parts)))
+            hashes, rows, ids = SanctionsIndex._chunk_identifiers(df, offset)
+            id_hashes.append(hashes)
+            id_rows.append(rows)
+            id_keys.extend(ids)
+            offset += len(df)
+
+        columns = columns or []
+        arrays = {
+            "keys": np.frombuffer("\n".join(keys).encode("utf-8"), dtype=np.uint8).copy(),
+            "name_rows": np.asarray(name_rows, dtype=np.int32),
+        }
+        arrays["names_blob"], arrays["names_off"] = StringColumn.encode(names)
+        for i, c in enumerate(columns):
+            arrays[f"c{i}_blob"], arrays[f"c{i}_off"] = StringColumn.join(blobs.pop(c), lengths.pop(c))
+        arrays.update(SanctionsIndex._compile_blocking(keys))
+        arrays.update(SanctionsIndex._compile_identifiers(id_hashes, id_rows, id_keys))
+        meta = {"format": SNAPSHOT_FORMAT, "name_cols": name_cols, "columns": columns, "rows": offset}
+        return arrays, meta
+
+    @staticmethod
+    def _chunk_identifiers(df, offset: int) -> tuple[np.ndarray, np.ndarray, list[str]]:
+        hashes, rows, keys = [], [], []
+        for col in df.columns:
+            for i, v in enumerate(df[col].tolist(), start=offset):
+                key = identifier_key(v)
+                if key:
+                    hashes.append(identifier_hash(key))
+                    rows.append(i)
+                    keys.append(key)
+        return np.asarray(hashes, dtype=np.uint64), np.asarray(rows, dtype=np.int32), keys
+
+    @staticmethod
+    def _compile_identifiers(hashes: list[np.ndarray], rows: list[np.ndarray], keys: list[str]) -> dict:
+        """Exact-match index over every ID-like cell.
+
+        Sorted 64-bit key hashes -> (row, key) entries in CSR form; the key is
+        kept so a lookup can reject rows that only share the hash.
+        """
+        hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+        order = np.lexsort((rows, hashes))
+        hashes, rows, keys = hashes[order], rows[order], [keys[i] for i in order]
+        # Той самий ідентифікатор кілька разів в одному рядку — один запис
+        keep = [i for i in range(len(keys))
+                if not i or (hashes[i], rows[i], keys[i]) != (hashes[i - 1], rows[i - 1], keys[i - 1])]
+        hashes, rows, keys = hashes[keep], rows[keep], [keys[i] for i in keep]
+        id_hashes, starts = np.unique(hashes, return_index=True)
+        arrays = {
+            "id_hashes": id_hashes.astype(np.uint64),
+            "id_ptr": np.append(starts, len(rows)).astype(np.int64),
+            "id_rows": rows.astype(np.int32),
+        }
+        arrays["id_keys_blob"], arrays["id_keys_off"] = StringColumn.encode(keys)
+        return arrays
+
+    @staticmethod
+    def _compile_blocking(keys: list[str], batch: int = 20_000) -> dict:
+        """Trigram inverted index in CSR form: gram code -> (name positions, counts)."""
+        lengths = np.fromiter((len(k) for k in keys), dtype=np.int32, count=len(keys))
+        len_order = np.argsort(lengths, kind="stable").astype(np.int32)
+        # Постинги збираємо пачками у numpy (16 байт на запис замість трьох Python int)
+        parts_codes, parts_ids, parts_cnts = [], [], []
+        for start in range(0, len(keys), batch):
+            codes, ids, cnts = [], [], []
+            for pos, key in enumerate(keys[start:start + batch], start=start):
+                for code, c in _grams(key).items():
+                    codes.append(code)
+                    ids.append(pos)
+                    cnts.append(c)
+            parts_codes.append(np.asarray(codes, dtype=np.int64))
+            parts_ids.append(np.asarray(ids, dtype=np.int32))
+            parts_cnts.append(np.asarray(cnts, dtype=np.int32))
+        codes = np.concatenate(parts_codes) if parts_codes else np.empty(0, dtype=np.int64)
+        del parts_codes
+        # Одне stable-сортування замість np.unique (той робить ще одне argsort і копії)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+        post_ids = np.concatenate(parts_ids)[order] if parts_ids else np.empty(0, dtype=np.int32)
+        post_cnt = np.concatenate(parts_cnts)[order] if parts_cnts else np.empty(0, dtype=np.int32)
+        del order, parts_ids, parts_cnts
+        return {
+            "lengths": lengths,
+            "len_order": len_order,
+            "sorted_lengths": lengths[len_order],
+            "gram_codes": codes[starts],
+            "gram_ptr": np.append(starts, len(codes)).astype(np.int64),
+            "post_ids": post_ids,
+            "post_cnt": post_cnt,
+        }
+
+    def candidates(self, key: str, guard: float) -> np.ndarray | None:
+        """Positions of names that may score >= guard against an already normalized key.
+
+        ratio = 100 * (1 - d / (la + lb)) with d the Indel distance, so a name can
+        reach the guard only if d <= r * (la + lb), r = 1 - guard / 100. That gives
+        a length filter (|la - lb| <= d) and the q-gram lemma: every insert/delete
+        destroys at most Q grams, so both strings share at least
+        max(la, lb) - Q + 1 - Q * d grams. Names for which the bound is <= 0 are
+        always kept, which makes the filter lossless above the guard.
+
+        Returns None when blocking would keep more than BLOCKING_MAX_FRACTION of
+        the list — a full scan is cheaper then.
+        """
+        la = len(key)
+        r = max(0.0, 1.0 - guard / 100.0)
+        if la - Q + 1 - Q * np.floor(2 * r * la + 1e-9) <= 0:
+            # навіть імена тієї ж довжини не відсікаються — blocking нічого не дасть
+            return None
+        # |la - lb| <= r * (la + lb)  =>  la * (1 - r) / (1 + r) <= lb <= la * (1 + r) / (1 - r)
+        lo = np.searchsorted(self.sorted_lengths, int(np.floor(la * (1 - r) / (1 + r))), side="left")
+        hi = len(self.keys) if r >= 1 else np.searchsorted(
+            self.sorted_lengths, int(np.ceil(la * (1 + r) / (1 - r))), side="right")
+        win = self.len_order[lo:hi]
+        lb = self.lengths[win]
+        d_max = np.floor(r * (la + lb) + 1e-9).astype(np.int32)
+        bound = np.maximum(la, lb) - Q + 1 - Q * d_max
+        mask = np.abs(lb - la) <= d_max
+        need = mask & (bound > 0)
+        if need.any():
+            ids, weights = [], []
+            for code, qc in _grams(key).items():
+                j = np.searchsorted(self.gram_codes, code)
+                if j < len(self.gram_codes) and self.gram_codes[j] == code:
+                    a, b = self.gram_ptr[j], self.gram_ptr[j + 1]
+                    ids.append(self.post_ids[a:b])
+                    weights.append(np.minimum(self.post_cnt[a:b], qc))
+            if ids:
+                shared = np.bincount(np.concatenate(ids), weights=np.concatenate(weights),
+                                     minlength=len(self.keys))[win]
+            else:
+                shared = np.zeros(len(win))
+            mask &= (bound <= 0) | (shared >= bound)
+        cand = np.sort(win[mask])
+        if len(cand) > BLOCKING_MAX_FRACTION * len(self.keys):
+            return None
+        return cand
+
+    @classmethod
+    def from_dataframe(cls, source: str, version: tuple, df, name_cols: list[str]) -> "SanctionsIndex":
+        arrays, meta = cls.compile(df, name_cols)
+        return cls(source, version, arrays, meta)
+
+    @classmethod
+    def from_chunks(cls, source: str, version: tuple, chunks, name_cols: list[str]) -> "SanctionsIndex":
+        """Build from an iterator of DataFrame chunks (pd.read_csv(..., chunksize=N))."""
+        arrays, meta = cls.compile(chunks, name_cols)
+        return cls(source, version, arrays, meta)
+
+    def save(self, directory: str) -> None:
+        """Write the snapshot: one .npy per array, meta.json last (its presence marks completeness)."""
+        os.makedirs(directory, exist_ok=True)
+        for name, arr in self.arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(arr))
+        meta = {"format": SNAPSHOT_FORMAT, "source": self.source, "version": list(self.version),
+                "name_cols": self.name_cols, "columns": self.columns, "rows": self.n_rows,
+                "arrays": sorted(self.arrays)}
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> "SanctionsIndex":
+        """Open a snapshot with every array memory-mapped read-only."""
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"unsupported snapshot format {meta.get('format')}")
+        arrays = {}
+        for name in meta["arrays"]:
+            path = os.path.join(directory, f"{name}.npy")
+            try:
+                arrays[name] = np.load(path, mmap_mode="r")
+            except ValueError:
+                # порожній масив не можна mmap'ити
+                arrays[name] = np.load(path)
+        return cls(meta["source"], meta["version"], arrays, meta)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def row(self, i: int) -> dict:
+        return {col: values[i] for col, values in self.payload.items()}
+
+    def best_match(self, name: str, score_cutoff: float = 0, recall_guard: float | None = None) -> tuple[float, int | None]:
+        """Return (best score, name position) for a single query name.
+
+        extractOne keeps the first of equally scored names, like the old row scan.
+        With score_cutoff > 0 names below it are skipped early and (0, None) is
+        returned when nothing reaches it. With recall_guard only blocking
+        candidates are scored: results >= guard are exact, below it the reported
+        best score may be lower than a full scan would give.
+        """
+        q = match_key(name)
+        if not q or not self.keys:
+            return 0, None
+        if recall_guard is None:
+            return self._extract(q, self.keys, None, score_cutoff)
+        cand = self.candidates(q, recall_guard)
+        if cand is None:
+            return self._extract(q, self.keys, None, score_cutoff)
+        return self._extract(q, [self.keys[i] for i in cand], cand, score_cutoff)
+
+    @staticmethod
+    def _extract(q: str, keys: list[str], positions, score_cutoff: float) -> tuple[float, int | None]:
+        if not keys:
+            return 0, None
+        found = process.extractOne(q, keys, scorer=fuzz.ratio, processor=None,
+                                   score_cutoff=score_cutoff or None)
+        if not found or not found[1]:
+            return 0, None
+        pos = found[2] if positions is None else int(positions[found[2]])
+        return found[1], pos
+
+    def best_matches(self, names: list[str], score_cutoff: float = 0, workers: int = -1,
+                     recall_guard: float | None = None) -> list[tuple[float, int | None]]:
+        """Batch variant of best_match: one multi-threaded cdist per chunk of queries.
+
+        With recall_guard every query is narrowed to its blocking candidates instead.
+        """
+        if recall_guard is not None:
+            return [self.best_match(n, score_cutoff, recall_guard) for n in names]
+        queries = [match_key(n) for n in names]
+        out: list[tuple[float, int | None]] = [(0, None)] * len(queries)
+        if not self.keys:
+            return out
+        live = [i for i, q in enumerate(queries) if q]
+        step = max(1, CDIST_MAX_CELLS // len(self.keys))
+        for start in range(0, len(live), step):
+            chunk = live[start:start + step]
+            scores = process.cdist([queries[i] for i in chunk], self.keys, scorer=fuzz.ratio,
+                                   processor=None, score_cutoff=score_cutoff or None, workers=workers)
+            best = scores.argmax(axis=1)
+            for row, i in enumerate(chunk):
+                pos = int(best[row])
+                if not scores[row, pos]:
+                    continue
+                # cdist рахує у float32 — точний score переможця перераховуємо,
+                # щоб порівняння з порогами збігалося з best_match.
+                out[i] = (fuzz.ratio(queries[i], self.keys[pos]), pos)
+        return out
+
+    def find_identifier(self, value: str) -> list[dict]:
+        """Rows where some cell holds the same identifier.
+
+        Binary search (np.searchsorted) over the sorted key hashes, then every
+        candidate's stored key is compared with `key`, so a hash collision never
+        returns an unrelated row.
+        """
+        key = identifier_key(value)
+        if not key or not len(self.id_hashes):
+            return []
+        h = np.uint64(identifier_hash(key))
+        j = int(np.searchsorted(self.id_hashes, h))
+        if j == len(self.id_hashes) or self.id_hashes[j] != h:
+            return []
+        rows = []
+        for p in range(int(self.id_ptr[j]), int(self.id_ptr[j + 1])):
+            i = int(self.id_rows[p])
+            if self.id_keys[p] == key and i not in rows:
+                rows.append(i)
+        return [self.row(i) for i in rows]
+
+
+def snapshot_dir(path: str, source: str, version: tuple) -> str:
+    """Snapshot directory for one version of a list: <dir of CSV>/snapshots/<source>/<mtime>-<size>."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), "snapshots", source, "-".join(map(str, version)))
+
+
+def load_snapshot(directory: str) -> SanctionsIndex | None:
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        return None
+    try:
+        return SanctionsIndex.load(directory)
+    except Exception as e:
+        get_logger().warning("Ignoring broken sanctions snapshot %s: %s", directory, e)
+        return None
+
+
+def write_snapshot(idx: SanctionsIndex, directory: str) -> None:
+    """Best-effort atomic snapshot write (temp dir + rename)."""
+    tmp = f"{directory}.tmp-{os.getpid()}"
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        idx.save(tmp)
+        try:
+            os.rename(tmp, directory)
+        except OSError:
+            # інший процес уже записав цю версію
+            shutil.rmtree(tmp, ignore_errors=True)
+    except OSError as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        get_logger().warning("Could not write sanctions snapshot %s: %s", directory, e)
+
+
+def prune_snapshots(path: str, source: str) -> None:
+    """Remove snapshots of versions other than the file currently at path."""
+    try:
+        keep = snapshot_dir(path, source, file_version(path))
+        parent = os.path.dirname(keep)
+        for name in os.listdir(parent):
+            other = os.path.join(parent, name)
+            if other != keep and ".tmp-" not in name:
+                # відкриті mmap'и старої версії в інших процесах лишаються валідними
+                shutil.rmtree(other, ignore_errors=True)
+    except OSError:
+        pass
+
+
+def get_index(source: str, path: str, load) -> SanctionsIndex | None:
+    """Process-wide index for source, rebuilt only when the file at path changes.
+
+    A compiled snapshot of the current file version is memory-mapped when present;
+    otherwise load() parses the file — a callable returning (DataFrame or iterator
+    of DataFrame chunks, name_cols) or None — and the result is written as a
+    snapshot for the other processes.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    version = file_version(path)
+    idx = _INDEXES.get(source)
+    if idx is not None and idx.version == version:
+        return idx
+    with _LOCK:
+        idx = _INDEXES.get(source)
+        if idx is not None and idx.version == version:
+            return idx
+        directory = snapshot_dir(path, source, version)
+        idx = load_snapshot(directory)
+        if idx is None:
+            loaded = load()
+            if loaded is None:
+                return None
+            chunks, name_cols = loaded
+            idx = SanctionsIndex.from_chunks(source, version, chunks, name_cols)
+            write_snapshot(idx, directory)
+            prune_snapshots(path, source)
+        _INDEXES[source] = idx
+        return idx
+
+
+def set_index(source: str, idx: SanctionsIndex) -> None:
+    """Swap in an already built index (e.g. right after a refresh installed its file)."""
+    with _LOCK:
+        _INDEXES[source] = idx
+
+
+def clear_indexes() -> None:
+    with _LOCK:
+        _INDEXES.clear()
@@ -0,0 +1,438 @@
+# app/services/sanctions_lists.py
+# Санкційні списки (EU/OFAC/UK): завантаження з умовним GET, версії, diff і точковий
+# rescreen компаній під моніторингом, коли у списку з'являються нові записи.
+# Оновлення робить лише фонова задача (Celery beat): файл качається у тимчасовий,
+# перевіряється, індексується і атомарно підміняється; запити до адаптерів мережу не чіпають.
+
+import hashlib
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import insert
+from ..extensions import db
+from ..models import Company, CheckEvent, MonitoringSubscription
+from ..utils.http import requests_session_with_retries
+from ..utils.logging import get_logger
+from ..utils.locks import exclusive
+from .sanctions_index import (SanctionsIndex, file_version, get_index, identifier_hash, identifier_key,
+                              prune_snapshots, set_index, snapshot_dir, write_snapshot)
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+
+@dataclass(frozen=True)
+class ListSpec:
+    source: str
+    label: str
+    filename: str
+    url_key: str
+    ttl_key: str
+    urls: tuple
+    enabled_key: str | None = None
+    seps: tuple = (",",)
+    name_hints: tuple = ("name", "entity")
+    # якщо колонок з іменами не знайдено: "first" — перша колонка, "all" — усі
+    name_fallback: str = "all"
+
+
+LISTS = {
+    "sanctions_eu": ListSpec(
+        source="sanctions_eu", label="EU", filename="sanctions_eu.csv",
+        url_key="SANCTIONS_EU_CSV_URL", ttl_key="SANCTIONS_EU_CACHE_TTL",
+        urls=(
+            "https://www.sanctionsmap.eu/api/v1/sanctions/consolidated/csv",
+            "https://webgate.ec.europa.eu/fsd/fsf/public/files/csvFullSanctionsList_1_1/content?token=dG9rZW4tMjAxNw",
+        ),
+        seps=(",", ";", "\t", "|"),
+        name_hints=("name", "entity", "subject", "designation", "target"),
+        name_fallback="first",
+    ),
+    "sanctions_ofac": ListSpec(
+        source="sanctions_ofac", label="OFAC SDN", filename="ofac_sdn.csv",
+        url_key="SANCTIONS_OFAC_CSV_URL", ttl_key="SANCTIONS_OFAC_CACHE_TTL", enabled_key="SANCTIONS_OFAC_ENABLED",
+        urls=(
+            "https://home.treasury.gov/system/files/126/sdn.csv",
+            "https://www.treasury.gov/ofac/downloads/sdn.csv",
+        ),
+    ),
+    "sanctions_uk": ListSpec(
+        source="sanctions_uk", label="UK", filename="uk_sanctions.csv",
+        url_key="SANCTIONS_UK_CSV_URL", ttl_key="SANCTIONS_UK_CACHE_TTL", enabled_key="SANCTIONS_UK_ENABLED",
+        urls=(
+            "https://ofsistorage.blob.core.windows.net/publishlive/2023format/ConList.csv",
+            "https://www.gov.uk/government/publications/financial-sanctions-consolidated-list-of-targets/consolidated-list-of-targets",
+        ),
+    ),
+}
+
+
+# Завантаження пишеться на диск шматками, парсинг іде чанками по стільки рядків
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+PARSE_CHUNK_ROWS = 50_000
+
+# source -> час останнього запиту на фонове завантаження (щоб не спамити чергу)
+_REFRESH_REQUESTED: dict[str, float] = {}
+REFRESH_REQUEST_INTERVAL = 300
+
+
+def enabled_lists() -> list[str]:
+    # EU-адаптер не має власного прапорця — його список оновлюємо завжди
+    return [s for s, spec in LISTS.items() if not spec.enabled_key or current_app.config.get(spec.enabled_key)]
+
+
+def list_path(source: str) -> str:
+    data_dir = current_app.config.get("CACHE_DIR") or os.path.join(os.path.dirname(__file__), "..", "data")
+    return os.path.join(data_dir, LISTS[source].filename)
+
+
+def _meta_path(path: str) -> str:
+    return path + ".meta.json"
+
+
+def read_meta(path: str) -> dict:
+    try:
+        with open(_meta_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_meta(path: str, meta: dict) -> None:
+    tmp = f"{_meta_path(path)}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, _meta_path(path))
+
+
+def list_version(source: str) -> str | None:
+    """Identity of the installed list file (sha256 from meta, else its mtime); None if missing."""
+    path = list_path(source)
+    if not os.path.exists(path):
+        return None
+    return read_meta(path).get("sha256") or str(int(os.path.getmtime(path)))
+
+
+def is_stale(source: str) -> bool:
+    path = list_path(source)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    ttl = int(current_app.config.get(LISTS[source].ttl_key, 24 * 3600))
+    # 304 Not Modified оновлює лише checked_at у meta, файл (і його mtime) не чіпаємо
+    checked = read_meta(path).get("checked_at") or os.path.getmtime(path)
+    return time.time() - checked >= ttl
+
+
+def _urls(spec: ListSpec) -> list[str]:
+    primary = current_app.config.get(spec.url_key)
+    urls = [primary] if primary else []
+    urls.extend(u for u in spec.urls if u and u not in urls)
+    return urls
+
+
+def validate(source: str, path: str, idx: SanctionsIndex | None, old: SanctionsIndex | None) -> str | None:
+    """Reason to reject a freshly downloaded file, or None when it looks like a real list."""
+    if idx is None or not idx.n_rows:
+        return "no rows parsed"
+    min_ratio = float(current_app.config.get("SANCTIONS_MIN_ROW_RATIO", 0.5))
+    if old is not None and old.n_rows and idx.n_rows < min_ratio * old.n_rows:
+        return f"only {idx.n_rows} rows vs {old.n_rows} in the current list"
+    return None
+
+
+def _looks_like_markup(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(512).lstrip()[:1] == b"<"
+
+
+def _install(source: str, tmp: str, old: SanctionsIndex | None) -> str | None:
+    """Validate tmp, compile its snapshot and atomically move it over the live file.
+
+    The index is built chunk by chunk straight from the file on disk. The snapshot
+    is written for the version tmp will have after os.replace (same inode, so same
+    mtime/size), which lets workers map it as soon as they see the new file.
+    Returns an error string when the download is rejected.
+    """
+    path = list_path(source)
+    if _looks_like_markup(tmp):
+        return "response is HTML/XML, not CSV"
+    parsed = iter_chunks(source, tmp)
+    version = file_version(tmp)
+    idx = SanctionsIndex.from_chunks(source, version, parsed[1], parsed[0]) if parsed else None
+    error = validate(source, tmp, idx, old)
+    if error:
+        return error
+    write_snapshot(idx, snapshot_dir(path, source, version))
+    os.replace(tmp, path)
+    prune_snapshots(path, source)
+    set_index(source, idx)
+    return None
+
+
+def _stream_to_file(r, path: str) -> tuple[str, int]:
+    """Write a streamed response to path; returns (sha256 hex, bytes written)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            if not chunk:
+                continue
+            f.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def download(source: str, force: bool = False, old: SanctionsIndex | None = None) -> dict:
+    """Fetch a list with a conditional GET; returns {"status": updated|not_modified|failed, ...}.
+
+    The body is streamed to a temp file (never held in memory) and checked against
+    Content-Length; a body with the same sha256 as the live file counts as not
+    modified even when the server ignores ETag / If-Modified-Since. The live file
+    is only replaced by a downloaded copy that passed validate().
+    """
+    spec = LISTS[source]
+    path = list_path(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = read_meta(path) if os.path.exists(path) else {}
+    logger = get_logger()
+    timeout = current_app.config.get("SANCTIONS_DOWNLOAD_TIMEOUT", 60)
+    tmp = f"{path}.tmp-{os.getpid()}"
+
+    last_error = None
+    for url in _urls(spec):
+        headers = {}
+        if not force and meta.get("url") == url:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with requests_session_with_retries(url).get(url, timeout=timeout, headers=headers, allow_redirects=True, stream=True) as r:
+                if r.status_code == 304:
+                    meta["checked_at"] = time.time()
+                    write_meta(path, meta)
+                    return {"status": "not_modified", "url": url}
+                r.raise_for_status()
+                logger.info("Downloading %s sanctions CSV to %s", spec.label, path)
+                sha256, size = _stream_to_file(r, tmp)
+                expected = r.headers.get("Content-Length")
+                if expected and not r.headers.get("Content-Encoding") and int(expected) != size:
+                    raise IOError(f"truncated download: {size} of {expected} bytes")
+                new_meta = {
+                    "url": url,
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "sha256": sha256,
+                    "size": size,
+                    "checked_at": time.time(),
+                }
+            if not force and sha256 == meta.get("sha256") and os.path.exists(path):
+                write_meta(path, new_meta)
+                return {"status": "not_modified", "url": url}
+            error = _install(source, tmp, old)
+            if error:
+                # наступний URL може віддати нормальний файл
+                logger.warning("Rejected %s sanctions download from %s: %s", spec.label, url, error)
+                last_error = error
+                continue
+            write_meta(path, new_meta)
+            return {"status": "updated", "url": url, "sha256": sha256}
+        except Exception as e:
+            last_error = e
+            continue
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # Якщо всі джерела впали — існуючий файл лишається як є
+    return {"status": "failed", "error": str(last_error)}
+
+
+def request_refresh(source: str) -> None:
+    """Ask a worker to download a missing list; never blocks the calling request."""
+    now = time.time()
+    if now - _REFRESH_REQUESTED.get(source, 0) < REFRESH_REQUEST_INTERVAL:
+        return
+    _REFRESH_REQUESTED[source] = now
+    celery = getattr(current_app, "celery_app", None)
+    if celery is None or celery.conf.task_always_eager:
+        get_logger().warning("%s sanctions list is not downloaded yet; run python -m scripts.refresh_sanctions",
+                             LISTS[source].label)
+        return
+    get_logger().info("%s sanctions list is not downloaded yet; refresh queued", LISTS[source].label)
+    celery.tasks["refresh_sanctions_task"].delay([source])
+
+
+def iter_chunks(source: str, path: str, chunk_rows: int = None):
+    """(name_cols, iterator of DataFrame chunks) for a list file, or None if it can't be parsed.
+
+    The file is never loaded as one DataFrame: only chunk_rows rows are in memory at a time.
+    """
+    spec = LISTS[source]
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    chunk_rows = chunk_rows or int(current_app.config.get("SANCTIONS_PARSE_CHUNK_ROWS", PARSE_CHUNK_ROWS))
+    if len(spec.seps) == 1:
+        options = [{"encoding": "utf-8"}]
+    else:
+        # Спробуємо різні розділювачі
+        options = [{"sep": sep, "on_bad_lines": "skip"} for sep in spec.seps]
+    for kwargs in options:
+        try:
+            reader = pd.read_csv(path, dtype=str, chunksize=chunk_rows, **kwargs)
+            first = next(reader, None)
+        except Exception:
+            if len(options) == 1:
+                raise
+            continue
+        if first is None or first.shape[1] < 1:
+            continue
+        first = first.fillna("")
+        return name_columns(source, first), itertools.chain([first], (c.fillna("") for c in reader))
+    return None
+
+
+def name_columns(source: str, df) -> list[str]:
+    spec = LISTS[source]
+    cols = [c for c in df.columns if any(k in c.lower() for k in spec.name_hints)]
+    if cols:
+        return cols
+    return [df.columns[0]] if spec.name_fallback == "first" else df.columns.tolist()
+
+
+def list_index(source: str) -> SanctionsIndex | None:
+    """Current index of a downloaded list (memory-mapped snapshot when available).
+
+    None when the list hasn't been downloaded yet — this never touches the network.
+    """
+    path = list_path(source)
+
+    def load():
+        if not pd:
+            raise RuntimeError(f"pandas is required for {LISTS[source].label} sanctions adapter")
+        parsed = iter_chunks(source, path)
+        if parsed is None:
+            return None
+        name_cols, chunks = parsed
+        return chunks, name_cols
+
+    return get_index(source, path, load)
+
+
+def match_threshold(source: str) -> float:
+    """Lowest score at which the adapter for source reports a match."""
+    cfg = current_app.config
+    if source == "sanctions_eu":
+        return float(cfg.get("SANCTIONS_EU_FUZZY_WARN", 80))
+    return float(cfg.get("SANCTIONS_EU_FUZZY_THRESHOLD", 92))
+
+
+def diff_indexes(old: SanctionsIndex | None, new: SanctionsIndex) -> dict:
+    """Names / identifiers present in new but not in old (and names that disappeared)."""
+    old_keys = set(old.keys) if old is not None else set()
+    new_keys = set(new.keys)
+    added = [pos for pos, key in enumerate(new.keys) if key not in old_keys]
+    removed = [key for key in (old.keys if old is not None else []) if key not in new_keys]
+    old_ids = old.id_hashes if old is not None else np.empty(0, dtype=np.uint64)
+    added_ids = np.setdiff1d(np.asarray(new.id_hashes), np.asarray(old_ids), assume_unique=True)
+    return {"added": added, "removed": removed, "added_ids": added_ids}
+
+
+def _monitored_companies(chunk: int = 1000):
+    q = (db.session.query(Company.id, Company.name, Company.vat_number)
+         .join(MonitoringSubscription, MonitoringSubscription.company_id == Company.id)
+         .filter(MonitoringSubscription.enabled.is_(True))
+         .distinct()
+         .order_by(Company.id))
+    batch = []
+    for row in q.yield_per(chunk):
+        batch.append(row)
+        if len(batch) >= chunk:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rescreen_companies(source: str, index: SanctionsIndex, diff: dict) -> list[int]:
+    """Screen monitored companies against only the newly added entries.
+
+    Adds a CheckEvent(event_type="new_sanction") per hit and returns the company ids.
+    """
+    added = diff["added"]
+    added_ids = set(int(h) for h in diff["added_ids"])
+    if not added and not added_ids:
+        return []
+    threshold = match_threshold(source)
+    delta = None
+    if added:
+        names = [index.names[p] for p in added]
+        delta = SanctionsIndex.from_dataframe(source, index.version, pd.DataFrame({"name": names}), ["name"])
+
+    now = datetime.utcnow()
+    events, hits = [], []
+    for batch in _monitored_companies():
+        scores = delta.best_matches([c.name or "" for c in batch], score_cutoff=threshold) if delta else []
+        for i, c in enumerate(batch):
+            payload = None
+            vat = identifier_key(c.vat_number)
+            # хеш лише звужує кандидатів; збіг підтверджує збережений ключ (find_identifier)
+            if vat and identifier_hash(vat) in added_ids and index.find_identifier(vat):
+                payload = {"source": source, "match_vat": c.vat_number}
+            elif delta is not None and scores[i][1] is not None:
+                score, pos = scores[i]
+                payload = {"source": source, "match_score": score, "matched_name": delta.names[pos]}
+            if payload is not None:
+                payload["list_version"] = list(index.version)
+                events.append({"company_id": c.id, "event_type": "new_sanction", "payload": payload, "created_at": now})
+                hits.append(c.id)
+    if events:
+        db.session.execute(insert(CheckEvent), events)
+        db.session.commit()
+    return hits
+
+
+def refresh_list(source: str, force: bool = False, rescreen: bool = True) -> dict:
+    """Download a list if it is stale and changed, swap in the new index and rescreen.
+
+    Only one process refreshes a given list at a time; the others return "locked".
+    """
+    summary = {"source": source, "status": "fresh", "added": 0, "removed": 0, "rescreened": []}
+    if not force and not is_stale(source):
+        return summary
+    path = list_path(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_ttl = int(current_app.config.get("SANCTIONS_REFRESH_LOCK_TTL", 1800))
+    with exclusive(f"sanctions_refresh_{source}", lock_ttl, os.path.dirname(path)) as acquired:
+        if not acquired:
+            summary["status"] = "locked"
+            return summary
+        old = list_index(source)
+        result = download(source, force=force, old=old)
+        summary["status"] = result["status"]
+        if result["status"] != "updated":
+            if result.get("error"):
+                summary["error"] = result["error"]
+            return summary
+
+        new = list_index(source)
+        diff = diff_indexes(old, new)
+        summary["added"], summary["removed"] = len(diff["added"]), len(diff["removed"])
+        # Без попередньої версії немає бази для "нових" записів — повний скринінг зробить звичайна перевірка
+        if rescreen and old is not None:
+            summary["rescreened"] = rescreen_companies(source, new, diff)
+    get_logger().info("Sanctions list %s refreshed: +%d/-%d names, %d companies flagged",
+                      source, summary["added"], summary["removed"], len(summary["rescreened"]))
+    return summary
+
+
+def refresh_lists(sources=None, force: bool = False) -> list[dict]:
+    return [refresh_list(s, force=force) for s in (sources or enabled_lists())]
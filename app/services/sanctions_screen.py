@@ -0,0 +1,99 @@
+# app/services/sanctions_screen.py
+# Пакетний санкційний скринінг: N імен/VAT за один виклик проти EU/OFAC/UK індексів
+# без створення Company і без запуску решти адаптерів.
+
+import time
+from flask import current_app
+from . import sanctions_lists
+from .aggregator import summarize_results
+from .sanctions_index import identifier_key, match_key
+
+
+def verdict(source: str, score: float) -> str:
+    """Status the adapter for source would report for a fuzzy score."""
+    cfg = current_app.config
+    if score >= float(cfg.get("SANCTIONS_EU_FUZZY_THRESHOLD", 92)):
+        return "critical"
+    if source == "sanctions_eu" and score >= float(cfg.get("SANCTIONS_EU_FUZZY_WARN", 80)):
+        return "warning"
+    return "ok"
+
+
+def _item(raw) -> dict:
+    if isinstance(raw, dict):
+        return {"name": str(raw.get("name") or "").strip(), "vat_number": str(raw.get("vat_number") or "").strip()}
+    value = str(raw or "").strip()
+    # Рядок, схожий на ідентифікатор (VAT/реєстраційний номер), шукаємо як VAT
+    if identifier_key(value) and not any(ch.isspace() for ch in value):
+        return {"name": "", "vat_number": value}
+    return {"name": value, "vat_number": ""}
+
+
+def screen(items: list, sources: list[str] | None = None) -> dict:
+    """Screen names and/or VATs against the downloaded sanctions lists.
+
+    items are strings (a name, or an identifier-like token treated as VAT) or
+    dicts with "name" / "vat_number". Every list gets one batched cdist pass over
+    the distinct normalized names plus a hash lookup per VAT. Each result has
+    "best": one entry per list with its status and the best candidate with its
+    score, also below the match threshold, and "matches": the entries at or above
+    it. Lists that are not downloaded yet are reported in "unavailable" and a
+    background refresh is requested; names then get "unknown" instead of "ok".
+    """
+    started = time.perf_counter()
+    queries = [_item(raw) for raw in items]
+    sources = [s for s in (sources or sanctions_lists.enabled_lists()) if s in sanctions_lists.LISTS]
+
+    # Дублікати (після нормалізації) скоримо один раз
+    distinct = list(dict.fromkeys(k for k in (match_key(q["name"]) for q in queries) if k))
+    slot = {k: i for i, k in enumerate(distinct)}
+
+    # Найкращий кандидат кожного списку для кожного запиту — і нижче порогу збігу
+    per_source: list[list[dict]] = [[] for _ in queries]
+    unavailable = []
+    for source in sources:
+        index = sanctions_lists.list_index(source)
+        if index is None:
+            sanctions_lists.request_refresh(source)
+            unavailable.append(source)
+            for entries in per_source:
+                entries.append({"source": source, "status": "unknown"})
+            continue
+        best = index.best_matches(distinct) if distinct else []
+        for i, q in enumerate(queries):
+            if q["vat_number"] and index.find_identifier(q["vat_number"]):
+                per_source[i].append({"source": source, "status": "critical", "match_vat": q["vat_number"]})
+                continue
+            entry = {"source": source, "status": "ok"}
+            key = match_key(q["name"])
+            if key:
+                score, pos = best[slot[key]]
+                entry.update(status=verdict(source, score), match_score=score,
+                             matched_name=index.names[pos] if pos is not None else None)
+            per_source[i].append(entry)
+
+    results = []
+    for q, entries in zip(queries, per_source):
+        status, _ = summarize_results(entries)
+        found = [e for e in entries if e["status"] in ("critical", "warning")]
+        results.append({
+            "name": q["name"],
+            "vat_number": q["vat_number"],
+            "status": status,
+            "sources": [m["source"] for m in found],
+            "matches": found,
+            "best": entries,
+        })
+
+    elapsed = time.perf_counter() - started
+    return {
+        "results": results,
+        "sources": [s for s in sources if s not in unavailable],
+        "unavailable": unavailable,
+        "stats": {
+            "names": len(queries),
+            "distinct_names": len(distinct),
+            "seconds": round(elapsed, 4),
+            "names_per_sec": round(len(queries) / elapsed, 1) if elapsed > 0 else None,
+        },
+    }
@@ -1,6 +1,173 @@
 # app/services/scheduler.py
-# Хуки для періодичних тасків (викликаються Celery beat)
+# Хуки для періодичних тасків (викликаються Celery beat): щоденний моніторинг
+# розсилається чанками унікальних company_id, рівномірно розподіленими по добі.
+
+from datetime import datetime, timedelta
+from celery import group
+from flask import current_app
+from sqlalchemy import insert, update
+from ..extensions import db
+from ..models import MonitoringChunk, MonitoringRun, MonitoringSubscription
+from ..utils.logging import get_logger
+
 
 def cron_tick():
     # Викликається із Celery beat, щоб ініціювати daily checks
-    return "tick"
\ No newline at end of file
+    return "tick"
+
+
+def _enabled_subscriptions():
+    return db.session.query(MonitoringSubscription.company_id).filter(
+        MonitoringSubscription.enabled.is_(True), MonitoringSubscription.company_id.isnot(None))
+
+
+def count_monitored_companies() -> int:
+    return _enabled_subscriptions().distinct().count()
+
+
+def monitored_company_ids(chunk_size: int):
+    """Yield distinct monitored company ids in keyset pages (company_id > last), ascending.
+
+    Memory stays O(chunk_size) regardless of the number of subscriptions; a
+    company with several subscribers appears once.
+    """
+    last = 0
+    while True:
+        ids = [cid for (cid,) in _enabled_subscriptions()
+               .filter(MonitoringSubscription.company_id > last)
+               .distinct()
+               .order_by(MonitoringSubscription.company_id)
+               .limit(chunk_size)]
+        if not ids:
+            return
+        yield ids
+        if len(ids) < chunk_size:
+            return
+        last = ids[-1]
+
+
+def active_run() -> MonitoringRun | None:
+    """Unfinished run that started recently enough to still be working through its spread."""
+    cfg = current_app.config
+    horizon = int(cfg.get("MONITORING_SPREAD_SECONDS", 72000)) + int(cfg.get("MONITORING_RUN_GRACE", 3600))
+    return (MonitoringRun.query
+            .filter(MonitoringRun.status.in_(("running", "dispatched")),
+                    MonitoringRun.started_at >= datetime.utcnow() - timedelta(seconds=horizon))
+            .order_by(MonitoringRun.id.desc())
+            .first())
+
+
+def run_daily_monitoring() -> dict:
+    """Create a MonitoringRun and fan its companies out as staggered monitor_chunk_task batches.
+
+    Chunk i starts after spread × (companies before it / total) seconds, so the
+    external calls are spread evenly over MONITORING_SPREAD_SECONDS. Signatures
+    are sent MONITORING_GROUP_SIZE at a time as one Celery group. Each chunk has
+    a MonitoringChunk row, so a redelivered task is run and counted only once
+    (the broker's visibility_timeout is raised above the spread in make_celery).
+    """
+    cfg = current_app.config
+    running = active_run()
+    if running is not None:
+        get_logger().warning("Monitoring run %s still in progress, skipping", running.id)
+        return {"skipped": True, "run_id": running.id}
+
+    chunk_size = int(cfg.get("MONITORING_CHUNK_SIZE", 200))
+    group_size = int(cfg.get("MONITORING_GROUP_SIZE", 50))
+    spread = int(cfg.get("MONITORING_SPREAD_SECONDS", 72000))
+    total = count_monitored_companies()
+    run = MonitoringRun(status="running", total_companies=total, spread_seconds=spread)
+    db.session.add(run)
+    db.session.commit()
+    run_id = run.id
+
+    celery = current_app.celery_app
+    sent = 0
+    batch = []
+
+    def flush():
+        if batch:
+            # рядки чанків — до відправки, щоб задача завжди знайшла свій
+            db.session.execute(insert(MonitoringChunk), [
+                {"run_id": run_id, "seq": s.args[1], "companies": len(s.args[2]), "status": "pending"} for s in batch])
+            db.session.commit()
+            group(batch).apply_async()
+            db.session.execute(update(MonitoringRun).where(MonitoringRun.id == run_id).values(
+                chunks=MonitoringRun.chunks + len(batch),
+                dispatched=MonitoringRun.dispatched + sum(len(s.args[2]) for s in batch)))
+            db.session.commit()
+            batch.clear()
+
+    seq = 0
+    for ids in monitored_company_ids(chunk_size):
+        countdown = spread * sent / total if total else 0
+        batch.append(celery.signature("monitor_chunk_task", args=(run_id, seq, ids), countdown=countdown))
+        seq += 1
+        sent += len(ids)
+        if len(batch) >= group_size:
+            flush()
+    flush()
+
+    # Підписки могли змінитись між COUNT і пагінацією — фіксуємо фактичну кількість
+    db.session.execute(update(MonitoringRun).where(MonitoringRun.id == run_id).values(total_companies=sent))
+    db.session.commit()
+    # Порожній запуск (або eager-режим, де чанки вже виконались) закриваємо одразу
+    _finish_if_complete(run_id)
+    db.session.execute(update(MonitoringRun)
+                       .where(MonitoringRun.id == run_id, MonitoringRun.status == "running")
+                       .values(status="dispatched"))
+    db.session.commit()
+    return {"run_id": run_id, "companies": sent}
+
+
+def claim_chunk(run_id: int, seq: int) -> bool:
+    """pending -> running; False when another delivery of this chunk already took it."""
+    claimed = db.session.execute(update(MonitoringChunk)
+                                 .where(MonitoringChunk.run_id == run_id, MonitoringChunk.seq == seq,
+                                        MonitoringChunk.status == "pending")
+                                 .values(status="running")).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def record_chunk(run_id: int, seq: int, completed: int, failed: int) -> bool:
+    """Add one chunk's outcome to the run's progress, once per chunk; False if it was already recorded."""
+    done = db.session.execute(update(MonitoringChunk)
+                              .where(MonitoringChunk.run_id == run_id, MonitoringChunk.seq == seq,
+                                     MonitoringChunk.status != "done")
+                              .values(status="done", finished_at=datetime.utcnow())).rowcount
+    if done != 1:
+        db.session.rollback()
+        return False
+    # Позначка чанка і лічильники run'у — в одній транзакції
+    db.session.execute(update(MonitoringRun).where(MonitoringRun.id == run_id).values(
+        completed=MonitoringRun.completed + completed, failed=MonitoringRun.failed + failed))
+    db.session.commit()
+    _finish_if_complete(run_id)
+    return True
+
+
+def _finish_if_complete(run_id: int) -> None:
+    db.session.execute(update(MonitoringRun)
+                       .where(MonitoringRun.id == run_id,
+                              MonitoringRun.status.in_(("running", "dispatched")),
+                              MonitoringRun.completed + MonitoringRun.failed >= MonitoringRun.total_companies)
+                       .values(status="done", finished_at=datetime.utcnow()))
+    db.session.commit()
+
+
+def run_progress(run: MonitoringRun) -> dict:
+    done = (run.completed or 0) + (run.failed or 0)
+    return {
+        "id": run.id,
+        "status": run.status,
+        "total_companies": run.total_companies,
+        "chunks": run.chunks,
+        "dispatched": run.dispatched,
+        "completed": run.completed,
+        "failed": run.failed,
+        "progress": round(done / run.total_companies, 4) if run.total_companies else 1.0,
+        "spread_seconds": run.spread_seconds,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
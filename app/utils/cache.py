@@ -0,0 +1,358 @@
+# app/utils/cache.py
+# Кеш результатів зовнішніх джерел: in-process LRU + опційний спільний рівень (Redis або SQLite),
+# з обмеженням розміру, TTL по джерелу, захистом від stampede і лічильниками
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from .logging import get_logger
+from .redis_client import get_redis
+from .singleflight import SingleFlight, AsyncSingleFlight, acquire_lead, release_lead, wait_for, await_for
+
+MISS = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISS
+            value, expires = item
+            if expires < time.time():
+                del self._data[key]
+                return MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, expires: float) -> None:
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisTier:
+    """JSON values in Redis with native expiry; errors degrade to cache misses."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def get(self, key: str):
+        r = get_redis()
+        if r is None:
+            return MISS
+        try:
+            raw = r.get(self.prefix + key)
+        except Exception as e:
+            get_logger().warning("Redis cache get failed: %s", e)
+            return MISS
+        if raw is None:
+            return MISS
+        item = json.loads(raw)
+        return item["v"], item["exp"]
+
+    def set(self, key: str, value, expires: float) -> None:
+        r = get_redis()
+        if r is None:
+            return
+        ttl = max(1, int(expires - time.time()))
+        try:
+            r.set(self.prefix + key, json.dumps({"v": value, "exp": expires}), ex=ttl)
+        except Exception as e:
+            get_logger().warning("Redis cache set failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        r = get_redis()
+        if r is not None:
+            try:
+                r.delete(self.prefix + key)
+            except Exception:
+                pass
+
+    def acquire_lead(self, key: str, ttl: float) -> bool:
+        return acquire_lead(self.prefix + key, ttl)
+
+    def release_lead(self, key: str) -> None:
+        release_lead(self.prefix + key)
+
+
+class SQLiteTier:
+    """JSON values in a local SQLite file shared by the processes of one host.
+
+    Bounded to max_entries per namespace: expired rows go first, then the least
+    recently used. Errors degrade to cache misses.
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 100_000):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._sets = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (ns TEXT, key TEXT, value TEXT, expires REAL, "
+                     "accessed REAL, PRIMARY KEY (ns, key))")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (ns, accessed)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_leases (name TEXT PRIMARY KEY, until REAL)")
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, expires FROM cache WHERE ns = ? AND key = ? AND expires > ?",
+                               (self.namespace, key, now)).fetchone()
+            if row is None:
+                return MISS
+            conn.execute("UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?", (now, self.namespace, key))
+        except sqlite3.Error as e:
+            get_logger().warning("SQLite cache get failed: %s", e)
+            return MISS
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, expires: float) -> None:
+        try:
+            conn = self._conn()
+            conn.execute("INSERT OR REPLACE INTO cache (ns, key, value, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                         (self.namespace, key, json.dumps(value), expires, time.time()))
+            self._sets += 1
+            if self._sets % self.EVICT_EVERY == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            get_logger().warning("SQLite cache set failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error:
+            pass
+
+    def evict(self) -> int:
+        """Drop expired rows, then the least recently used above max_entries; returns rows removed."""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM cache WHERE ns = ? AND expires <= ?", (self.namespace, time.time())).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()[0]
+        if count > self.max_entries:
+            removed += conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN (SELECT key FROM cache WHERE ns = ? ORDER BY accessed LIMIT ?)",
+                (self.namespace, self.namespace, count - self.max_entries)).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        try:
+            return self._conn().execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def acquire_lead(self, key: str, ttl: float) -> bool:
+        # Лідер між процесами хоста: рядок-оренда у тій самій базі
+        name, now = f"{self.namespace}:{key}", time.time()
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM cache_leases WHERE name = ? AND until <= ?", (name, now))
+            return conn.execute("INSERT OR IGNORE INTO cache_leases (name, until) VALUES (?, ?)",
+                                (name, now + ttl)).rowcount == 1
+        except sqlite3.Error:
+            return True
+
+    def release_lead(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM cache_leases WHERE name = ?", (f"{self.namespace}:{key}",))
+        except sqlite3.Error:
+            pass
+
+
+class TieredCache:
+    """Memory LRU in front of an optional shared tier (Redis, or SQLite on one host)."""
+
+    def __init__(self, namespace: str, maxsize: int = 10_000, use_redis: bool = False,
+                 sqlite_path: str | None = None, max_entries: int = 100_000):
+        self.namespace = namespace
+        self.memory = LRUCache(maxsize)
+        self.redis = RedisTier(f"cache:{namespace}:") if use_redis else None
+        self.sqlite = SQLiteTier(sqlite_path, namespace, max_entries) if sqlite_path and not use_redis else None
+        self.shared = self.redis or self.sqlite
+        self._counters = {"hits_memory": 0, "hits_shared": 0, "misses": 0, "sets": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._aflights = AsyncSingleFlight()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _lookup(self, key: str):
+        value = self.memory.get(key)
+        if value is not MISS:
+            return value, "hits_memory"
+        if self.shared is not None:
+            item = self.shared.get(key)
+            if item is not MISS:
+                value, expires = item
+                self.memory.set(key, value, expires)
+                return value, "hits_shared"
+        return MISS, "misses"
+
+    def get(self, key: str):
+        value, counter = self._lookup(key)
+        self._count(counter)
+        return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        expires = time.time() + ttl
+        self.memory.set(key, value, expires)
+        if self.shared is not None:
+            self.shared.set(key, value, expires)
+        self._count("sets")
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    @staticmethod
+    def _ttl(ttl, value) -> float:
+        return float(ttl(value) if callable(ttl) else ttl)
+
+    def get_or_set(self, key: str, fn, ttl, lead_timeout: float = 30):
+        """Cached value for key, computing it with fn() on a miss.
+
+        Stampede protection: concurrent misses in this process share one fn()
+        call, and with a shared tier one process computes while the others wait
+        (up to lead_timeout) for its value. ttl is seconds or a callable of the
+        value (0 = don't store, e.g. for errors). Exceptions from fn() are not cached.
+        """
+        value = self.get(key)
+        if value is not MISS:
+            return value
+        return self._flights.do(key, lambda: self._fill(key, fn, ttl, lead_timeout))
+
+    def _fill(self, key: str, fn, ttl, lead_timeout: float):
+        value, _ = self._lookup(key)  # попередній лідер міг щойно записати
+        if value is not MISS:
+            self._count("coalesced")
+            return value
+        lead = self.shared is not None and self.shared.acquire_lead(key, lead_timeout)
+        if self.shared is not None and not lead:
+            value = wait_for(lambda: self._lookup(key)[0], MISS, lead_timeout)
+            if value is not MISS:
+                self._count("coalesced")
+                return value
+        try:
+            value = fn()
+            self.set(key, value, self._ttl(ttl, value))
+            return value
+        finally:
+            if lead:
+                self.shared.release_lead(key)
+
+    async def aget_or_set(self, key: str, coro_fn, ttl, lead_timeout: float = 30):
+        """Async get_or_set: coro_fn() is awaited once per key across concurrent callers."""
+        value = self.get(key)
+        if value is not MISS:
+            return value
+        return await self._aflights.do(key, lambda: self._afill(key, coro_fn, ttl, lead_timeout))
+
+    async def _afill(self, key: str, coro_fn, ttl, lead_timeout: float):
+        value, _ = self._lookup(key)
+        if value is not MISS:
+            self._count("coalesced")
+            return value
+        lead = self.shared is not None and self.shared.acquire_lead(key, lead_timeout)
+        if self.shared is not None and not lead:
+            value = await await_for(lambda: self._lookup(key)[0], MISS, lead_timeout)
+            if value is not MISS:
+                self._count("coalesced")
+                return value
+        try:
+            value = await coro_fn()
+            self.set(key, value, self._ttl(ttl, value))
+            return value
+        finally:
+            if lead:
+                self.shared.release_lead(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits_memory"] + stats["hits_shared"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits_memory"] + stats["hits_shared"]) / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        if self.sqlite is not None:
+            stats["sqlite_entries"] = len(self.sqlite)
+        return stats
+
+
+_CACHES: dict[str, TieredCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(namespace: str, maxsize: int = 10_000, use_redis: bool = False,
+              sqlite_path: str | None = None, max_entries: int = 100_000) -> TieredCache:
+    """Process-wide cache per namespace (settings of the first call win)."""
+    cache = _CACHES.get(namespace)
+    if cache is None:
+        with _CACHES_LOCK:
+            cache = _CACHES.get(namespace)
+            if cache is None:
+                cache = _CACHES[namespace] = TieredCache(namespace, maxsize, use_redis, sqlite_path, max_entries)
+    return cache
+
+
+def _config(name: str, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+def source_ttl(source: str, default: float) -> float:
+    """TTL for an adapter's cached responses: CACHE_TTLS[source] or the adapter's default."""
+    ttls = _config("CACHE_TTLS", None) or {}
+    return float(ttls.get(source, default))
+
+
+def source_cache(source: str) -> TieredCache:
+    """Adapter response cache configured by CACHE_BACKEND (memory / redis / sqlite)."""
+    backend = str(_config("CACHE_BACKEND", "sqlite")).lower()
+    sqlite_path = None
+    if backend == "sqlite":
+        sqlite_path = _config("CACHE_SQLITE_PATH", "") or os.path.join(
+            _config("CACHE_DIR", "") or os.path.join(os.path.dirname(__file__), "..", "data"), "cache.sqlite3")
+    return get_cache(source, maxsize=int(_config("CACHE_MEMORY_MAXSIZE", 10_000)), use_redis=backend == "redis",
+                     sqlite_path=sqlite_path, max_entries=int(_config("CACHE_MAX_ENTRIES", 100_000)))
+
+
+def clear_caches() -> None:
+    with _CACHES_LOCK:
+        _CACHES.clear()
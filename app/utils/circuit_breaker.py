@@ -0,0 +1,243 @@
+# app/utils/circuit_breaker.py
+# Circuit breaker на джерело (адаптер): частка помилок і латентність за останні виклики,
+# стан спільний між воркерами через Redis, інакше локальний для процесу.
+
+import threading
+import time
+from collections import deque
+from flask import current_app, has_app_context
+from .logging import get_logger
+from .redis_client import get_redis
+
+DEFAULTS = {
+    "CIRCUIT_BREAKER_ENABLED": True,
+    "CIRCUIT_BREAKER_SOURCES": ("vies", "whois", "ssl_labs", "opencorporates"),
+    "CIRCUIT_WINDOW": 20,
+    "CIRCUIT_MIN_CALLS": 5,
+    "CIRCUIT_ERROR_RATE": 0.5,
+    "CIRCUIT_COOLDOWN": 60,
+    "CIRCUIT_TIMEOUT_FACTOR": 3.0,
+    "CIRCUIT_TIMEOUT_MIN": 2.0,
+    "CIRCUIT_TIMEOUT_PERCENTILE": 95,
+}
+
+# allow() для виклику, якому дісталась half-open проба (truthy, як і звичайний дозвіл)
+PROBE = "probe"
+
+
+def _setting(name: str):
+    if has_app_context():
+        return current_app.config.get(name, DEFAULTS[name])
+    return DEFAULTS[name]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class CircuitBreaker:
+    """closed -> open when >= error_rate of the last `window` calls failed.
+
+    While open, allow() rejects calls until `cooldown` seconds have passed; then
+    exactly one caller (across workers) gets a half-open probe. A successful probe
+    closes the circuit and forgets the old samples, a failed one re-opens it.
+    Only the probe's record(..., probe=True) changes the state of an open circuit.
+    """
+
+    def __init__(self, name: str, window: int, min_calls: int, error_rate: float, cooldown: float):
+        self.name = name
+        self.window = max(1, int(window))
+        self.min_calls = max(1, int(min_calls))
+        self.error_rate = float(error_rate)
+        self.cooldown = float(cooldown)
+        self._calls: deque = deque(maxlen=self.window)
+        self._opened_at: float | None = None
+        self._probe_until = 0.0
+        self._lock = threading.Lock()
+
+    # --- сховище: Redis (спільне) або пам'ять процесу ---
+    def _key(self, part: str) -> str:
+        return f"circuit:{self.name}:{part}"
+
+    def _with_redis(self, redis_fn, local_fn):
+        r = get_redis()
+        if r is not None:
+            try:
+                return redis_fn(r)
+            except Exception as e:
+                get_logger().warning("Redis circuit breaker failed, using local state: %s", e)
+        with self._lock:
+            return local_fn()
+
+    def _push(self, ok: bool, latency: float) -> list[tuple[bool, float]]:
+        def redis_fn(r):
+            pipe = r.pipeline()
+            pipe.lpush(self._key("calls"), f"{int(ok)}:{latency:.3f}")
+            pipe.ltrim(self._key("calls"), 0, self.window - 1)
+            pipe.expire(self._key("calls"), 86400)
+            pipe.lrange(self._key("calls"), 0, -1)
+            return [self._decode(item) for item in pipe.execute()[-1]]
+
+        def local_fn():
+            self._calls.appendleft((ok, latency))
+            return list(self._calls)
+
+        return self._with_redis(redis_fn, local_fn)
+
+    def samples(self) -> list[tuple[bool, float]]:
+        return self._with_redis(lambda r: [self._decode(i) for i in r.lrange(self._key("calls"), 0, -1)],
+                                lambda: list(self._calls))
+
+    @staticmethod
+    def _decode(item) -> tuple[bool, float]:
+        ok, latency = (item.decode() if isinstance(item, bytes) else item).split(":", 1)
+        return ok == "1", float(latency)
+
+    def opened_at(self) -> float | None:
+        def redis_fn(r):
+            raw = r.get(self._key("open"))
+            return float(raw) if raw is not None else None
+        return self._with_redis(redis_fn, lambda: self._opened_at)
+
+    def _open(self) -> None:
+        now = time.time()
+
+        def redis_fn(r):
+            pipe = r.pipeline()
+            pipe.set(self._key("open"), repr(now), ex=max(1, int(self.cooldown * 10)))
+            pipe.delete(self._key("probe"))
+            pipe.execute()
+
+        def local_fn():
+            self._opened_at, self._probe_until = now, 0.0
+
+        self._with_redis(redis_fn, local_fn)
+        get_logger().warning("Circuit for %s opened for %gs", self.name, self.cooldown)
+
+    def _close(self) -> None:
+        def local_fn():
+            self._opened_at, self._probe_until = None, 0.0
+            self._calls.clear()
+
+        self._with_redis(lambda r: r.delete(self._key("open"), self._key("probe"), self._key("calls")), local_fn)
+        get_logger().info("Circuit for %s closed", self.name)
+
+    def _take_probe(self, ttl: float) -> bool:
+        def local_fn():
+            now = time.monotonic()
+            if now < self._probe_until:
+                return False
+            self._probe_until = now + ttl
+            return True
+
+        return self._with_redis(lambda r: bool(r.set(self._key("probe"), "1", nx=True, ex=max(1, int(ttl)))), local_fn)
+
+    # --- публічний API ---
+    def state(self) -> str:
+        opened = self.opened_at()
+        if opened is None:
+            return "closed"
+        return "open" if time.time() - opened < self.cooldown else "half_open"
+
+    def allow(self, probe_ttl: float = 60) -> bool | str:
+        """True when closed, False while open; after the cooldown one caller gets PROBE.
+
+        The caller holding PROBE passes probe=True to record(). probe_ttl bounds
+        how long that probe may run before another caller may try.
+        """
+        opened = self.opened_at()
+        if opened is None:
+            return True
+        if time.time() - opened < self.cooldown:
+            return False
+        return PROBE if self._take_probe(probe_ttl) else False
+
+    def record(self, ok: bool, latency: float, probe: bool = False) -> None:
+        calls = self._push(ok, latency)
+        if probe:
+            self._close() if ok else self._open()
+            return
+        if self.opened_at() is not None:
+            # виклик, що стартував до відкриття кола: лише семпл, стан вирішує проба
+            return
+        if len(calls) >= self.min_calls and sum(1 for good, _ in calls if not good) / len(calls) >= self.error_rate:
+            self._open()
+
+    def timeout(self, default: float) -> float:
+        """Adaptive timeout: factor × latency percentile of recent successes, capped by default."""
+        latencies = [lat for ok, lat in self.samples() if ok]
+        if len(latencies) < self.min_calls:
+            return default
+        p = percentile(latencies, float(_setting("CIRCUIT_TIMEOUT_PERCENTILE")))
+        adaptive = max(float(_setting("CIRCUIT_TIMEOUT_MIN")), p * float(_setting("CIRCUIT_TIMEOUT_FACTOR")))
+        return min(default, adaptive)
+
+    def stats(self) -> dict:
+        calls = self.samples()
+        latencies = [lat for _, lat in calls]
+        return {
+            "state": self.state(),
+            "calls": len(calls),
+            "error_rate": round(sum(1 for ok, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+            "p50": round(percentile(latencies, 50), 3) if latencies else None,
+            "p95": round(percentile(latencies, 95), 3) if latencies else None,
+        }
+
+
+class BreakerCall:
+    """One guarded call: allow() once, then record() its outcome exactly once.
+
+    The first record() wins — the call's own result or the caller's timeout,
+    whichever comes first; a call that never got past allow() is not counted.
+    """
+
+    def __init__(self, breaker: CircuitBreaker | None):
+        self.breaker = breaker
+        self.started = False
+        self.probe = False
+        self._recorded = False
+        self._lock = threading.Lock()
+
+    def allow(self, probe_ttl: float = 60) -> bool:
+        if self.breaker is None:
+            self.started = True
+            return True
+        permit = self.breaker.allow(probe_ttl)
+        self.started, self.probe = bool(permit), permit == PROBE
+        return bool(permit)
+
+    def record(self, ok: bool, latency: float) -> None:
+        with self._lock:
+            if self._recorded:
+                return
+            self._recorded = True
+        if self.breaker is not None and self.started:
+            self.breaker.record(ok, latency, probe=self.probe)
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_LOCK = threading.Lock()
+
+
+def get_breaker(source: str) -> CircuitBreaker | None:
+    """Breaker for an adapter SOURCE, or None when disabled / not a guarded source."""
+    if not _setting("CIRCUIT_BREAKER_ENABLED") or source not in _setting("CIRCUIT_BREAKER_SOURCES"):
+        return None
+    with _LOCK:
+        b = _BREAKERS.get(source)
+        if b is None:
+            b = _BREAKERS[source] = CircuitBreaker(
+                source,
+                window=int(_setting("CIRCUIT_WINDOW")),
+                min_calls=int(_setting("CIRCUIT_MIN_CALLS")),
+                error_rate=float(_setting("CIRCUIT_ERROR_RATE")),
+                cooldown=float(_setting("CIRCUIT_COOLDOWN")),
+            )
+        return b
+
+
+def clear_breakers() -> None:
+    with _LOCK:
+        _BREAKERS.clear()
@@ -1,38 +1,121 @@
+import os
+import threading
+from urllib.parse import urlsplit
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from flask import current_app
 
+# Пул сесій процесу: (host, trust_env) -> requests.Session. Після fork (Celery prefork)
+# дочірній процес будує власні сесії — сокети батька не використовуються.
+_SESSIONS: dict[tuple[str, bool], requests.Session] = {}
+_SESSIONS_PID = None
+_LOCK = threading.Lock()
 
-def requests_session_with_retries():
-    timeout = 30
-    retries = 2
+
+def _setting(name: str, default):
     try:
         if current_app:
-            timeout = int(current_app.config.get('EXTERNAL_REQUEST_TIMEOUT', 30))
-            retries = int(current_app.config.get('EXTERNAL_REQUEST_RETRIES', 2))
+            return current_app.config.get(name, default)
     except Exception:
         pass
+    return default
 
-    s = requests.Session()
+
+def _proxies() -> dict:
     # Respect proxy settings from config or environment
+    proxies = {}
+    http_proxy = _setting('HTTP_PROXY', '') or _setting('http_proxy', '')
+    https_proxy = _setting('HTTPS_PROXY', '') or _setting('https_proxy', '')
+    if http_proxy:
+        proxies['http'] = http_proxy
+    if https_proxy:
+        proxies['https'] = https_proxy
+    return proxies
+
+
+def _build_session(trust_env: bool) -> requests.Session:
+    retries = int(_setting('EXTERNAL_REQUEST_RETRIES', 2))
+    s = requests.Session()
+    s.trust_env = trust_env
+    if trust_env:
+        s.proxies.update(_proxies())
+    else:
+        s.proxies = {"http": None, "https": None}
+    if not _setting('HTTP_KEEPALIVE', True):
+        s.headers['Connection'] = 'close'
+    retry = Retry(total=retries, backoff_factor=float(_setting('HTTP_RETRY_BACKOFF', 1)),
+                  status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(max_retries=retry,
+                          pool_connections=int(_setting('HTTP_POOL_CONNECTIONS', 10)),
+                          pool_maxsize=int(_setting('HTTP_POOL_MAXSIZE', 20)),
+                          pool_block=bool(_setting('HTTP_POOL_BLOCK', False)))
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    s.request_timeout = int(_setting('EXTERNAL_REQUEST_TIMEOUT', 30))
+    return s
+
+
+def get_session(url: str = "", trust_env: bool = True) -> requests.Session:
+    """Process-wide pooled requests.Session for the host of url.
+
+    Keep-alive connections (and TLS sessions) are reused across checks; pool
+    size, keep-alive and retry policy come from HTTP_POOL_* / HTTP_KEEPALIVE /
+    EXTERNAL_REQUEST_RETRIES. trust_env=False ignores proxy env vars (VIES).
+    Pass per-request headers/timeouts instead of mutating the shared session.
+    """
+    global _SESSIONS_PID
+    key = (urlsplit(url).hostname or url or "", trust_env)
+    if _SESSIONS_PID == os.getpid():
+        s = _SESSIONS.get(key)
+        if s is not None:
+            return s
+    with _LOCK:
+        if _SESSIONS_PID != os.getpid():
+            # успадковані від батька сесії не закриваємо — лише забуваємо
+            _SESSIONS.clear()
+            _SESSIONS_PID = os.getpid()
+        s = _SESSIONS.get(key)
+        if s is None:
+            s = _SESSIONS[key] = _build_session(trust_env)
+        return s
+
+
+def close_sessions() -> None:
+    with _LOCK:
+        if _SESSIONS_PID == os.getpid():
+            for s in _SESSIONS.values():
+                s.close()
+        _SESSIONS.clear()
+
+
+def requests_session_with_retries(url: str = ""):
+    """Shared pooled session (see get_session); kept for existing callers."""
+    return get_session(url)
+
+
+def async_client(**kwargs):
+    """httpx.AsyncClient shared by all afetch() calls of one orchestrator run.
+
+    Uses the same timeout/retry/proxy settings as requests_session_with_retries().
+    The client is bound to the running event loop, so create it inside it.
+    """
+    import httpx
+
+    timeout = 30
+    retries = 2
+    max_connections = 100
+    proxy = None
     try:
         if current_app:
-            http_proxy = current_app.config.get('HTTP_PROXY') or current_app.config.get('http_proxy')
-            https_proxy = current_app.config.get('HTTPS_PROXY') or current_app.config.get('https_proxy')
-            proxies = {}
-            if http_proxy:
-                proxies['http'] = http_proxy
-            if https_proxy:
-                proxies['https'] = https_proxy
-            if proxies:
-                s.proxies.update(proxies)
+            timeout = int(current_app.config.get('EXTERNAL_REQUEST_TIMEOUT', 30))
+            retries = int(current_app.config.get('EXTERNAL_REQUEST_RETRIES', 2))
+            max_connections = int(current_app.config.get('HTTP_ASYNC_MAX_CONNECTIONS', 100))
+            proxy = current_app.config.get('HTTPS_PROXY') or current_app.config.get('HTTP_PROXY') or None
     except Exception:
-        # fall back to environment proxies (requests does this by default)
         pass
-    retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
-    s.mount('http://', adapter)
-    s.mount('https://', adapter)
-    s.request_timeout = timeout
-    return s
+
+    keepalive = max_connections if _setting('HTTP_KEEPALIVE', True) else 0
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=keepalive)
+    transport = httpx.AsyncHTTPTransport(retries=retries, limits=limits, proxy=proxy)
+    return httpx.AsyncClient(timeout=timeout, transport=transport, follow_redirects=True, **kwargs)
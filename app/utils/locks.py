@@ -0,0 +1,87 @@
+# app/utils/locks.py
+# Міжпроцесне блокування: Redis (спільне для всіх хостів) або lock-файл на цьому хості
+
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from .logging import get_logger
+from .redis_client import get_redis
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Видаляємо ключ, лише якщо він досі наш (лок міг протухнути і перейти іншому)
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@contextmanager
+def _file_lock(path: str, ttl: int):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fcntl is not None:
+        fh = open(path, "a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+        return
+    # Без flock: O_EXCL-файл, який вважаємо протухлим після ttl
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def exclusive(name: str, ttl: int, lock_dir: str):
+    """Non-blocking cross-process lock; yields True when this process holds it.
+
+    Uses Redis when reachable (works across hosts), otherwise a lock file in lock_dir.
+    """
+    r = get_redis()
+    key, token = f"lock:{name}", uuid.uuid4().hex
+    if r is not None:
+        try:
+            acquired = bool(r.set(key, token, nx=True, ex=ttl))
+        except Exception as e:
+            get_logger().warning("Redis lock %s unavailable, using file lock: %s", name, e)
+            r = None
+    if r is None:
+        with _file_lock(os.path.join(lock_dir, f"{name}.lock"), ttl) as acquired:
+            yield acquired
+        return
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                r.eval(_RELEASE_LUA, 1, key, token)
+            except Exception as e:
+                get_logger().warning("Failed to release lock %s: %s", name, e)
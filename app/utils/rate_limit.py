@@ -0,0 +1,90 @@
+# app/utils/rate_limit.py
+# Token bucket на ключ (напр. країна VIES): спільний між воркерами через Redis, інакше локальний
+
+import asyncio
+import threading
+import time
+from .logging import get_logger
+from .redis_client import get_redis
+
+# Повертає 0, якщо токен видано, інакше скільки секунд чекати до наступного.
+# Час беремо з Redis (TIME), щоб годинники воркерів не впливали на рахунок.
+_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """`rate` tokens/sec refill, up to `burst`, tracked separately for every key."""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._local: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    def _redis_try(self, r, key: str) -> float:
+        if self._script is None:
+            self._script = r.register_script(_BUCKET_LUA)
+        return float(self._script(keys=[f"ratelimit:{self.name}:{key}"], args=[self.rate, self.burst], client=r))
+
+    def _local_try(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._local.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - ts) * self.rate)
+            if tokens >= 1:
+                self._local[key] = (tokens - 1, now)
+                return 0.0
+            self._local[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def try_acquire(self, key: str) -> float:
+        """Take a token if available; returns 0.0 on success or the seconds to wait."""
+        if self.rate <= 0:
+            return 0.0
+        r = get_redis()
+        if r is not None:
+            try:
+                return self._redis_try(r, key)
+            except Exception as e:
+                get_logger().warning("Redis rate limiter failed, using local bucket: %s", e)
+        return self._local_try(key)
+
+    def acquire(self, key: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(key)
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, key: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(key)
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
@@ -0,0 +1,63 @@
+# app/utils/redis_client.py
+# Спільний Redis-клієнт процесу (той самий REDIS_URL, що й брокер Celery)
+
+import os
+import threading
+import time
+from flask import current_app, has_app_context
+from .logging import get_logger
+
+_CLIENT = None
+_CLIENT_PID = None
+# Коли ping востаннє не вдався (time.monotonic()); None — Redis доступний або ще не пробували
+_FAILED_AT = None
+_LOCK = threading.Lock()
+
+
+def _setting(name: str, default):
+    return current_app.config.get(name, default) if has_app_context() else os.getenv(name, default)
+
+
+def get_redis():
+    """Process-wide redis.Redis client, or None when Redis isn't configured/reachable.
+
+    The client is re-created in forked children (Celery prefork) so connections
+    are never shared across processes. After a failed ping callers get None
+    (local fallback) for REDIS_RETRY_INTERVAL seconds, then Redis is tried again;
+    the fallback is logged once per outage.
+    """
+    global _CLIENT, _CLIENT_PID, _FAILED_AT
+    if _settled():
+        return _CLIENT or None
+    with _LOCK:
+        if _settled():
+            return _CLIENT or None
+        if _CLIENT_PID != os.getpid():
+            _FAILED_AT = None
+        url = _setting("REDIS_URL", None)
+        client = False
+        if url:
+            try:
+                import redis
+                c = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+                c.ping()
+                client = c
+                if _FAILED_AT is not None:
+                    get_logger().info("Redis at %s is reachable again", url)
+                _FAILED_AT = None
+            except Exception as e:
+                if _FAILED_AT is None:
+                    get_logger().warning("Redis unavailable at %s, using local fallback: %s", url, e)
+                _FAILED_AT = time.monotonic()
+        # False = "Redis немає": без URL — назавжди, після помилки — до наступної спроби (_settled)
+        _CLIENT, _CLIENT_PID = client, os.getpid()
+        return _CLIENT or None
+
+
+def _settled() -> bool:
+    """The cached client (or the cached "no Redis") still holds for this process."""
+    if _CLIENT is None or _CLIENT_PID != os.getpid():
+        return False
+    if _CLIENT is not False or _FAILED_AT is None:
+        return True
+    return time.monotonic() - _FAILED_AT < float(_setting("REDIS_RETRY_INTERVAL", 30))
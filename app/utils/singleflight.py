@@ -0,0 +1,120 @@
+# app/utils/singleflight.py
+# Коалесценція однакових запитів: один виклик на ключ, решта чекає на його результат
+
+import asyncio
+import threading
+import time
+from .redis_client import get_redis
+
+
+class _Call:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent do(key, fn) calls from threads share one execution of fn."""
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """Same as SingleFlight for coroutines on one event loop."""
+
+    def __init__(self):
+        self._calls: dict[tuple[int, str], asyncio.Future] = {}
+
+    async def do(self, key: str, fn):
+        slot = (id(asyncio.get_running_loop()), key)
+        fut = self._calls.get(slot)
+        if fut is not None:
+            # shield: скасування одного очікувача не скасовує спільний виклик
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._calls[slot] = fut
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # позначаємо як отримане, якщо очікувачів немає
+            raise
+        else:
+            fut.set_result(value)
+            return value
+        finally:
+            del self._calls[slot]
+
+
+def acquire_lead(key: str, ttl: float) -> bool:
+    """Cross-process leader election for `key`; True when we should do the work.
+
+    Without Redis every process is its own leader.
+    """
+    r = get_redis()
+    if r is None:
+        return True
+    try:
+        return bool(r.set(f"inflight:{key}", "1", nx=True, px=int(ttl * 1000)))
+    except Exception:
+        return True
+
+
+def release_lead(key: str) -> None:
+    r = get_redis()
+    if r is not None:
+        try:
+            r.delete(f"inflight:{key}")
+        except Exception:
+            pass
+
+
+def wait_for(lookup, miss, timeout: float, interval: float = 0.1):
+    """Poll `lookup()` until it returns something other than `miss` or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        value = lookup()
+        if value is not miss:
+            return value
+    return miss
+
+
+async def await_for(lookup, miss, timeout: float, interval: float = 0.1):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        value = lookup()
+        if value is not miss:
+            return value
+    return miss
@@ -0,0 +1,118 @@
+# app/workers/async_runner.py
+# Async-оркестратор: один воркер перевіряє сотні компаній одночасно на спільному
+# httpx.AsyncClient, без окремого потоку на кожен HTTP-запит.
+
+import asyncio
+from flask import current_app
+from ..extensions import db
+from ..models import Company
+from ..services.bulk_writer import CheckBatchWriter
+from ..services.notifier import notify_status_change
+from ..utils.http import async_client
+from ..adapters.registry import FOLLOWUP_SOURCES, get_adapter, get_adapters
+from ..utils.circuit_breaker import BreakerCall, get_breaker
+from ..services.change_detection import fingerprint
+from .tasks import (_pre_check_query, _enrich_company, _skip_result, _run_in_context, _fresh_results,
+                    _unchanged_results, _adapter_timeout, _base_timeout, _failed, _circuit_open, _fingerprinted)
+
+
+async def _amaybe_run(app, adapter, q: dict, client) -> dict:
+    """Async counterpart of _maybe_run.
+
+    Adapters with afetch() share the client; sync-only adapters (sanctions,
+    registries) run in the default thread pool inside an app context.
+    """
+    src = getattr(adapter, "SOURCE", "unknown")
+    skipped = _skip_result(src, q)
+    if skipped:
+        return skipped
+    timeout = _adapter_timeout(src)
+    call = BreakerCall(get_breaker(src))
+    if not hasattr(adapter, "afetch"):
+        # _maybe_run у потоці веде той самий BreakerCall: рахується або його результат, або таймаут
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(_run_in_context, app, adapter, dict(q), call), timeout)
+        except asyncio.TimeoutError:
+            call.record(False, timeout)
+            return {"status": "unknown", "data": {"error": f"timeout after {timeout:g}s"}, "source": src, "note": "adapter timeout"}
+        except Exception as e:
+            return {"status": "unknown", "data": {"error": str(e), "used_query": q}, "source": src}
+
+    if not call.allow(_base_timeout(src)):
+        return _circuit_open(src)
+    fp = fingerprint(adapter, q)
+    started = asyncio.get_running_loop().time()
+    try:
+        res = await asyncio.wait_for(adapter.afetch(q, client), timeout)
+    except asyncio.TimeoutError:
+        res = {"status": "unknown", "data": {"error": f"timeout after {timeout:g}s"}, "source": src, "note": "adapter timeout"}
+    except Exception as e:
+        res = {"status": "unknown", "data": {"error": str(e), "used_query": q}, "source": src}
+    call.record(not _failed(res), asyncio.get_running_loop().time() - started)
+    return _fingerprinted(res, fp)
+
+
+async def _acheck_company(app, company_id: int, requester: dict, client, sem: asyncio.Semaphore,
+                          writer: CheckBatchWriter, changed_only: bool = False) -> dict:
+    # Робота з БД — лише у синхронних ділянках між await, тож сесія не перемежовується
+    async with sem:
+        company = db.session.get(Company, company_id)
+        if not company:
+            return {"company_id": company_id, "status": None, "error": "not found"}
+
+        q = _pre_check_query(company, requester or {})
+        results = []
+        # Моніторинг: лише адаптери, чиї входи змінились; інакше — вікно свіжості
+        reusable = _unchanged_results if changed_only else _fresh_results
+        fresh = reusable(company, q, ("vies", "opencorporates"))
+
+        vies_res = fresh.get("vies") or await _amaybe_run(app, get_adapter("vies"), q, client)
+        results.append(vies_res)
+        if isinstance(vies_res.get("data"), dict):
+            _enrich_company(company, vies_res["data"])
+
+        if not company.name:
+            opencorp_res = fresh.get("opencorporates") or await _amaybe_run(app, get_adapter("opencorporates"), q, client)
+            results.append(opencorp_res)
+            if opencorp_res.get("status") == "ok" and opencorp_res.get("data", {}).get("name"):
+                company.name = opencorp_res["data"]["name"]
+                db.session.add(company)
+
+        q = _pre_check_query(company, requester or {})
+        # відбитки санкцій/реєстрів залежать від назви, збагаченої кроком VIES
+        fresh.update(reusable(company, q, [s for s in FOLLOWUP_SOURCES if s not in fresh]))
+        stale = [s for s in FOLLOWUP_SOURCES if s not in fresh]
+        ran = dict(zip(stale, await asyncio.gather(*(_amaybe_run(app, a, q, client) for a in get_adapters(stale)))))
+        results.extend(fresh.get(s) or ran[s] for s in FOLLOWUP_SOURCES)
+
+        # Запис — пакетно через CheckBatchWriter (один commit на BULK_WRITE_BATCH_SIZE компаній)
+        company_id = company.id
+        reused = sum(1 for r in results if r.get("checked_at") is not None)
+        status, score = writer.add(company, results)
+        return {"company_id": company_id, "status": status, "confidence_score": score,
+                "adapters_run": len(results) - reused, "adapters_reused": reused}
+
+
+async def run_checks_async(company_ids: list[int], requester: dict = None, concurrency: int = None,
+                           changed_only: bool = False) -> list[dict]:
+    """Check many companies concurrently; returns one summary per id, in input order.
+
+    changed_only (monitoring): re-run only adapters whose inputs changed or whose
+    refresh interval elapsed; the other results are copied into the new Check.
+    """
+    app = current_app._get_current_object()
+    sem = asyncio.Semaphore(concurrency or int(app.config.get("CHECKS_ASYNC_CONCURRENCY", 200)))
+    writer = CheckBatchWriter()
+    async with async_client() as client:
+        summaries = await asyncio.gather(*(_acheck_company(app, cid, requester, client, sem, writer, changed_only)
+                                           for cid in company_ids))
+    writer.flush()
+    for company_id, prev, new in writer.status_changes:
+        notify_status_change(company_id, prev, new)
+    return summaries
+
+
+def run_checks_batch(company_ids: list[int], requester: dict = None, concurrency: int = None,
+                     changed_only: bool = False) -> list[dict]:
+    """Sync entry point (Celery task / request handler) for run_checks_async."""
+    return asyncio.run(run_checks_async(company_ids, requester, concurrency, changed_only))
@@ -1,18 +1,16 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from ..extensions import db
-from ..models import Company, MonitoringSubscription
+from ..models import Company
 from ..services.aggregator import apply_results
+from ..services.change_detection import fingerprint, unchanged_results
+from ..services.freshness import fresh_results
 from ..services.notifier import notify_status_change
 from flask import current_app
-
-from ..adapters.vies_adapter import ViesAdapter
-from ..adapters.sanctions_eu_adapter import EUSanctionsAdapter
-from ..adapters.sanctions_ofac_adapter import OFACAdapter
-from ..adapters.sanctions_uk_adapter import UKSanctionsAdapter
-from ..adapters.unternehmensregister_adapter import UnternehmensregisterAdapter
-from ..adapters.insolvenz_adapter import InsolvenzAdapter
-from ..adapters.whois_denic_adapter import WhoisDenicAdapter
-from ..adapters.ssl_labs_adapter import SSLLabsAdapter
-from ..adapters.opencorporates_adapter import OpenCorporatesAdapter
+from ..adapters.registry import FOLLOWUP_SOURCES, get_adapter, get_adapters
+from ..utils.circuit_breaker import BreakerCall, get_breaker
 
 def _pre_check_query(company: Company, requester: dict) -> dict:
     name = (company.name or "").strip()
@@ -31,6 +29,7 @@ def _pre_check_query(company: Company, requester: dict) -> dict:
     }
 
 def _enrich_company(company: Company, vies_data: dict):
+    # Без commit: зміни потрапляють у ту ж транзакцію, що й apply_results
     changed = False
     v_country = vies_data.get("country_code")
     v_addr = vies_data.get("address")
@@ -42,35 +41,152 @@ def _enrich_company(company: Company, vies_data: dict):
     if v_name and not company.name:
         company.name = v_name; changed = True
     if changed:
-        db.session.add(company); db.session.commit()
+        db.session.add(company)
+
+def _skip_result(src: str, q: dict) -> dict | None:
+    # Мінімально потрібні поля
+    if src in ("sanctions_eu","sanctions_ofac","sanctions_uk"):
+        if not q.get("name"):
+            return {"status": "unknown", "data": {}, "source": src, "note": "name required"}
+    if src in ("whois","ssl_labs"):
+        if not q.get("website"):
+            return {"status": "unknown", "data": {}, "source": src, "note": "website required"}
+    if src in ("unternehmensregister","insolvenz","opencorporates"):
+        if not (q.get("name") or q.get("country") or q.get("address")):
+            return {"status": "unknown", "data": {}, "source": src, "note": "insufficient input"}
+    return None
+
+def _failed(res: dict) -> bool:
+    """Result caused by the source failing (exception, timeout, 5xx/429) — counts against its circuit."""
+    data = res.get("data")
+    if res.get("status") not in ("error", "unknown", "warning") or not isinstance(data, dict):
+        return False
+    return "error" in data or int(data.get("http_status") or 0) in (429, 500, 502, 503, 504)
+
+
+def _circuit_open(src: str) -> dict:
+    return {"status": "unknown", "data": {}, "source": src, "note": "circuit open: source is failing, skipped"}
+
 
-def _maybe_run(adapter, q: dict) -> dict:
+def _fingerprinted(res: dict, fp: str | None) -> dict:
+    # Копія: адаптер міг віддати об'єкт зі свого кешу
+    return {**res, "fingerprint": fp} if fp is not None else res
+
+
+def _maybe_run(adapter, q: dict, call: BreakerCall = None) -> dict:
+    """Run one adapter behind its circuit breaker.
+
+    call: the caller's BreakerCall when it enforces a timeout of its own, so the
+    outcome is recorded once — by whichever of the two finishes first.
+    """
     src = getattr(adapter, "SOURCE", "unknown")
+    skipped = _skip_result(src, q)
+    if skipped:
+        return skipped
+    call = call or BreakerCall(get_breaker(src))
+    if not call.allow(_base_timeout(src)):
+        return _circuit_open(src)
+    # Відбиток — до запиту: версія джерела, з якою порівнюватиме моніторинг
+    fp = fingerprint(adapter, q)
+    started = time.monotonic()
     try:
-        # Мінімально потрібні поля
-        if src in ("sanctions_eu","sanctions_ofac","sanctions_uk"):
-            if not q.get("name"):
-                return {"status": "unknown", "data": {}, "source": src, "note": "name required"}
-        if src in ("whois","ssl_labs"):
-            if not q.get("website"):
-                return {"status": "unknown", "data": {}, "source": src, "note": "website required"}
-        if src in ("unternehmensregister","insolvenz","opencorporates"):
-            if not (q.get("name") or q.get("country") or q.get("address")):
-                return {"status": "unknown", "data": {}, "source": src, "note": "insufficient input"}
-        return adapter.fetch(q)
+        res = adapter.fetch(q)
     except Exception as e:
-        return {"status": "unknown", "data": {"error": str(e), "used_query": q}, "source": src}
+        res = {"status": "unknown", "data": {"error": str(e), "used_query": q}, "source": src}
+    call.record(not _failed(res), time.monotonic() - started)
+    return _fingerprinted(res, fp)
+
+# Спільний пул потоків для паралельного запуску адаптерів (один на процес;
+# після fork у Celery prefork-воркері створюється заново)
+_EXECUTOR = None
+_EXECUTOR_PID = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR, _EXECUTOR_PID
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_PID != os.getpid():
+            workers = int(current_app.config.get("CHECKS_MAX_WORKERS", 8))
+            _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="adapter")
+            _EXECUTOR_PID = os.getpid()
+        return _EXECUTOR
+
+
+def _base_timeout(src: str) -> float:
+    cfg = current_app.config
+    return float((cfg.get("ADAPTER_TIMEOUTS") or {}).get(src) or cfg.get("ADAPTER_TIMEOUT", 60))
+
+
+def _adapter_timeout(src: str) -> float:
+    """Configured timeout, shortened to a multiple of the source's recent latency percentile."""
+    base = _base_timeout(src)
+    breaker = get_breaker(src)
+    return breaker.timeout(base) if breaker is not None else base
+
+
+def _run_in_context(app, adapter, q: dict, call: BreakerCall = None) -> dict:
+    with app.app_context():
+        return _maybe_run(adapter, q, call)
+
+
+def _run_adapters(adapters: list, q: dict) -> list[dict]:
+    """Run independent adapters, in parallel when CHECKS_PARALLEL is on.
+
+    Results keep the order of adapters. An adapter that misses its timeout
+    (ADAPTER_TIMEOUTS[source] or ADAPTER_TIMEOUT, counted from submission) is
+    reported as unknown; if it hasn't started yet it is cancelled, a running
+    call is left to finish in the background and its result is discarded.
+    """
+    if not current_app.config.get("CHECKS_PARALLEL", True) or len(adapters) < 2:
+        return [_maybe_run(adapter, q) for adapter in adapters]
+
+    app = current_app._get_current_object()
+    executor = _get_executor()
+    started = time.monotonic()
+    calls = [BreakerCall(get_breaker(getattr(adapter, "SOURCE", "unknown"))) for adapter in adapters]
+    futures = [executor.submit(_run_in_context, app, adapter, dict(q), call) for adapter, call in zip(adapters, calls)]
+    results = []
+    for adapter, call, fut in zip(adapters, calls, futures):
+        src = getattr(adapter, "SOURCE", "unknown")
+        timeout = _adapter_timeout(src)
+        try:
+            results.append(fut.result(timeout=max(0.0, started + timeout - time.monotonic())))
+        except FutureTimeoutError:
+            fut.cancel()
+            # таймаут — відмова джерела; пізній результат самого виклику вже не рахується
+            call.record(False, timeout)
+            results.append({"status": "unknown", "data": {"error": f"timeout after {timeout:g}s"},
+                            "source": src, "note": "adapter timeout"})
+        except Exception as e:
+            results.append({"status": "unknown", "data": {"error": str(e), "used_query": q}, "source": src})
+    return results
+
+
+def _fresh_results(company: Company, q: dict, sources, force: bool = False) -> dict[str, dict]:
+    """Recent results of sources produced from the same inputs as q (services/freshness.py); none when force."""
+    if force:
+        return {}
+    return fresh_results(company, {s: fingerprint(get_adapter(s), q) for s in sources})
+
 
-def _run_checks(company_id: int, requester: dict = None):
+def _unchanged_results(company: Company, q: dict, sources) -> dict[str, dict]:
+    """Monitoring mode: results whose inputs and source version haven't changed (services/change_detection.py)."""
+    return unchanged_results(company, q, get_adapters(sources))
+
+
+def _run_checks(company_id: int, requester: dict = None, force: bool = False):
     company = Company.query.get(company_id)
     if not company:
         return
 
     q = _pre_check_query(company, requester or {})
     results = []
+    # Свіжі результати (у межах CHECK_FRESHNESS_MAX_AGE[S], з тими самими входами) не запитуємо повторно
+    fresh = _fresh_results(company, q, ("vies", "opencorporates"), force)
 
     # 1) VIES (+ approx за наявності requester)
-    vies_res = _maybe_run(ViesAdapter(), q)
+    vies_res = fresh.get("vies") or _maybe_run(get_adapter("vies"), q)
     results.append(vies_res)
 
     if isinstance(vies_res.get("data"), dict):
@@ -78,23 +194,21 @@ def _run_checks(company_id: int, requester: dict = None):
 
     # 2) Якщо після VIES немає name, спробувати OpenCorporates для збагачення
     if not company.name:
-        opencorp_res = _maybe_run(OpenCorporatesAdapter(), q)
+        opencorp_res = fresh.get("opencorporates") or _maybe_run(get_adapter("opencorporates"), q)
         results.append(opencorp_res)
         if opencorp_res.get("status") == "ok" and opencorp_res.get("data", {}).get("name"):
             company.name = opencorp_res["data"]["name"]
             db.session.add(company)
-            db.session.commit()
 
     # 3) Оновити q після збагачення
     q = _pre_check_query(company, requester or {})
+    # відбитки санкцій/реєстрів залежать від назви, збагаченої кроком VIES
+    fresh.update(_fresh_results(company, q, [s for s in FOLLOWUP_SOURCES if s not in fresh], force))
 
-    # 3) Інші адаптери лише якщо є мінімальні дані
-    for adapter in [
-        EUSanctionsAdapter(), OFACAdapter(), UKSanctionsAdapter(),
-        UnternehmensregisterAdapter(), InsolvenzAdapter(), OpenCorporatesAdapter(),
-        WhoisDenicAdapter(), SSLLabsAdapter(),
-    ]:
-        results.append(_maybe_run(adapter, q))
+    # 3) Інші адаптери лише якщо є мінімальні дані — вони незалежні, тож запускаються паралельно
+    stale = [s for s in FOLLOWUP_SOURCES if s not in fresh]
+    ran = dict(zip(stale, _run_adapters(get_adapters(stale), q)))
+    results.extend(fresh.get(s) or ran[s] for s in FOLLOWUP_SOURCES)
 
     prev = company.current_status or "unknown"
     apply_results(company, results)
@@ -102,16 +216,53 @@ def _run_checks(company_id: int, requester: dict = None):
         notify_status_change(company.id, prev, company.current_status)
 
 # Expose a module-level function that can be called directly by the smoke runner
-def run_full_check_task(company_id: int, requester: dict = None):
-    _run_checks(company_id, requester)
+def run_full_check_task(company_id: int, requester: dict = None, force: bool = False):
+    _run_checks(company_id, requester, force=force)
     return {"company_id": company_id, "done": True}
 
 
+def run_batch_check_task(company_ids: list[int], requester: dict = None):
+    # Імпорт тут, бо async_runner сам імпортує цей модуль
+    from .async_runner import run_checks_batch
+    return run_checks_batch(company_ids, requester)
+
+
 def daily_monitoring_task():
-    subs = MonitoringSubscription.query.filter_by(enabled=True).all()
-    for s in subs:
-        run_full_check_task(s.company_id)
-    return {"scheduled": len(subs)}
+    # Лише розсилка чанків (services/scheduler.py); самі перевірки — у monitor_chunk_task
+    from ..services.scheduler import run_daily_monitoring
+    return run_daily_monitoring()
+
+
+def monitor_chunk_task(run_id: int, seq: int, company_ids: list[int]):
+    from ..services.scheduler import claim_chunk, record_chunk
+    from .async_runner import run_checks_batch
+    if not claim_chunk(run_id, seq):
+        # повторна доставка того самого чанка — вже виконується або виконаний
+        return {"run_id": run_id, "seq": seq, "skipped": True}
+    changed_only = bool(current_app.config.get("MONITORING_CHANGE_DRIVEN", True))
+    try:
+        summaries = run_checks_batch(company_ids, changed_only=changed_only)
+    except Exception:
+        db.session.rollback()
+        record_chunk(run_id, seq, 0, len(company_ids))
+        raise
+    failed = sum(1 for s in summaries if s.get("error"))
+    record_chunk(run_id, seq, len(summaries) - failed, failed)
+    return {"run_id": run_id, "checked": len(summaries) - failed, "failed": failed,
+            "adapters_run": sum(s.get("adapters_run", 0) for s in summaries),
+            "adapters_reused": sum(s.get("adapters_reused", 0) for s in summaries)}
+
+
+def refresh_sanctions_task(sources: list[str] = None, force: bool = False):
+    from ..services.sanctions_lists import refresh_lists
+    summaries = refresh_lists(sources, force=force)
+    if current_app.config.get("SANCTIONS_RESCREEN_RECHECK", True):
+        # повна перевірка лише для компаній, що збіглися з новими записами
+        task = current_app.celery_app.tasks["run_full_check_task"]
+        for cid in sorted({cid for s in summaries for cid in s["rescreened"]}):
+            # force: свіжий результат санкційного адаптера вже застарів через новий список
+            task.delay(cid, None, True)
+    return summaries
 
 
 def _bootstrap_tasks(app):
@@ -125,9 +276,35 @@ def _bootstrap_tasks(app):
         return
 
     @celery.task(name="run_full_check_task")
-    def _celery_run_full_check(company_id: int, requester: dict = None):
-        return run_full_check_task(company_id, requester)
+    def _celery_run_full_check(company_id: int, requester: dict = None, force: bool = False):
+        return run_full_check_task(company_id, requester, force)
+
+    @celery.task(name="run_batch_check_task")
+    def _celery_run_batch_check(company_ids: list, requester: dict = None):
+        return run_batch_check_task(company_ids, requester)
 
     @celery.task(name="daily_monitoring_task")
     def _celery_daily_monitoring():
-        return daily_monitoring_task()
\ No newline at end of file
+        return daily_monitoring_task()
+
+    @celery.task(name="monitor_chunk_task")
+    def _celery_monitor_chunk(run_id: int, seq: int, company_ids: list):
+        return monitor_chunk_task(run_id, seq, company_ids)
+
+    @celery.task(name="refresh_sanctions_task")
+    def _celery_refresh_sanctions(sources: list = None, force: bool = False):
+        return refresh_sanctions_task(sources, force)
+
+    # Celery beat (docker-compose: beat) — періодичне оновлення санкційних списків;
+    # задача сама пропускає списки, чий TTL ще не минув
+    celery.conf.beat_schedule = {
+        "refresh-sanctions-lists": {
+            "task": "refresh_sanctions_task",
+            "schedule": float(app.config.get("SANCTIONS_REFRESH_INTERVAL", 3600)),
+        },
+        # Щоденний моніторинг: чанки розподіляються по MONITORING_SPREAD_SECONDS
+        "daily-monitoring": {
+            "task": "daily_monitoring_task",
+            "schedule": float(app.config.get("MONITORING_INTERVAL", 86400)),
+        },
+    }
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Add monitoring_runs and index monitoring_subscriptions.company_id
+
+Revision ID: 8f2b4c6d1e7a
+Revises: 691929cc5caa
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2b4c6d1e7a'
+down_revision = '691929cc5caa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monitoring_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('total_companies', sa.Integer(), nullable=True),
+    sa.Column('chunks', sa.Integer(), nullable=True),
+    sa.Column('dispatched', sa.Integer(), nullable=True),
+    sa.Column('completed', sa.Integer(), nullable=True),
+    sa.Column('failed', sa.Integer(), nullable=True),
+    sa.Column('spread_seconds', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('monitoring_runs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monitoring_runs_status'), ['status'], unique=False)
+
+    # keyset-пагінація DISTINCT company_id у daily_monitoring_task
+    with op.batch_alter_table('monitoring_subscriptions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monitoring_subscriptions_company_id'), ['company_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('monitoring_subscriptions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monitoring_subscriptions_company_id'))
+
+    with op.batch_alter_table('monitoring_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monitoring_runs_status'))
+
+    op.drop_table('monitoring_runs')
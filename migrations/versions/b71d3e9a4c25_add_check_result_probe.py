@@ -0,0 +1,28 @@
+"""Add checked_at and fingerprint to check_results
+
+Revision ID: b71d3e9a4c25
+Revises: 8f2b4c6d1e7a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d3e9a4c25'
+down_revision = '8f2b4c6d1e7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('check_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checked_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('fingerprint', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('check_results', schema=None) as batch_op:
+        batch_op.drop_column('fingerprint')
+        batch_op.drop_column('checked_at')
@@ -0,0 +1,64 @@
+"""Add company search indexes (keyset, pg_trgm, VAT prefix, SQLite FTS5)
+
+Revision ID: c4e8a1f6d9b3
+Revises: b71d3e9a4c25
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f6d9b3'
+down_revision = 'b71d3e9a4c25'
+branch_labels = None
+depends_on = None
+
+# Копія app/services/company_search.SQLITE_FTS_DDL (міграція не імпортує код додатку)
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5("
+    "name, vat_number, content='companies', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN "
+    "INSERT INTO companies_fts(rowid, name, vat_number) VALUES (new.id, new.name, new.vat_number); END",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN "
+    "INSERT INTO companies_fts(companies_fts, rowid, name, vat_number) VALUES ('delete', old.id, old.name, old.vat_number); END",
+    "CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE OF name, vat_number ON companies BEGIN "
+    "INSERT INTO companies_fts(companies_fts, rowid, name, vat_number) VALUES ('delete', old.id, old.name, old.vat_number); "
+    "INSERT INTO companies_fts(rowid, name, vat_number) VALUES (new.id, new.name, new.vat_number); END",
+    "INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_created_at_id', ['created_at', 'id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_companies_name_trgm', 'companies', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_companies_vat_number_trgm', 'companies', ['vat_number'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'vat_number': 'gin_trgm_ops'})
+        # LIKE 'DE81%' по B-tree незалежно від collation
+        op.create_index('ix_companies_vat_number_prefix', 'companies', ['vat_number'], unique=False,
+                        postgresql_ops={'vat_number': 'text_pattern_ops'})
+    elif dialect == 'sqlite':
+        for stmt in SQLITE_FTS_DDL:
+            op.execute(stmt)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_companies_vat_number_prefix', table_name='companies')
+        op.drop_index('ix_companies_vat_number_trgm', table_name='companies')
+        op.drop_index('ix_companies_name_trgm', table_name='companies')
+    elif dialect == 'sqlite':
+        for trigger in ('companies_fts_au', 'companies_fts_ad', 'companies_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS companies_fts')
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_created_at_id')
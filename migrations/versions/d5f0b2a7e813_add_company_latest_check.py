@@ -0,0 +1,56 @@
+"""Add company_latest_check summary table
+
+Revision ID: d5f0b2a7e813
+Revises: c4e8a1f6d9b3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f0b2a7e813'
+down_revision = 'c4e8a1f6d9b3'
+branch_labels = None
+depends_on = None
+
+# Заповнення з наявних даних: останній Check кожної компанії + статуси його результатів
+BACKFILL = """
+INSERT INTO company_latest_check (company_id, check_id, status, confidence_score, adapter_statuses, checked_at)
+SELECT c.id, lc.check_id, c.current_status, c.confidence_score,
+       (SELECT {agg}(cr.adapter_name, cr.status) FROM check_results cr WHERE cr.check_id = lc.check_id),
+       ch.created_at
+FROM companies c
+JOIN (SELECT company_id, MAX(id) AS check_id FROM checks GROUP BY company_id) lc ON lc.company_id = c.id
+JOIN checks ch ON ch.id = lc.check_id
+"""
+
+
+def upgrade():
+    op.create_table('company_latest_check',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('check_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('confidence_score', sa.Integer(), nullable=True),
+    sa.Column('adapter_statuses', sa.JSON(), nullable=True),
+    sa.Column('checked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+    with op.batch_alter_table('company_latest_check', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_company_latest_check_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_company_latest_check_checked_at'), ['checked_at'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    agg = {'postgresql': 'json_object_agg', 'sqlite': 'json_group_object'}.get(dialect)
+    if agg:
+        op.execute(BACKFILL.format(agg=agg))
+
+
+def downgrade():
+    with op.batch_alter_table('company_latest_check', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_company_latest_check_checked_at'))
+        batch_op.drop_index(batch_op.f('ix_company_latest_check_status'))
+
+    op.drop_table('company_latest_check')
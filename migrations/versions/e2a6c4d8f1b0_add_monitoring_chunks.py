@@ -0,0 +1,39 @@
+"""Add monitoring_chunks
+
+Revision ID: e2a6c4d8f1b0
+Revises: d5f0b2a7e813
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6c4d8f1b0'
+down_revision = 'd5f0b2a7e813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monitoring_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('companies', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['run_id'], ['monitoring_runs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_id', 'seq', name='uq_monitoring_chunks_run_seq')
+    )
+    with op.batch_alter_table('monitoring_chunks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monitoring_chunks_run_id'), ['run_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('monitoring_chunks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monitoring_chunks_run_id'))
+
+    op.drop_table('monitoring_chunks')
@@ -0,0 +1,74 @@
+"""Rows/sec benchmark: apply_results() per company vs CheckBatchWriter.
+
+python -m scripts.bench_bulk_persist                       # sqlite file in /tmp
+DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_bulk_persist --companies 5000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, Check, CheckResult, CheckEvent
+from app.services.aggregator import apply_results
+from app.services.bulk_writer import CheckBatchWriter
+
+SOURCES = ["vies", "sanctions_eu", "sanctions_ofac", "sanctions_uk", "unternehmensregister",
+           "insolvenz", "opencorporates", "whois", "ssl_labs"]
+
+
+def fake_results(i: int) -> list[dict]:
+    status = ["ok", "warning", "unknown"][i % 3]
+    return [{"source": s, "status": status, "data": {"match_score": i % 100, "note": "bench"}} for s in SOURCES]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--companies", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=500)
+    args = ap.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or \
+            "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        print("database:", db.engine.url.render_as_string(hide_password=True))
+        db.drop_all()
+        db.create_all()
+        companies = [Company(name=f"Bench {i}", current_status="ok") for i in range(2 * args.companies)]
+        db.session.add_all(companies)
+        db.session.commit()
+        ids = [c.id for c in companies]
+        old_ids, new_ids = ids[:args.companies], ids[args.companies:]
+
+        def rows():
+            return Check.query.count() + CheckResult.query.count() + CheckEvent.query.count()
+
+        before = rows()
+        t0 = time.perf_counter()
+        for i, cid in enumerate(old_ids):
+            apply_results(db.session.get(Company, cid), fake_results(i))
+        t_old = time.perf_counter() - t0
+        old_rows = rows() - before
+
+        before = rows()
+        t0 = time.perf_counter()
+        writer = CheckBatchWriter(batch_size=args.batch_size)
+        for i, cid in enumerate(new_ids):
+            writer.add(db.session.get(Company, cid), fake_results(i))
+        writer.flush()
+        t_new = time.perf_counter() - t0
+        new_rows = rows() - before
+
+        print(f"companies per path:   {args.companies}")
+        print(f"apply_results:        {old_rows} rows in {t_old:.2f}s -> {old_rows / t_old:,.0f} rows/s")
+        print(f"CheckBatchWriter({args.batch_size}): {new_rows} rows in {t_new:.2f}s -> {new_rows / t_new:,.0f} rows/s")
+        print(f"speedup:              {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Company search latency vs table size: old ILIKE + LIMIT/OFFSET vs keyset + index paths (SQLite).
+
+python -m scripts.bench_company_search                   # 20k and 200k companies
+python -m scripts.bench_company_search --sizes 10000 100000 500000
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company
+from app.services import company_search
+
+
+def _timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _fill(n: int, rnd: random.Random) -> None:
+    base = datetime(2024, 1, 1)
+    words = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9))).capitalize() for _ in range(5000)]
+    rows = [{"name": f"{rnd.choice(words)} {rnd.choice(words)} GmbH",
+             "vat_number": f"DE{rnd.randint(100000000, 999999999)}",
+             "created_at": base + timedelta(seconds=i)} for i in range(n)]
+    for i in range(0, n, 20_000):
+        db.session.execute(insert(Company), rows[i:i + 20_000])
+    db.session.commit()
+
+
+def bench(size: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        _fill(size, random.Random(5))
+        name = db.session.get(Company, size // 2).name.split()[0].lower()
+        vat = db.session.get(Company, size // 3).vat_number[:7]
+
+        def old(q, offset=0):
+            like = f"%{q}%"
+            return (Company.query.filter(Company.name.ilike(like) | Company.vat_number.ilike(like))
+                    .order_by(Company.created_at.desc()).offset(offset).limit(100).all())
+
+        # сторінка з середини таблиці: OFFSET проти курсора на тій самій позиції
+        middle = Company.query.order_by(Company.created_at.desc(), Company.id.desc()).offset(size // 2).first()
+        cursor = company_search.encode_cursor(middle.created_at, middle.id)
+        old_deep = _timed(lambda: Company.query.order_by(Company.created_at.desc()).offset(size // 2).limit(100).all())
+        new_deep = _timed(lambda: company_search.search_companies("", 100, cursor))
+        old_name, old_vat = _timed(lambda: old(name)), _timed(lambda: old(vat))
+        new_vat = _timed(lambda: company_search.search_companies(vat, 100))
+        company_search.ensure_sqlite_fts()
+        new_name = _timed(lambda: company_search.search_companies(name, 100))
+
+        print(f"{size:>8} companies | middle page: OFFSET {old_deep:7.2f} ms, keyset {new_deep:6.2f} ms"
+              f" | name '{name}': ILIKE {old_name:7.2f} ms, FTS5 {new_name:6.2f} ms"
+              f" | vat '{vat}': ILIKE {old_vat:7.2f} ms, prefix {new_vat:6.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000])
+    args = ap.parse_args()
+    for size in args.sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
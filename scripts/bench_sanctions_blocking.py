@@ -0,0 +1,101 @@
+"""Recall/latency benchmark: trigram blocking vs brute-force sanctions scan.
+
+python -m scripts.bench_sanctions_blocking                      # synthetic list
+python -m scripts.bench_sanctions_blocking --csv app/data/ofac_sdn.csv --cols 1
+"""
+
+import argparse
+import random
+import time
+import pandas as pd
+from app.services.sanctions_index import SanctionsIndex, match_key
+
+WORDS = ["global", "trading", "oil", "gas", "bank", "invest", "holding", "group", "marine", "steel",
+         "logistics", "energy", "capital", "industrial", "export", "import", "technology", "mining",
+         "alpha", "nord", "east", "west", "united", "national", "federal", "shipping", "petro", "chem"]
+SUFFIX = ["llc", "ltd", "gmbh", "ag", "ooo", "jsc", "sa", "inc", "limited", "co"]
+
+
+def synthetic_names(n: int, rnd: random.Random) -> list[str]:
+    out = []
+    for _ in range(n):
+        core = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 3)))
+        tag = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 8)))
+        out.append(f"{tag} {core} {rnd.choice(SUFFIX)}")
+    return out
+
+
+def perturb(name: str, rnd: random.Random) -> str:
+    chars = list(name)
+    for _ in range(rnd.randint(0, 2)):
+        i = rnd.randrange(len(chars))
+        op = rnd.choice("dis")
+        if op == "d" and len(chars) > 1:
+            chars.pop(i)
+        elif op == "i":
+            chars.insert(i, rnd.choice("abcdefghijklmnopqrstuvwxyz"))
+        else:
+            chars[i] = rnd.choice("abcdefghijklmnopqrstuvwxyz")
+    words = "".join(chars).split()
+    rnd.shuffle(words)
+    return " ".join(words)
+
+
+def verdict(score: float, crit: float, warn: float) -> str:
+    return "critical" if score >= crit else ("warning" if score >= warn else "ok")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", help="sanctions CSV to index (default: synthetic list)")
+    ap.add_argument("--cols", default="", help="comma separated name columns (names or positions)")
+    ap.add_argument("--size", type=int, default=50_000)
+    ap.add_argument("--queries", type=int, default=400)
+    ap.add_argument("--crit", type=float, default=92)
+    ap.add_argument("--warn", type=float, default=80)
+    ap.add_argument("--guard", type=float, default=80)
+    args = ap.parse_args()
+    rnd = random.Random(42)
+
+    if args.csv:
+        df = pd.read_csv(args.csv, dtype=str, low_memory=False, on_bad_lines="skip").fillna("")
+        cols = [df.columns[int(c)] if c.isdigit() else c for c in args.cols.split(",") if c] or [df.columns[0]]
+    else:
+        df = pd.DataFrame({"name": synthetic_names(args.size, rnd)})
+        cols = ["name"]
+
+    t0 = time.perf_counter()
+    idx = SanctionsIndex.from_dataframe("bench", (0, 0), df, cols)
+    build = time.perf_counter() - t0
+
+    half = args.queries // 2
+    queries = [perturb(rnd.choice(idx.names), rnd) for _ in range(half)]
+    queries += synthetic_names(args.queries - half, rnd)
+
+    t0 = time.perf_counter()
+    brute = [idx.best_match(q) for q in queries]
+    t_brute = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    blocked = [idx.best_match(q, recall_guard=args.guard) for q in queries]
+    t_blocked = time.perf_counter() - t0
+    sizes = [idx.candidates(match_key(q), args.guard) for q in queries]
+    fallback = sum(1 for c in sizes if c is None)
+    cand = sum(len(idx) if c is None else len(c) for c in sizes) / len(queries)
+
+    relevant = [(b, k) for b, k in zip(brute, blocked) if b[0] >= args.guard]
+    exact = sum(1 for b, k in relevant if b == k)
+    same_verdict = sum(1 for b, k in zip(brute, blocked)
+                       if verdict(b[0], args.crit, args.warn) == verdict(k[0], args.crit, args.warn))
+
+    print(f"names indexed:        {len(idx)} (build {build:.2f}s)")
+    print(f"queries:              {len(queries)}  guard={args.guard} crit={args.crit} warn={args.warn}")
+    print(f"avg candidates:       {cand:.0f} ({100 * cand / max(1, len(idx)):.2f}% of list)")
+    print(f"full-scan fallbacks:  {fallback}/{len(queries)}")
+    print(f"brute-force latency:  {1000 * t_brute / len(queries):.3f} ms/query")
+    print(f"blocked latency:      {1000 * t_blocked / len(queries):.3f} ms/query")
+    print(f"recall >= guard:      {exact}/{len(relevant)} top matches identical")
+    print(f"verdict agreement:    {same_verdict}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Peak RSS of building a sanctions index: whole-file pandas parse vs chunked streaming parse.
+
+python -m scripts.bench_sanctions_ingest                         # synthetic 300k-row list
+python -m scripts.bench_sanctions_ingest --csv app/data/ofac_sdn.csv --source sanctions_ofac
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+import pandas as pd
+from app import create_app
+from app.config import Config
+from app.services import sanctions_lists
+from app.services.sanctions_index import SanctionsIndex
+from scripts.bench_sanctions_blocking import synthetic_names
+
+
+def _run(mode, source, path, chunk_rows, out):
+    app = create_app(Config)
+    with app.app_context():
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        t0 = time.perf_counter()
+        if mode == "whole":
+            # як було: r.content у пам'ять + повний DataFrame
+            with open(path, "rb") as f:
+                raw = f.read()
+            df = pd.read_csv(path, dtype=str, low_memory=False).fillna("")
+            idx = SanctionsIndex.from_dataframe(source, (0, 0), df, sanctions_lists.name_columns(source, df))
+            del raw
+        else:
+            name_cols, chunks = sanctions_lists.iter_chunks(source, path, chunk_rows)
+            idx = SanctionsIndex.from_chunks(source, (0, 0), chunks, name_cols)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        out.put((mode, len(idx), time.perf_counter() - t0, (peak - base) / 1024))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv")
+    ap.add_argument("--source", default="sanctions_uk")
+    ap.add_argument("--size", type=int, default=300_000)
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "list.csv")
+    if args.csv:
+        shutil.copy(args.csv, path)
+    else:
+        rnd = random.Random(3)
+        pd.DataFrame({
+            "Name 6": synthetic_names(args.size, rnd),
+            "Address 1": ["Some street 1, Some city, Some region"] * args.size,
+            "Other Information": ["Designated under the regulations; see notice"] * args.size,
+            "Regime": ["Russia"] * args.size,
+            "Passport Number": [f"P{rnd.randrange(10**8):08d}" for _ in range(args.size)],
+        }).to_csv(path, index=False)
+    print(f"file: {os.path.getsize(path) / 2**20:.0f} MB")
+
+    ctx = mp.get_context("fork")
+    for mode in ("whole", "chunked"):
+        out = ctx.Queue()
+        p = ctx.Process(target=_run, args=(mode, args.source, path, args.chunk_rows, out))
+        p.start()
+        mode, names, took, peak = out.get()
+        p.join()
+        print(f"{mode:8s} names={names} time={took:.1f}s peak RSS +{peak:.0f} MB")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Names/sec benchmark: batch screening vs one adapter-style best_match per name.
+
+python -m scripts.bench_sanctions_screen                    # 2000 names vs synthetic 20k-name lists
+python -m scripts.bench_sanctions_screen --names 5000 --size 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+from app import create_app
+from app.config import Config
+from app.services import sanctions_lists, sanctions_screen
+from app.services.sanctions_index import blocking_guard
+from scripts.bench_sanctions_blocking import perturb, synthetic_names
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=2000)
+    ap.add_argument("--size", type=int, default=20_000)
+    args = ap.parse_args()
+    rnd = random.Random(7)
+    data_dir = tempfile.mkdtemp()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        CACHE_DIR = data_dir
+        SANCTIONS_OFAC_ENABLED = True
+        SANCTIONS_UK_ENABLED = True
+
+    listed = []
+    for source, spec in sanctions_lists.LISTS.items():
+        names = synthetic_names(args.size, rnd)
+        listed += names[:args.names // 10]
+        pd.DataFrame({"Name": names}).to_csv(os.path.join(data_dir, spec.filename), index=False)
+    # ~10% запитів — зіпсовані імена зі списків, решта — випадкові
+    queries = [perturb(n, rnd) for n in listed] + synthetic_names(args.names - len(listed), rnd)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        indexes = {s: sanctions_lists.list_index(s) for s in sanctions_lists.enabled_lists()}
+
+        t0 = time.perf_counter()
+        for q in queries:
+            for source, idx in indexes.items():
+                thr = sanctions_lists.match_threshold(source)
+                idx.best_match(q, recall_guard=blocking_guard(app.config, thr))
+        t_single = time.perf_counter() - t0
+
+        out = sanctions_screen.screen(queries)
+        hits = sum(1 for r in out["results"] if r["matches"])
+
+        print(f"lists:       {len(indexes)} x {args.size} names")
+        print(f"per name:    {len(queries)} names in {t_single:.2f}s -> {len(queries) / t_single:,.0f} names/s")
+        print(f"batch:       {len(queries)} names in {out['stats']['seconds']:.2f}s -> "
+              f"{out['stats']['names_per_sec']:,.0f} names/s ({hits} with matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Startup benchmark: create_app() time and RSS of a fresh process.
+
+Compares the lazy adapter registry (what a web worker does now) with importing
+every adapter up front (what workers/tasks.py used to do at import time).
+
+python -m scripts.bench_startup
+python -m scripts.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from app import create_app
+app = create_app()
+if sys.argv[1] == "eager":
+    from app.adapters.registry import ADAPTERS, adapter_class
+    for source in ADAPTERS:
+        adapter_class(source)
+elapsed = time.perf_counter() - t0
+heavy = [m for m in ("pandas", "numpy", "rapidfuzz", "lxml", "httpx") if m in sys.modules]
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rss_mb": rss / 1024, "modules": len(sys.modules), "heavy": heavy}))
+"""
+
+
+def probe(mode: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE, mode], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    for mode in ("eager", "lazy"):
+        runs = [probe(mode) for _ in range(args.runs)]
+        print(f"{mode:6} create_app {statistics.median(r['seconds'] for r in runs):.2f}s  "
+              f"peak RSS {statistics.median(r['rss_mb'] for r in runs):.0f} MB  "
+              f"modules {runs[0]['modules']}  heavy: {', '.join(runs[0]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
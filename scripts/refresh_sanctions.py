@@ -0,0 +1,25 @@
+"""Download / refresh sanctions lists outside of Celery (first setup, cron, debugging).
+
+python -m scripts.refresh_sanctions                       # enabled lists, only when stale
+python -m scripts.refresh_sanctions --force sanctions_uk  # ignore TTL and ETag
+"""
+
+import argparse
+import json
+from app import create_app
+from app.services.sanctions_lists import refresh_lists
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("sources", nargs="*", help="sanctions_eu / sanctions_ofac / sanctions_uk")
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    app = create_app()
+    with app.app_context():
+        for summary in refresh_lists(args.sources or None, force=args.force):
+            print(json.dumps(summary, default=str))
+
+
+if __name__ == "__main__":
+    main()
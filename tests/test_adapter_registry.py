@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import pytest
+from app.adapters import registry
+
+
+class Dummy:
+    SOURCE = "dummy"
+
+    def fetch(self, query):
+        return {"status": "ok", "data": {}, "source": self.SOURCE}
+
+
+def test_singletons_per_process_and_source_check(monkeypatch):
+    registry.register("dummy", Dummy)
+    try:
+        a = registry.get_adapter("dummy")
+        assert registry.get_adapter("dummy") is a
+        pid = registry.os.getpid()
+        monkeypatch.setattr(registry.os, "getpid", lambda: pid + 1)
+        assert registry.get_adapter("dummy") is not a
+
+        registry.register("other", Dummy)
+        with pytest.raises(ValueError):
+            registry.get_adapter("other")
+    finally:
+        registry.ADAPTERS.pop("dummy", None)
+        registry.ADAPTERS.pop("other", None)
+        registry.clear_adapters()
+
+
+def test_create_app_does_not_import_heavy_adapter_deps():
+    code = ("import sys; from app import create_app; create_app(); "
+            "print(','.join(m for m in ('pandas', 'rapidfuzz', 'lxml') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
@@ -0,0 +1,65 @@
+import io
+import json
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, Check
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_bulk_lookup_ndjson_dedupes_and_streams(client, app):
+    # VAT без префікса країни — VIES відповідає "Invalid VAT format" без мережі
+    existing = Company(vat_number="111222")
+    db.session.add(existing)
+    db.session.commit()
+
+    body = "\n".join([
+        json.dumps({"vat_number": "111 222"}),
+        json.dumps({"vat_number": "333444"}),
+        "not json",
+        json.dumps({"vat_number": "333444"}),
+        json.dumps({"country": "DE"}),
+    ])
+    resp = client.post("/api/companies/bulk_lookup?batch_size=2", data=body,
+                       content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    lines = _lines(resp)
+    assert [line["line"] for line in lines] == [1, 2, 3, 4, 5]
+    assert lines[0]["company_id"] == existing.id and lines[0]["created"] is False
+    assert lines[1]["created"] is True and lines[3]["created"] is False
+    assert lines[1]["company_id"] == lines[3]["company_id"]
+    assert "error" in lines[2] and "error" in lines[4]
+    assert lines[1]["status"] is not None
+    assert Company.query.count() == 2
+    assert Check.query.filter_by(company_id=existing.id).count() == 1
+
+
+def test_bulk_lookup_csv_upload(client, app):
+    data = {"file": (io.BytesIO(b"vat_number,name\n555666,\n777888,\n"), "suppliers.csv")}
+    resp = client.post("/api/companies/bulk_lookup", data=data, content_type="multipart/form-data")
+    lines = _lines(resp)
+    assert [line["vat_number"] for line in lines] == ["555666", "777888"]
+    assert all(line["created"] for line in lines)
@@ -0,0 +1,64 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, Check, CheckResult, CheckEvent
+from app.services.aggregator import apply_results
+from app.services.bulk_writer import CheckBatchWriter
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+
+
+RESULTS = [
+    {"source": "vies", "status": "ok", "data": {"valid": True}},
+    {"source": "sanctions_eu", "status": "warning", "data": {"match_score": 85}},
+    {"source": "whois", "status": "error", "data": {}},
+]
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _snapshot(company_id):
+    c = db.session.get(Company, company_id)
+    checks = Check.query.filter_by(company_id=company_id).all()
+    results = sorted((r.adapter_name, r.status, r.details) for chk in checks for r in chk.results)
+    events = [(e.event_type, e.payload) for e in CheckEvent.query.filter_by(company_id=company_id)]
+    return c.current_status, c.confidence_score, len(checks), results, events
+
+
+def test_writer_matches_apply_results(app):
+    a, b = Company(name="A", current_status="ok"), Company(name="B", current_status="ok")
+    db.session.add_all([a, b])
+    db.session.commit()
+
+    apply_results(a, RESULTS)
+    writer = CheckBatchWriter(batch_size=10)
+    writer.add(b, RESULTS)
+    assert writer.flush() == [(b.id, "ok", "warning")]
+
+    assert _snapshot(a.id) == _snapshot(b.id)
+    assert db.session.get(Company, b.id).last_checked is not None
+
+
+def test_writer_flushes_when_batch_is_full(app):
+    companies = [Company(name=f"C{i}") for i in range(5)]
+    db.session.add_all(companies)
+    db.session.commit()
+
+    writer = CheckBatchWriter(batch_size=2)
+    for c in companies:
+        writer.add(c, RESULTS)
+    assert Check.query.count() == 4
+    writer.flush()
+    assert Check.query.count() == 5
+    assert CheckResult.query.count() == 15
@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+from app import create_app
+from app.config import Config
+from app.adapters.opencorporates_adapter import OpenCorporatesAdapter
+from app.utils import cache as cache_mod
+from app.utils.cache import MISS, TieredCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    cache_mod.clear_caches()
+    yield
+    cache_mod.clear_caches()
+
+
+def test_sqlite_tier_is_shared_and_bounded(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    a = TieredCache("src", sqlite_path=path, max_entries=50)
+    b = TieredCache("src", sqlite_path=path, max_entries=50)  # інший процес того ж хоста
+    a.set("k", {"status": "ok"}, 60)
+    assert b.get("k") == {"status": "ok"} and b.stats()["hits_shared"] == 1
+    assert TieredCache("other", sqlite_path=path).get("k") is MISS
+
+    for i in range(120):
+        a.set(f"x{i}", i, 60)
+    a.sqlite.evict()
+    assert len(a.sqlite) == 50
+    assert b.get("x119") == 119 and a.sqlite.get("x0") is MISS
+
+
+def test_get_or_set_coalesces_concurrent_misses(tmp_path):
+    c = TieredCache("src", sqlite_path=str(tmp_path / "c.sqlite3"))
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "ok"}
+
+    threads = [threading.Thread(target=c.get_or_set, args=("k", slow, 60)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert c.get_or_set("k", slow, 60) == {"status": "ok"} and len(calls) == 1
+
+    # ttl 0 (напр. HTTP-помилка) — не зберігається
+    assert c.get_or_set("err", lambda: {"status": "unknown"}, lambda v: 0) == {"status": "unknown"}
+    assert c.get("err") is MISS
+
+
+def test_opencorporates_served_from_unified_cache(tmp_path, monkeypatch):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        CACHE_DIR = str(tmp_path)
+        OPENCORP_ENABLED = True
+        OPENCORP_API_KEY = "k"
+
+    requests_made = []
+
+    class Resp:
+        status_code = 200
+
+        def json(self):
+            return {"results": {"companies": [{"company": {"name": "ACME GMBH", "company_number": "HRB 1"}}]}}
+
+    class Session:
+        def get(self, url, params=None, timeout=None):
+            requests_made.append(params)
+            return Resp()
+
+    monkeypatch.setattr("app.adapters.opencorporates_adapter.get_session", lambda base: Session())
+    with create_app(TestConfig).app_context():
+        adapter = OpenCorporatesAdapter()
+        first = adapter.fetch({"vat_number": "DE123456789"})
+        assert first["status"] == "ok" and first["data"]["name"] == "ACME GMBH"
+        assert adapter.fetch({"vat_number": "DE123456789"}) == first
+        assert len(requests_made) == 1
+        stats = cache_mod.source_cache("opencorporates").stats()
+        assert stats["hits_memory"] == 1 and stats["sqlite_entries"] == 1
+    assert (tmp_path / "cache.sqlite3").exists()
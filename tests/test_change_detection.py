@@ -0,0 +1,106 @@
+from datetime import datetime
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, Check
+from app.adapters.registry import FOLLOWUP_SOURCES
+from app.adapters.whois_denic_adapter import WhoisDenicAdapter
+from app.services.change_detection import digest
+from app.workers import async_runner, tasks
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CIRCUIT_BREAKER_ENABLED = False
+    MONITORING_REFRESH_INTERVALS = {}
+
+
+class CountingAdapter:
+    REFRESH_INTERVAL = 86400
+
+    def __init__(self, source, status="ok"):
+        self.SOURCE, self.status, self.calls = source, status, 0
+
+    def fetch(self, query):
+        self.calls += 1
+        return {"status": self.status, "data": {}, "source": self.SOURCE}
+
+
+class ListAdapter(CountingAdapter):
+    version = "v1"
+
+    def fingerprint(self, query):
+        return digest(query.get("name"), self.version)
+
+
+@pytest.fixture
+def adapters(monkeypatch):
+    fakes = {s: CountingAdapter(s) for s in ("vies",) + FOLLOWUP_SOURCES}
+    fakes["sanctions_eu"] = ListAdapter("sanctions_eu")
+    fakes["insolvenz"].status = "unknown"
+    for module in (tasks, async_runner):
+        monkeypatch.setattr(module, "get_adapter", lambda s: fakes[s])
+        monkeypatch.setattr(module, "get_adapters", lambda sources: [fakes[s] for s in sources])
+    return fakes
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _rerun(adapters, company_id):
+    before = {s: a.calls for s, a in adapters.items()}
+    summary = async_runner.run_checks_batch([company_id], changed_only=True)[0]
+    return {s for s, a in adapters.items() if a.calls > before[s]}, summary
+
+
+def test_monitoring_reruns_only_changed_adapters(app, adapters):
+    company = Company(name="ACME GmbH", vat_number="DE811220642", website="acme.test")
+    db.session.add(company)
+    db.session.commit()
+
+    ran, _ = _rerun(adapters, company.id)
+    assert ran == set(adapters)
+
+    # нічого не змінилось: лише невизначений результат (insolvenz) опитується знову
+    ran, summary = _rerun(adapters, company.id)
+    assert ran == {"insolvenz"}
+    assert summary["adapters_reused"] == len(FOLLOWUP_SOURCES)  # vies + всі, крім insolvenz
+    checks = Check.query.filter_by(company_id=company.id).order_by(Check.id).all()
+    first = {r.adapter_name: r for r in checks[0].results}
+    latest = {r.adapter_name: r for r in checks[1].results}
+    assert len(latest) == len(FOLLOWUP_SOURCES) + 1
+    # перевикористаний результат зберігає час оригінального запиту
+    assert latest["vies"].checked_at == first["vies"].checked_at
+
+    # нова версія санкційного списку
+    adapters["sanctions_eu"].version = "v2"
+    ran, _ = _rerun(adapters, company.id)
+    assert ran == {"insolvenz", "sanctions_eu"}
+
+    # змінились входи (назва) — перезапускаються всі адаптери, що від неї залежать
+    company.name = "ACME AG"
+    db.session.commit()
+    ran, _ = _rerun(adapters, company.id)
+    assert ran == set(adapters)
+
+    # інтервал оновлення минув
+    app.config["MONITORING_REFRESH_INTERVALS"] = {"whois": 0}
+    ran, _ = _rerun(adapters, company.id)
+    assert ran == {"insolvenz", "whois"}
+
+
+def test_whois_rechecks_daily_near_domain_expiry(app):
+    adapter = WhoisDenicAdapter()
+    checked = datetime(2026, 1, 1)
+    data = {"rdap": {"events": [{"eventAction": "expiration", "eventDate": "2026-03-02T00:00:00Z"}]}}
+    assert adapter.next_check(data, checked) == datetime(2026, 1, 31)
+    assert adapter.next_check(data, datetime(2026, 2, 10)) == datetime(2026, 2, 11)
+    assert adapter.next_check({"rdap": {}}, checked) is None
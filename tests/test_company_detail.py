@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company
+from app.services.aggregator import apply_results
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _company(checks: int) -> int:
+    c = Company(name=f"Firma {checks}", vat_number=f"DE{checks:09d}")
+    db.session.add(c)
+    db.session.commit()
+    for i in range(checks):
+        apply_results(c, [{"status": "ok", "data": {"n": i}, "source": "vies"},
+                          {"status": "warning" if i % 2 else "ok", "data": {}, "source": "whois"}])
+    return c.id
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine, self.count = engine, 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def _count(app, url):
+    client = app.test_client()
+    db.session.expunge_all()
+    with QueryCounter(db.engine) as qc:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return qc.count, resp
+
+
+def test_detail_endpoints_use_constant_number_of_queries(app):
+    small, large = _company(1), _company(15)
+    counts = {_count(app, f"/api/companies/{cid}")[0] for cid in (small, large)}
+    assert counts == {3}  # компанія + сторінка Check + CheckResult одним selectin
+    web = {_count(app, f"/companies/{cid}")[0] for cid in (small, large)}
+    assert web == {3}
+
+
+def test_check_history_is_paginated_with_results(app):
+    cid = _company(5)
+    client = app.test_client()
+    first = client.get(f"/api/companies/{cid}?limit=2").get_json()
+    assert len(first["checks"]) == 2 and first["next_cursor"]
+    assert first["checks"][0]["id"] > first["checks"][1]["id"]
+    assert {r["adapter"] for r in first["checks"][0]["results"]} == {"vies", "whois"}
+    assert first["checks"][0]["results"][0]["details"] == {"n": 4}
+
+    seen = [c["id"] for c in first["checks"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(f"/api/companies/{cid}?limit=2&cursor={cursor}").get_json()
+        seen += [c["id"] for c in page["checks"]]
+        cursor = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == 5
+
+    assert client.get(f"/api/companies/{cid}?cursor=x").status_code == 400
+    assert client.get("/api/companies/999999").status_code == 404
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company
+from app.services import company_search
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    COMPANY_SEARCH_MAX_PAGE_SIZE = 10
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        base = datetime(2026, 1, 1)
+        # пари з однаковим created_at — курсор має розрізняти їх за id
+        db.session.add_all(Company(name=f"Firma {i:02d} GmbH", vat_number=f"DE{100000000 + i}",
+                                   created_at=base + timedelta(minutes=i // 2)) for i in range(25))
+        db.session.add(Company(name="Müller Logistik AG", vat_number="ATU12345678", created_at=base))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def _pages(client, url):
+    names, cursor = [], None
+    while True:
+        resp = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert resp.status_code == 200
+        names.append([c["name"] for c in resp.get_json()])
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return names
+
+
+def test_keyset_pages_cover_every_company_once_newest_first(app):
+    pages = _pages(app.test_client(), "/api/companies?limit=50")  # обрізається до MAX_PAGE_SIZE
+    assert [len(p) for p in pages] == [10, 10, 6]
+    flat = [n for p in pages for n in p]
+    assert len(set(flat)) == 26
+    assert flat[:3] == ["Firma 24 GmbH", "Firma 23 GmbH", "Firma 22 GmbH"]
+
+
+def test_vat_prefix_and_substring_search(app):
+    client = app.test_client()
+    vats = {c["vat_number"] for c in client.get("/api/companies?q=de 10000001").get_json()}
+    assert vats == {f"DE{100000010 + i}" for i in range(10)}
+    assert [c["name"] for c in client.get("/api/companies?q=logistik").get_json()] == ["Müller Logistik AG"]
+    assert client.get("/api/companies?cursor=broken").status_code == 400
+
+
+def test_create_all_sets_up_sqlite_fts(app):
+    # db.create_all() у фікстурі вже створив і проіндексував companies_fts
+    assert company_search.sqlite_fts_available()
+    assert db.session.execute(db.text("SELECT count(*) FROM companies_fts")).scalar() == 26
+
+
+def test_sqlite_fts_fallback_follows_updates(app):
+    assert company_search.ensure_sqlite_fts()
+    assert "companies_fts" in str(company_search._text_filter("logistik"))
+    items, _ = company_search.search_companies("LOGISTIK")
+    assert [c.name for c in items] == ["Müller Logistik AG"]
+
+    items[0].name = "Müller Spedition AG"
+    db.session.commit()
+    assert company_search.search_companies("logistik")[0] == []
+    assert [c.name for c in company_search.search_companies("spedition")[0]] == ["Müller Spedition AG"]
+    # коротші за триграму запити йдуть через LIKE
+    assert len(company_search.search_companies("AG")[0]) == 1
@@ -0,0 +1,84 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, Check
+from app.adapters.registry import FOLLOWUP_SOURCES
+from app.workers import tasks
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CHECKS_PARALLEL = False
+    CIRCUIT_BREAKER_ENABLED = False
+    CHECK_FRESHNESS_MAX_AGE = 3600
+    CHECK_FRESHNESS_MAX_AGES = {"whois": 0}
+
+
+class CountingAdapter:
+    def __init__(self, source, status="ok"):
+        self.SOURCE, self.status, self.calls = source, status, 0
+
+    def fetch(self, query):
+        self.calls += 1
+        return {"status": self.status, "data": {"name": "ACME GmbH"} if self.SOURCE == "vies" else {}, "source": self.SOURCE}
+
+
+@pytest.fixture
+def adapters(monkeypatch):
+    fakes = {s: CountingAdapter(s) for s in ("vies",) + FOLLOWUP_SOURCES}
+    fakes["insolvenz"].status = "unknown"
+    # як у ViesAdapter: відповідь VIES визначає лише VAT
+    fakes["vies"].fingerprint = lambda q: q["vat_number"]
+    monkeypatch.setattr(tasks, "get_adapter", lambda s: fakes[s])
+    monkeypatch.setattr(tasks, "get_adapters", lambda sources: [fakes[s] for s in sources])
+    return fakes
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def test_repeated_lookup_reuses_fresh_results_and_company(app, adapters):
+    client = app.test_client()
+    first = client.post("/api/companies/lookup", json={"vat_number": "de 811220642", "website": "https://acme.test"}).get_json()
+    assert all(a.calls == 1 for a in adapters.values())
+
+    second = client.post("/api/companies/lookup", json={"vat_number": "DE811220642"}).get_json()
+    assert second["id"] == first["id"] and Company.query.count() == 1
+    # свіже не запитується; whois (max age 0) і "unknown" — так
+    assert {s for s, a in adapters.items() if a.calls == 2} == {"whois", "insolvenz"}
+
+    checks = Check.query.filter_by(company_id=first["id"]).order_by(Check.id).all()
+    assert len(checks) == 2
+    latest = {r.adapter_name: r for r in checks[1].results}
+    assert len(latest) == len(FOLLOWUP_SOURCES) + 1 and latest["vies"].status == "ok"
+
+    tasks._run_checks(first["id"], force=True)
+    assert adapters["vies"].calls == 2 and adapters["sanctions_eu"].calls == 2
+
+
+def test_lookup_with_new_name_checks_the_new_name(app, adapters):
+    client = app.test_client()
+    first = client.post("/api/companies/lookup", json={"vat_number": "DE811220642"}).get_json()
+    second = client.post("/api/companies/lookup", json={"vat_number": "DE811220642", "name": "Other GmbH"}).get_json()
+    assert second["id"] == first["id"] and db.session.get(Company, first["id"]).name == "Other GmbH"
+    # VIES (той самий VAT) — з кешу; санкції — заново, вже для нової назви
+    assert adapters["vies"].calls == 1 and adapters["sanctions_eu"].calls == 2
+
+
+def test_results_shared_between_companies_only_for_the_same_inputs(app, adapters):
+    a = Company(vat_number="DE811220642")
+    b = Company(vat_number="DE811220642", name="Other row")
+    db.session.add_all([a, b])
+    db.session.commit()
+    tasks._run_checks(a.id)
+    tasks._run_checks(b.id)
+    # VIES залежить лише від VAT; санкції перевіряють назву "Other row", а не "ACME GmbH"
+    assert adapters["vies"].calls == 1 and adapters["sanctions_uk"].calls == 2
@@ -0,0 +1,27 @@
+from app import create_app
+from app.config import Config
+from app.utils import http
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    HTTP_POOL_MAXSIZE = 7
+    EXTERNAL_REQUEST_RETRIES = 1
+
+
+def test_sessions_are_shared_per_host_and_rebuilt_after_fork(monkeypatch):
+    http.close_sessions()
+    with create_app(TestConfig).app_context():
+        a = http.get_session("https://rdap.org/domain/x.de")
+        assert http.get_session("https://rdap.org/other") is a
+        assert http.get_session("https://api.ssllabs.com/api/v3/") is not a
+        assert http.get_session("https://rdap.org/", trust_env=False) is not a
+        adapter = a.get_adapter("https://rdap.org/")
+        assert adapter._pool_maxsize == 7 and adapter.max_retries.total == 1
+
+        # дочірній процес Celery prefork отримує власні сесії
+        pid = http.os.getpid()
+        monkeypatch.setattr(http.os, "getpid", lambda: pid + 1)
+        assert http.get_session("https://rdap.org/domain/x.de") is not a
+    http.close_sessions()
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import pytest
+from sqlalchemy import event
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, CompanyLatestCheck
+from app.services.aggregator import apply_results
+from app.services.bulk_writer import CheckBatchWriter
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    COMPANY_EXPORT_CHUNK_SIZE = 2
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _results(sanctions="ok", whois="ok"):
+    return [{"status": "ok", "data": {}, "source": "vies"},
+            {"status": sanctions, "data": {}, "source": "sanctions_eu"},
+            {"status": whois, "data": {}, "source": "whois"}]
+
+
+@pytest.fixture
+def companies(app):
+    cs = [Company(name=f"Firma {i}", vat_number=f"DE{i:09d}") for i in range(5)]
+    db.session.add_all(cs)
+    db.session.commit()
+    apply_results(cs[0], _results())
+    apply_results(cs[0], _results(sanctions="critical"))   # новіший Check заміщує рядок
+    writer = CheckBatchWriter(batch_size=10)
+    writer.add(cs[1], _results(whois="warning"))
+    writer.add(cs[2], _results())
+    writer.add(cs[2], _results(whois="unknown"))           # та сама компанія двічі в батчі
+    writer.flush()
+    return cs
+
+
+def test_summary_row_follows_latest_check(app, companies):
+    rows = {r.company_id: r for r in CompanyLatestCheck.query.all()}
+    assert set(rows) == {companies[0].id, companies[1].id, companies[2].id}
+    assert rows[companies[0].id].status == "critical"
+    assert rows[companies[0].id].adapter_statuses == {"vies": "ok", "sanctions_eu": "critical", "whois": "ok"}
+    assert rows[companies[0].id].check_id == max(c.id for c in companies[0].checks)
+    assert rows[companies[2].id].adapter_statuses["whois"] == "unknown"
+    assert rows[companies[2].id].check_id == max(c.id for c in companies[2].checks)
+
+
+def test_list_filters_read_one_row_per_company(app, companies):
+    client = app.test_client()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        items = client.get("/api/companies?status=critical").get_json()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert [c["name"] for c in items] == ["Firma 0"]
+    assert items[0]["adapters"]["sanctions_eu"] == "critical"
+    assert len(statements) == 1 and "company_latest_check" in statements[0]
+
+    names = [c["name"] for c in client.get("/api/companies?adapter_status=whois:warning").get_json()]
+    assert names == ["Firma 1"]
+    assert client.get("/api/companies?adapter_status=whois").status_code == 400
+    unchecked = [c for c in client.get("/api/companies").get_json() if c["name"] == "Firma 4"]
+    assert unchecked[0]["adapters"] == {}
+
+
+def test_export_streams_every_company(app, companies):
+    client = app.test_client()
+    lines = [json.loads(l) for l in client.get("/api/companies/export").get_data(as_text=True).splitlines()]
+    assert [l["name"] for l in lines] == [f"Firma {i}" for i in range(5)]
+    assert lines[3]["status"] is None and lines[3]["adapters"] == {}
+
+    body = client.get("/api/companies/export?format=csv&adapter_status=sanctions_eu:ok").get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert [r["name"] for r in rows] == ["Firma 1", "Firma 2"]
+    assert rows[0]["whois"] == "warning" and rows[0]["ssl_labs"] == ""
@@ -0,0 +1,110 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, MonitoringChunk, MonitoringRun, MonitoringSubscription
+from app.services import scheduler
+from app.workers import async_runner
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CELERY_TASK_ALWAYS_EAGER = True
+    MONITORING_CHUNK_SIZE = 3
+    MONITORING_GROUP_SIZE = 2
+    MONITORING_SPREAD_SECONDS = 700
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def test_daily_monitoring_fans_out_distinct_companies_in_staggered_chunks(app, monkeypatch):
+    companies = [Company(name=f"C{i}") for i in range(8)]
+    db.session.add_all(companies)
+    db.session.flush()
+    for i, c in enumerate(companies[:7]):
+        db.session.add(MonitoringSubscription(company_id=c.id, enabled=True))
+        if i % 2 == 0:  # другий підписник тієї ж компанії
+            db.session.add(MonitoringSubscription(company_id=c.id, enabled=True))
+    db.session.add(MonitoringSubscription(company_id=companies[7].id, enabled=False))
+    db.session.commit()
+
+    checked, groups = [], []
+    monkeypatch.setattr(async_runner, "run_checks_batch",
+                        lambda ids, requester=None, **kw: checked.append(list(ids)) or [{"company_id": i} for i in ids])
+
+    class FakeGroup:
+        def __init__(self, sigs):
+            self.sigs = list(sigs)
+
+        def apply_async(self):
+            groups.append([(s.args[2], s.options["countdown"]) for s in self.sigs])
+            for s in self.sigs:
+                s.apply()
+
+    monkeypatch.setattr(scheduler, "group", FakeGroup)
+    out = app.celery_app.tasks["daily_monitoring_task"].apply().get()
+
+    ids = [c.id for c in companies[:7]]
+    assert out["companies"] == 7
+    assert checked == [ids[0:3], ids[3:6], ids[6:7]]
+    # 2 чанки в першому group, 1 — у другому; старт пропорційний кількості компаній перед чанком
+    assert [[cd for _, cd in g] for g in groups] == [[0, 300], [600]]
+
+    run = db.session.get(MonitoringRun, out["run_id"])
+    assert (run.status, run.total_companies, run.chunks, run.dispatched, run.completed, run.failed) == ("done", 7, 3, 7, 7, 0)
+    assert run.finished_at is not None
+
+    progress = app.test_client().get("/api/monitoring/runs").get_json()
+    assert progress[0]["id"] == run.id and progress[0]["progress"] == 1.0
+
+
+def test_unfinished_run_blocks_a_second_one(app):
+    db.session.add(MonitoringRun(status="dispatched", total_companies=10))
+    db.session.commit()
+    assert scheduler.run_daily_monitoring()["skipped"] is True
+
+
+def test_redelivered_chunk_runs_and_counts_once(app, monkeypatch):
+    companies = [Company(name=f"C{i}") for i in range(2)]
+    db.session.add_all(companies)
+    db.session.flush()
+    db.session.add_all(MonitoringSubscription(company_id=c.id, enabled=True) for c in companies)
+    db.session.commit()
+
+    sent, checked = [], []
+    monkeypatch.setattr(async_runner, "run_checks_batch",
+                        lambda ids, requester=None, **kw: checked.append(list(ids)) or [{"company_id": i} for i in ids])
+
+    class HeldGroup:
+        # брокер "тримає" чанки до ETA — відправляємо їх пізніше, двічі (redelivery)
+        def __init__(self, sigs):
+            sent.extend(sigs)
+
+        def apply_async(self):
+            pass
+
+    monkeypatch.setattr(scheduler, "group", HeldGroup)
+    run_id = scheduler.run_daily_monitoring()["run_id"]
+    assert MonitoringChunk.query.filter_by(run_id=run_id, status="pending").count() == 1
+
+    for sig in sent + sent:
+        sig.apply()
+    run = db.session.get(MonitoringRun, run_id)
+    assert checked == [[c.id for c in companies]]
+    assert (run.status, run.completed, run.failed) == ("done", 2, 0)
+    assert scheduler.record_chunk(run_id, 0, 2, 0) is False
+
+
+def test_broker_visibility_timeout_outlives_the_spread(app):
+    timeout = app.celery_app.conf.broker_transport_options["visibility_timeout"]
+    assert timeout > TestConfig.MONITORING_SPREAD_SECONDS + Config.MONITORING_RUN_GRACE
+    assert Config.MONITORING_SPREAD_SECONDS + Config.MONITORING_RUN_GRACE < \
+        create_app(Config).celery_app.conf.broker_transport_options["visibility_timeout"]
@@ -0,0 +1,42 @@
+import pytest
+from app.utils import redis_client
+
+
+class FlakyRedis:
+    up = False
+    pings = 0
+
+    @classmethod
+    def from_url(cls, url, **kw):
+        return cls()
+
+    def ping(self):
+        FlakyRedis.pings += 1
+        if not FlakyRedis.up:
+            raise ConnectionError("connection refused")
+        return True
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    import redis
+    monkeypatch.setattr(redis, "Redis", FlakyRedis)
+    monkeypatch.setenv("REDIS_URL", "redis://fake:6379/0")
+    monkeypatch.setenv("REDIS_RETRY_INTERVAL", "30")
+    monkeypatch.setattr(redis_client, "_CLIENT", None)
+    monkeypatch.setattr(redis_client, "_CLIENT_PID", None)
+    monkeypatch.setattr(redis_client, "_FAILED_AT", None)
+    FlakyRedis.up, FlakyRedis.pings = False, 0
+    return FlakyRedis
+
+
+def test_failed_ping_is_retried_after_the_interval(fake_redis, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(redis_client.time, "monotonic", lambda: now[0])
+    assert redis_client.get_redis() is None
+    assert redis_client.get_redis() is None and fake_redis.pings == 1
+
+    fake_redis.up = True
+    now[0] += 31
+    assert isinstance(redis_client.get_redis(), FlakyRedis) and fake_redis.pings == 2
+    assert isinstance(redis_client.get_redis(), FlakyRedis) and fake_redis.pings == 2
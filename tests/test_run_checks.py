@@ -0,0 +1,137 @@
+import time
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.utils import circuit_breaker
+from app.workers import tasks
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CHECKS_PARALLEL = True
+    ADAPTER_TIMEOUT = 5
+    ADAPTER_TIMEOUTS = {"slow": 0.2}
+    CIRCUIT_BREAKER_SOURCES = ("flaky",)
+    CIRCUIT_WINDOW = 4
+    CIRCUIT_MIN_CALLS = 4
+    CIRCUIT_COOLDOWN = 0.2
+
+
+class FakeAdapter:
+    def __init__(self, source, delay=0.0, status="ok"):
+        self.SOURCE = source
+        self.delay = delay
+        self.status = status
+
+        self.calls = 0
+
+    def fetch(self, query):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.status == "error":
+            raise ConnectionError("connection reset")
+        return {"status": self.status, "data": {}, "source": self.SOURCE}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    circuit_breaker.clear_breakers()
+    monkeypatch.setattr(circuit_breaker, "get_redis", lambda: None)
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def test_run_adapters_parallel_keeps_order(app):
+    adapters = [FakeAdapter(f"a{i}", delay=0.1) for i in range(6)]
+    started = time.monotonic()
+    results = tasks._run_adapters(adapters, {})
+    assert [r["source"] for r in results] == [f"a{i}" for i in range(6)]
+    assert time.monotonic() - started < 0.5
+
+
+def test_run_adapters_times_out_slow_adapter(app):
+    results = tasks._run_adapters([FakeAdapter("fast"), FakeAdapter("slow", delay=1.0)], {})
+    assert results[0]["status"] == "ok"
+    assert results[1]["status"] == "unknown" and results[1]["note"] == "adapter timeout"
+
+
+def test_run_checks_batch_creates_one_check_per_company(app):
+    from app.models import Company, Check
+    from app.workers.async_runner import run_checks_batch
+
+    ids = []
+    for i in range(3):
+        c = Company(website=f"https://example{i}.test")
+        db.session.add(c)
+        db.session.commit()
+        ids.append(c.id)
+
+    summaries = run_checks_batch(ids + [9999])
+    assert [s["company_id"] for s in summaries] == ids + [9999]
+    assert summaries[-1]["error"] == "not found"
+    for cid in ids:
+        checks = Check.query.filter_by(company_id=cid).all()
+        assert len(checks) == 1
+        assert {r.adapter_name for r in checks[0].results} >= {"vies", "whois", "ssl_labs", "sanctions_eu"}
+
+
+def test_circuit_opens_on_errors_and_probes_half_open(app):
+    flaky = FakeAdapter("flaky", status="error")
+    for _ in range(4):
+        assert tasks._maybe_run(flaky, {})["data"]["error"] == "connection reset"
+    # коло відкрите — адаптер не викликається
+    res = tasks._maybe_run(flaky, {})
+    assert res["status"] == "unknown" and res["note"].startswith("circuit open") and flaky.calls == 4
+
+    time.sleep(0.25)
+    flaky.status = "ok"
+    assert tasks._maybe_run(flaky, {})["status"] == "ok" and flaky.calls == 5
+    assert circuit_breaker.get_breaker("flaky").state() == "closed"
+    assert tasks._maybe_run(flaky, {})["status"] == "ok" and flaky.calls == 6
+
+
+def test_adaptive_timeout_follows_recent_latency(app):
+    assert tasks._adapter_timeout("flaky") == 5
+    breaker = circuit_breaker.get_breaker("flaky")
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        breaker.record(True, latency)
+    # 3 × p95 (0.4s) < мінімум 2s
+    assert tasks._adapter_timeout("flaky") == 2
+    for latency in (1.0, 1.2, 1.4, 1.5):
+        breaker.record(True, latency)
+    assert tasks._adapter_timeout("flaky") == 4.5
+    assert tasks._adapter_timeout("slow") == 0.2
+
+
+def test_only_the_half_open_probe_changes_breaker_state(app):
+    breaker = circuit_breaker.get_breaker("flaky")
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    assert breaker.state() == "open"
+    # виклик, що стартував до відкриття, завершився успішно — коло лишається відкритим
+    breaker.record(True, 0.1)
+    assert breaker.state() == "open"
+
+    time.sleep(0.25)
+    assert breaker.allow() == circuit_breaker.PROBE
+    assert breaker.allow() is False
+    breaker.record(False, 0.1)
+    assert breaker.opened_at() is not None
+    breaker.record(True, 0.1, probe=True)
+    assert breaker.state() == "closed"
+
+
+def test_timed_out_call_is_recorded_once(app):
+    breaker = circuit_breaker.get_breaker("flaky")
+    flaky = FakeAdapter("flaky", delay=1.0)
+    app.config["ADAPTER_TIMEOUTS"] = {"flaky": 0.2}
+    results = tasks._run_adapters([FakeAdapter("fast"), flaky], {})
+    assert results[1]["note"] == "adapter timeout"
+    time.sleep(1.0)
+    # лише таймаут; пізній успіх самого виклику не записаний
+    assert [ok for ok, _ in breaker.samples()] == [False]
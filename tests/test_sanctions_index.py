@@ -0,0 +1,120 @@
+import os
+import random
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+from app.services import sanctions_index
+from app.services.sanctions_index import SanctionsIndex, get_index, match_key
+
+ROWS = [
+    {"Name": "Rosneft Oil Company", "Alias": "ROSNEFT", "ID": "RU7706107510"},
+    {"Name": "Bank Rossiya", "Alias": "", "ID": "RU7831000122"},
+    {"Name": "Sberbank of Russia", "Alias": "Sberbank", "ID": ""},
+    {"Name": "company oil rosneft", "Alias": "", "ID": "X-1"},
+    {"Name": "Acme Trading LLC", "Alias": "ACME", "ID": "DE123456789"},
+]
+QUERIES = ["Rosneft Oil Company", "oil rosneft", "Bank Rosiya", "Siemens AG", "acme trading", "ACME", "x"]
+
+
+def _brute(df, name_cols, name):
+    # Старий алгоритм із адаптерів: iterrows × name_cols
+    best_score, matched = 0, None
+    for _, row in df.iterrows():
+        for col in name_cols:
+            score = fuzz.token_sort_ratio(name.lower(), str(row.get(col, "")).lower())
+            if score > best_score:
+                best_score, matched = score, str(row.get(col, ""))
+    return best_score, matched
+
+
+def test_best_match_same_as_row_scan():
+    df = pd.DataFrame(ROWS)
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), df, ["Name", "Alias"])
+    for q in QUERIES:
+        score, pos = idx.best_match(q)
+        assert (score, idx.names[pos] if pos is not None else None) == _brute(df, ["Name", "Alias"], q)
+
+
+def test_best_matches_batch_agrees_with_single():
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), pd.DataFrame(ROWS), ["Name", "Alias"])
+    assert idx.best_matches(QUERIES + [""]) == [idx.best_match(q) for q in QUERIES] + [(0, None)]
+    assert idx.best_match("Siemens AG", score_cutoff=80) == (0, None)
+
+
+def _payload(row):
+    # snapshot зберігає лише колонки імен та ідентифікаторів
+    return {"Name": row["Name"], "ID": row["ID"]}
+
+
+def test_find_identifier_returns_rows():
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), pd.DataFrame(ROWS), ["Name"])
+    assert idx.columns == ["Name", "ID"]
+    assert idx.find_identifier("de123456789") == [_payload(ROWS[4])]
+    assert idx.find_identifier(" DE 123-456-789 ") == [_payload(ROWS[4])]
+    assert idx.find_identifier("x1") == [_payload(ROWS[3])]
+    assert idx.find_identifier("DE000") == []
+    assert idx.find_identifier("ACME") == []
+
+
+def test_find_identifier_ignores_hash_collisions(monkeypatch):
+    # усі ключі в один кошик: рядок повертається лише за збігом самого ключа
+    monkeypatch.setattr(sanctions_index, "identifier_hash", lambda key: 42)
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), pd.DataFrame(ROWS), ["Name"])
+    assert idx.find_identifier("DE123456789") == [_payload(ROWS[4])]
+    assert idx.find_identifier("DE000") == []
+
+
+def test_get_index_rebuilds_only_on_file_change(tmp_path):
+    sanctions_index.clear_indexes()
+    path = tmp_path / "list.csv"
+    pd.DataFrame(ROWS).to_csv(path, index=False)
+    calls = []
+
+    def load():
+        calls.append(1)
+        df = pd.read_csv(path, dtype=str).fillna("")
+        return df, ["Name"]
+
+    first = get_index("test", str(path), load)
+    assert get_index("test", str(path), load) is first
+    assert len(calls) == 1
+
+    # інший процес: індекс відкривається зі snapshot'а без парсингу CSV
+    sanctions_index.clear_indexes()
+    mapped = get_index("test", str(path), load)
+    assert len(calls) == 1 and mapped is not first
+    assert isinstance(mapped.post_ids, np.memmap)
+    assert [mapped.best_match(q) for q in QUERIES] == [first.best_match(q) for q in QUERIES]
+    assert mapped.find_identifier("RU7831000122") == first.find_identifier("RU7831000122")
+
+    pd.DataFrame(ROWS[:2]).to_csv(path, index=False)
+    os.utime(path, ns=(1, 1))
+    second = get_index("test", str(path), load)
+    assert second is not first and len(second) == 2
+    assert len(calls) == 2
+    # лишається тільки snapshot актуальної версії
+    assert len(os.listdir(tmp_path / "snapshots" / "test")) == 1
+
+
+def test_snapshot_round_trip_of_empty_list(tmp_path):
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), pd.DataFrame({"Name": [""]}), ["Name"])
+    idx.save(str(tmp_path / "snap"))
+    loaded = SanctionsIndex.load(str(tmp_path / "snap"))
+    assert len(loaded) == 0 and loaded.best_match("acme") == (0, None) and loaded.find_identifier("DE1") == []
+
+
+def test_blocking_keeps_every_name_above_guard():
+    rnd = random.Random(7)
+    words = ["oil", "gas", "bank", "trade", "group", "nord", "alpha", "ltd", "llc", "petro"]
+    names = [" ".join(rnd.choice(words) for _ in range(rnd.randint(1, 4))) + f" {rnd.randint(0, 99)}"
+             for _ in range(500)]
+    idx = SanctionsIndex.from_dataframe("test", (0, 0), pd.DataFrame({"Name": names}), ["Name"])
+    for guard in (80, 88, 92):
+        for name in rnd.sample(names, 40) + ["petro nord ltd", "bank"]:
+            q = match_key(name)
+            cand = idx.candidates(q, guard)
+            if cand is None:
+                continue
+            above = {i for i, k in enumerate(idx.keys) if fuzz.ratio(q, k) >= guard}
+            assert above <= set(cand.tolist())
+            assert idx.best_match(name, recall_guard=guard) == idx.best_match(name) or idx.best_match(name)[0] < guard
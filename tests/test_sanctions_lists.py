@@ -0,0 +1,170 @@
+import os
+import pandas as pd
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company, CheckEvent, MonitoringSubscription
+from app.adapters.sanctions_ofac_adapter import OFACAdapter
+from app.services import sanctions_index, sanctions_lists
+from app.utils.locks import exclusive
+
+V1 = b"Name,ID\nRosneft Oil Company,RU7706107510\nBank Rossiya,\n"
+V2 = b"Name,ID\nRosneft Oil Company,RU7706107510\nACME Trading L.L.C,\nInitech Systems,\nShell Co,DE 111 222 333\n"
+
+
+class Resp:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code, self.content, self.headers = status_code, content, headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), 7):
+            yield self.content[i:i + 7]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeServer:
+    def __init__(self):
+        self.body, self.etag, self.requests = V1, '"v1"', []
+        self.length = None
+
+    def get(self, url, headers=None, stream=False, **kw):
+        assert stream
+        self.requests.append(headers or {})
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return Resp(304)
+        return Resp(200, self.body, {"ETag": self.etag, "Content-Length": str(self.length or len(self.body))})
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        CACHE_DIR = str(tmp_path)
+        SANCTIONS_OFAC_CSV_URL = "https://lists.example/sdn.csv"
+        SANCTIONS_OFAC_CACHE_TTL = 0
+        SANCTIONS_OFAC_ENABLED = True
+
+    sanctions_index.clear_indexes()
+    server = FakeServer()
+    monkeypatch.setattr(sanctions_lists, "requests_session_with_retries", lambda *a: server)
+    app = create_app(TestConfig)
+    app.server = server
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+    sanctions_index.clear_indexes()
+
+
+def _monitored(name, vat=None, enabled=True):
+    c = Company(name=name, vat_number=vat)
+    db.session.add(c)
+    db.session.flush()
+    db.session.add(MonitoringSubscription(company_id=c.id, enabled=enabled))
+    return c
+
+
+def test_refresh_diffs_and_flags_only_matching_monitored_companies(app):
+    acme = _monitored("Acme Trading LLC")
+    _monitored("Globex")
+    _monitored("Initech Systems", enabled=False)
+    shell = _monitored("Other Name GmbH", vat="DE111222333")
+    db.session.commit()
+
+    first = sanctions_lists.refresh_list("sanctions_ofac")
+    assert first["status"] == "updated" and first["rescreened"] == []
+
+    assert sanctions_lists.refresh_list("sanctions_ofac")["status"] == "not_modified"
+    assert app.server.requests[-1]["If-None-Match"] == '"v1"'
+
+    app.server.body, app.server.etag = V2, '"v2"'
+    summary = sanctions_lists.refresh_list("sanctions_ofac")
+    assert summary["status"] == "updated"
+    assert (summary["added"], summary["removed"]) == (3, 1)
+    assert summary["rescreened"] == [acme.id, shell.id]
+
+    events = CheckEvent.query.filter_by(event_type="new_sanction").order_by(CheckEvent.company_id).all()
+    assert [e.company_id for e in events] == [acme.id, shell.id]
+    assert events[0].payload["matched_name"] == "ACME Trading L.L.C"
+    assert events[1].payload["match_vat"] == "DE111222333"
+    assert len(sanctions_lists.list_index("sanctions_ofac")) == 4
+
+
+def test_rescreen_ignores_identifier_hash_collisions(app, monkeypatch):
+    real = sanctions_index.identifier_hash
+    collide = lambda key: real("DE111222333" if key == "DE999888777" else key)
+    monkeypatch.setattr(sanctions_index, "identifier_hash", collide)
+    monkeypatch.setattr(sanctions_lists, "identifier_hash", collide)
+    _monitored("Unrelated GmbH", vat="DE999888777")
+    db.session.commit()
+
+    sanctions_lists.refresh_list("sanctions_ofac")
+    app.server.body, app.server.etag = V2, '"v2"'
+    assert sanctions_lists.refresh_list("sanctions_ofac")["rescreened"] == []
+
+
+def test_invalid_download_keeps_current_list(app):
+    assert sanctions_lists.refresh_list("sanctions_ofac")["status"] == "updated"
+    path = sanctions_lists.list_path("sanctions_ofac")
+    before = open(path, "rb").read()
+
+    app.server.body, app.server.etag = b"<html>maintenance</html>", '"broken"'
+    summary = sanctions_lists.refresh_list("sanctions_ofac")
+    assert summary["status"] == "failed" and "HTML" in summary["error"]
+    assert open(path, "rb").read() == before
+    assert not [f for f in os.listdir(os.path.dirname(path)) if ".tmp-" in f]
+
+
+def test_refresh_is_skipped_while_another_process_holds_the_lock(app):
+    path = sanctions_lists.list_path("sanctions_ofac")
+    with exclusive("sanctions_refresh_sanctions_ofac", 60, os.path.dirname(path)) as held:
+        assert held
+        assert sanctions_lists.refresh_list("sanctions_ofac")["status"] == "locked"
+    assert app.server.requests == []
+
+
+def test_adapter_never_downloads_on_request_path(app):
+    result = OFACAdapter().fetch({"name": "Rosneft Oil Company"})
+    assert result["status"] == "unknown" and app.server.requests == []
+
+    sanctions_lists.refresh_list("sanctions_ofac")
+    calls = len(app.server.requests)
+    assert OFACAdapter().fetch({"name": "Rosneft Oil Company"})["status"] == "critical"
+    assert len(app.server.requests) == calls
+
+
+def test_download_is_verified_and_unchanged_body_is_not_reinstalled(app):
+    assert sanctions_lists.refresh_list("sanctions_ofac")["status"] == "updated"
+    meta = sanctions_lists.read_meta(sanctions_lists.list_path("sanctions_ofac"))
+    assert len(meta["sha256"]) == 64 and meta["size"] == len(V1)
+    live = sanctions_lists.list_index("sanctions_ofac")
+
+    app.server.etag = '"v1-reissued"'  # той самий файл під новим ETag
+    assert sanctions_lists.refresh_list("sanctions_ofac")["status"] == "not_modified"
+    assert sanctions_lists.list_index("sanctions_ofac") is live
+
+    app.server.body, app.server.etag, app.server.length = V2, '"v2"', len(V2) + 100
+    summary = sanctions_lists.refresh_list("sanctions_ofac")
+    assert summary["status"] == "failed" and "truncated" in summary["error"]
+    assert sanctions_lists.list_index("sanctions_ofac") is live
+
+
+def test_chunked_parse_builds_same_index(app):
+    sanctions_lists.refresh_list("sanctions_ofac")
+    path = sanctions_lists.list_path("sanctions_ofac")
+    name_cols, chunks = sanctions_lists.iter_chunks("sanctions_ofac", path, chunk_rows=1)
+    chunked = sanctions_index.SanctionsIndex.from_chunks("x", (0, 0), chunks, name_cols)
+    whole = sanctions_index.SanctionsIndex.from_dataframe("x", (0, 0), pd.read_csv(path, dtype=str).fillna(""), name_cols)
+    assert chunked.keys == whole.keys and chunked.n_rows == whole.n_rows == 2
+    assert chunked.find_identifier("RU7706107510") == whole.find_identifier("RU7706107510")
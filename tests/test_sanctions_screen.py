@@ -0,0 +1,67 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Company
+from app.services import sanctions_index, sanctions_lists, sanctions_screen
+
+EU = "Name,Programme\nRosneft Oil Company,RUS\nBank Rossiya,RUS\n"
+OFAC = "Name,ID\nAcme Trading L.L.C,\nShell Co,DE 111 222 333\n"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        CACHE_DIR = str(tmp_path)
+        SANCTIONS_OFAC_ENABLED = True
+        SANCTIONS_UK_ENABLED = True
+        SANCTIONS_SCREEN_MAX_NAMES = 5
+
+    (tmp_path / "sanctions_eu.csv").write_text(EU)
+    (tmp_path / "ofac_sdn.csv").write_text(OFAC)
+    sanctions_index.clear_indexes()
+    requested = []
+    monkeypatch.setattr(sanctions_lists, "request_refresh", requested.append)
+    app = create_app(TestConfig)
+    app.refresh_requested = requested
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+    sanctions_index.clear_indexes()
+
+
+def test_screen_matches_names_and_vats_across_lists(app):
+    out = sanctions_screen.screen(["Rosneft Oil Company", {"name": "ACME Trading LLC"}, "DE111222333",
+                                   "Globex", "rosneft  oil company"])
+    assert out["sources"] == ["sanctions_eu", "sanctions_ofac"]
+    assert out["unavailable"] == ["sanctions_uk"] and app.refresh_requested == ["sanctions_uk"]
+    rosneft, acme, vat, globex, dup = out["results"]
+    assert rosneft["status"] == "critical" and rosneft["sources"] == ["sanctions_eu"]
+    assert rosneft["matches"][0]["matched_name"] == "Rosneft Oil Company"
+    assert acme["sources"] == ["sanctions_ofac"] and acme["matches"][0]["match_score"] >= 92
+    assert vat["matches"] == [{"source": "sanctions_ofac", "status": "critical", "match_vat": "DE111222333"}]
+    # UK ще не завантажено — "ok" сказати не можна
+    assert globex["status"] == "unknown" and globex["matches"] == []
+    # найкращий кандидат і score по кожному списку — і нижче порогу
+    eu, ofac, uk = globex["best"]
+    assert (eu["source"], eu["status"], ofac["status"]) == ("sanctions_eu", "ok", "ok")
+    assert 0 < eu["match_score"] < 80 and eu["matched_name"] in ("Rosneft Oil Company", "Bank Rossiya")
+    assert uk == {"source": "sanctions_uk", "status": "unknown"}
+    assert rosneft["best"][1]["source"] == "sanctions_ofac" and rosneft["best"][1]["status"] == "ok"
+    assert dup["matches"] == rosneft["matches"]
+    assert out["stats"]["names"] == 5 and out["stats"]["distinct_names"] == 3
+    assert out["stats"]["names_per_sec"] > 0
+
+
+def test_screen_endpoint_validates_and_creates_no_companies(app):
+    client = app.test_client()
+    r = client.post("/api/sanctions/screen", json={"names": ["Bank Rossiya"], "sources": ["sanctions_eu"]})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["results"][0]["status"] == "critical" and body["unavailable"] == []
+    assert client.post("/api/sanctions/screen", json={"names": []}).status_code == 400
+    assert client.post("/api/sanctions/screen", json={"names": ["x"] * 6}).status_code == 413
+    assert Company.query.count() == 0
@@ -0,0 +1,108 @@
+import pytest
+import requests
+from app import create_app
+from app.config import Config
+from app.adapters.vies_adapter import ViesAdapter, vies_cache
+from app.utils.cache import LRUCache, MISS, clear_caches
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CACHE_BACKEND = "memory"
+
+
+@pytest.fixture
+def app():
+    clear_caches()
+    with create_app(TestConfig).app_context() as ctx:
+        yield ctx.app
+    clear_caches()
+
+
+@pytest.fixture
+def adapter(app, monkeypatch):
+    adapter = ViesAdapter()
+    calls = []
+
+    def post_check(cc, num):
+        calls.append((cc, num))
+        if num == "500":
+            raise requests.HTTPError("500 Server Error: MS_UNAVAILABLE")
+        return {"valid": num != "000", "name": "ACME", "address": None, "requestDate": "2024-01-01"}
+
+    monkeypatch.setattr(adapter, "_post_check", post_check)
+    adapter.calls = calls
+    return adapter
+
+
+def test_valid_and_invalid_answers_are_cached(adapter):
+    first = adapter.fetch({"vat_number": "DE123"})
+    assert adapter.fetch({"vat_number": "de 123"})["data"]["name"] == first["data"]["name"]
+    assert adapter.fetch({"vat_number": "DE000"})["status"] == "warning"
+    assert adapter.fetch({"vat_number": "DE000"})["status"] == "warning"
+    assert adapter.calls == [("DE", "123"), ("DE", "000")]
+    stats = vies_cache().stats()
+    assert stats["hits_memory"] == 2 and stats["sets"] == 2
+
+
+def test_transient_errors_use_short_ttl(adapter, monkeypatch):
+    monkeypatch.setattr(adapter, "_cache_ttl", lambda parsed: 3600)
+    assert adapter.fetch({"vat_number": "DE500"})["note"] == "VIES HTTP error"
+    again = adapter.fetch({"vat_number": "DE500"})
+    assert again["note"] == "VIES HTTP error" and "cached" in again["data"]["error"]
+    assert len(adapter.calls) == 1
+
+    vies_cache().memory._data.clear()  # TTL помилки минув
+    adapter.fetch({"vat_number": "DE500"})
+    assert len(adapter.calls) == 2
+
+
+def test_lru_evicts_oldest_and_expires():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1, expires=1e12)
+    lru.set("b", 2, expires=1e12)
+    lru.get("a")
+    lru.set("c", 3, expires=1e12)
+    assert lru.get("b") is MISS and lru.get("a") == 1
+    lru.set("d", 4, expires=0)
+    assert lru.get("d") is MISS
+
+
+def test_busy_fault_is_retried(app, monkeypatch):
+    monkeypatch.setitem(app.config, "VIES_BUSY_BACKOFF", 0)
+    adapter = ViesAdapter()
+    ok = b"<Envelope><Body><checkVatResponse><valid>true</valid><name>ACME</name></checkVatResponse></Body></Envelope>"
+    replies = [(500, b"<faultstring>MS_MAX_CONCURRENT_REQ</faultstring>"), (200, ok)]
+
+    class Resp:
+        def __init__(self, status, content):
+            self.status_code, self.content = status, content
+
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                raise requests.HTTPError(str(self.status_code))
+
+    monkeypatch.setattr(adapter.session, "post", lambda *a, **kw: Resp(*replies.pop(0)))
+    assert adapter.fetch({"vat_number": "DE999"})["status"] == "ok"
+    assert replies == []
+
+
+def test_token_bucket_throttles_per_key(monkeypatch):
+    import time
+    from app.utils import rate_limit
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: None)
+    bucket = rate_limit.TokenBucket("test", rate=10, burst=2)
+    assert bucket.try_acquire("DE") == 0 and bucket.try_acquire("DE") == 0
+    assert bucket.try_acquire("DE") > 0 and bucket.try_acquire("FR") == 0
+    started = time.monotonic()
+    assert bucket.acquire("DE", timeout=1)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_throttle_miss_is_not_cached(adapter, monkeypatch):
+    from app.adapters import vies_adapter
+    monkeypatch.setattr(vies_adapter.vies_limiter(), "acquire", lambda key, timeout: False)
+    monkeypatch.setattr(adapter, "_post_check", lambda cc, num: adapter._post(cc, b""))
+    assert "rate limit" in adapter.fetch({"vat_number": "DE321"})["data"]["error"]
+    assert vies_cache().get("check:DE:321") is MISS